@@ -0,0 +1,151 @@
+"""Concurrent sessions on one event loop: synchronous vs async `ask_chromadb`.
+
+N simulated users share one asyncio event loop, as sessions of one
+`adk api_server` process do. Each user asks `--questions` eval questions,
+waiting `--think-ms` (exponentially distributed) after each answer. The
+`sync` mode calls `rag_agent.tools.ask_chromadb` on the loop, which is what
+a synchronous tool amounts to. The `async` mode awaits
+`rag_agent.async_tools.ask_chromadb`, which runs the retrieval on the tool
+pool. For each N the script reports:
+
+- `p50 ms` / `p99 ms`: time from when a user's question is due to its answer,
+  so waiting for a stalled loop counts;
+- `q/s`: questions answered per second;
+- `lag p99`: how late a 10 ms timer on the loop fires, i.e. the stall every
+  other coroutine of the process sees;
+- `busy`: questions answered "busy" because the pool's queue was full.
+
+The query embedding cache is off (unless `RAG_EMBEDDING_CACHE_SIZE` is set),
+so every question is encoded. Run from the `RAG` directory:
+
+    uv run python eval/bench_async_tools.py --users 1 4 16 64
+    RAG_TOOL_WORKERS=8 RAG_TOOL_QUEUE=16 uv run python eval/bench_async_tools.py --users 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAG_DIR))
+os.environ.setdefault("RAG_EMBEDDING_CACHE_SIZE", "0")
+
+from rag_agent import async_tools, tools  # noqa: E402
+from rag_agent.config import config  # noqa: E402
+
+DATASET = RAG_DIR / "eval" / "data" / "conversation.test.1.json"
+
+
+def load_queries(path: Path) -> list[str]:
+    queries = []
+    for turn in json.loads(path.read_text()):
+        if turn.get("expected_tool_use"):
+            queries.append(turn["query"])
+            queries.extend(
+                use["tool_input"]["query"] for use in turn["expected_tool_use"]
+            )
+    return queries
+
+
+async def heartbeat(
+    lags: list[float], stop: asyncio.Event, interval: float = 0.01
+) -> None:
+    while not stop.is_set():
+        due = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - due) * 1000)
+
+
+async def user(
+    mode: str,
+    index: int,
+    queries: list[str],
+    args: argparse.Namespace,
+    latencies: list[float],
+    busy: list[int],
+) -> None:
+    rng = random.Random(index)
+    for i in range(args.questions):
+        think = rng.expovariate(1000 / args.think_ms) if args.think_ms > 0 else 0.0
+        due = time.perf_counter() + think
+        await asyncio.sleep(think)
+        query = queries[(index + i) % len(queries)]
+        if mode == "sync":
+            result = tools.ask_chromadb(query)
+        else:
+            result = await async_tools.ask_chromadb(query_text=query)
+        latencies.append((time.perf_counter() - due) * 1000)
+        if result and result[0].startswith("Knowledge base busy"):
+            busy.append(1)
+
+
+async def run(
+    mode: str, users: int, queries: list[str], args: argparse.Namespace
+) -> dict[str, float]:
+    latencies: list[float] = []
+    lags: list[float] = []
+    busy: list[int] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(user(mode, i, queries, args, latencies, busy) for i in range(users))
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "qps": len(latencies) / elapsed,
+        "lag_p99": float(np.percentile(lags, 99)) if lags else 0.0,
+        "busy": len(busy),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--users", type=int, nargs="+", default=[1, 4, 16, 64], help="Concurrent users"
+    )
+    parser.add_argument("--questions", type=int, default=10, help="Questions per user")
+    parser.add_argument(
+        "--think-ms",
+        type=float,
+        default=50.0,
+        help="Mean pause between a user's questions",
+    )
+    parser.add_argument(
+        "--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"]
+    )
+    args = parser.parse_args()
+
+    queries = load_queries(DATASET)
+    tools.warm_up()
+    tools.ask_chromadb(queries[0])
+    print(
+        f"{config.vector_store} store, {config.embedding_backend} encoder, "
+        f"{config.tool_workers} tool workers, queue {config.tool_queue}, "
+        f"{args.questions} questions per user, think {args.think_ms:g} ms\n"
+    )
+    print(
+        f"{'mode':<6} {'users':>5} {'p50 ms':>8} {'p99 ms':>8} {'q/s':>7} {'lag p99':>8} {'busy':>5}"
+    )
+    for users in args.users:
+        for mode in args.modes:
+            stats = asyncio.run(run(mode, users, queries, args))
+            print(
+                f"{mode:<6} {users:>5} {stats['p50']:8.1f} {stats['p99']:8.1f} {stats['qps']:7.1f} "
+                f"{stats['lag_p99']:8.1f} {stats['busy']:5d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
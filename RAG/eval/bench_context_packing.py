@@ -0,0 +1,93 @@
+"""Prompt tokens per retrieval: plain chunk formatting vs merged, packed context.
+
+For every question in `eval/data/conversation.test.1.json` that expects a
+retrieval call, retrieves `n` chunks and reports the tokens of the tool
+output the model has to prefill, with and without context packing, and the
+share of those tokens that carry distinct page text (overlap repeated by
+neighbouring chunks is not distinct).
+
+Run from the `RAG` directory:
+
+    uv run python eval/bench_context_packing.py --n 3 5 10
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAG_DIR))
+
+from rag_agent import tools  # noqa: E402
+from rag_agent.config import config  # noqa: E402
+from rag_agent.context import count_tokens  # noqa: E402
+
+DATASET = RAG_DIR / "eval" / "data" / "conversation.test.1.json"
+
+
+def load_queries(path: Path) -> list[str]:
+    return [
+        turn["query"]
+        for turn in json.loads(path.read_text())
+        if turn.get("expected_tool_use")
+    ]
+
+
+def distinct_chars(metadatas: list[dict]) -> int:
+    """Characters of page text covered by the chunks, counting overlaps once."""
+    ranges: dict[tuple, list[tuple[int, int]]] = {}
+    for meta in metadatas:
+        ranges.setdefault((meta["source"], meta["page_number"]), []).append(
+            (meta["char_start"], meta["char_end"])
+        )
+    total = 0
+    for spans in ranges.values():
+        end = -1
+        for start, stop in sorted(spans):
+            total += max(0, stop - max(start, end))
+            end = max(end, stop)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", type=Path, default=DATASET)
+    parser.add_argument(
+        "--n", type=int, nargs="+", default=[3, 5, 10], help="Chunks retrieved"
+    )
+    args = parser.parse_args()
+
+    queries = load_queries(args.dataset)
+    tools.warm_up()
+    print(f"{len(queries)} queries, context budget {config.context_tokens} tokens\n")
+    print(
+        f"{'n':>3}  {'plain tokens':>12}  {'packed tokens':>13}  {'merge only':>10}  {'distinct chars':>14}"
+    )
+    for n in args.n:
+        plain = packed = merged = distinct = 0
+        for query in queries:
+            results = tools.retrieve([query], n)
+            docs, metas = results["documents"][0], results["metadatas"][0]
+            distinct += distinct_chars(metas)
+            config.context_packing = False
+            plain += sum(
+                count_tokens(text) for text in tools.build_context(docs, metas)
+            )
+            config.context_packing = True
+            packed += sum(
+                count_tokens(text) for text in tools.build_context(docs, metas)
+            )
+            budget, config.context_tokens = config.context_tokens, 0
+            merged += sum(
+                count_tokens(text) for text in tools.build_context(docs, metas)
+            )
+            config.context_tokens = budget
+        print(
+            f"{n:>3}  {plain / len(queries):12.0f}  {packed / len(queries):13.0f}  "
+            f"{merged / len(queries):10.0f}  {distinct / len(queries):14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
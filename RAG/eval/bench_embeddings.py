@@ -0,0 +1,155 @@
+"""Embedding backends compared: cold start, encode throughput, RSS, equivalence.
+
+Each backend (`torch`, `onnx`, `onnx-int8`) runs in a fresh interpreter,
+which reports:
+
+- `cold s`: imports, model load and the first encode, i.e. what the first
+  query pays;
+- `docs/s`: throughput encoding stored chunks, as ingestion does;
+- `RSS MB`: peak resident memory of that process.
+
+Equivalence with `torch` is checked on the vectors themselves (mean and
+minimum cosine similarity) and on retrieval: the overlap of the top-k chunk
+ids returned by the collection for the eval questions.
+
+Run from the `RAG` directory (the ONNX backends download the Hub export of
+the model, or use `RAG_EMBEDDING_ONNX_PATH`):
+
+    uv run python eval/bench_embeddings.py --docs 256 --k 5
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAG_DIR))
+
+from rag_agent import tools  # noqa: E402
+from rag_agent.embeddings import BACKENDS  # noqa: E402
+
+DATASET = RAG_DIR / "eval" / "data" / "conversation.test.1.json"
+
+WORKER = """
+import json, resource, sys, time
+start = time.perf_counter()
+import numpy as np
+from rag_agent.config import config
+from rag_agent.embeddings import load_embedding_function
+embed = load_embedding_function(sys.argv[1], config.embedding_model, config.embedding_onnx_path)
+embed(["warm up"])
+cold = time.perf_counter() - start
+texts = json.load(open(sys.argv[2]))
+queries, docs = texts["queries"], texts["docs"]
+query_vectors = np.asarray(embed(queries))
+start = time.perf_counter()
+doc_vectors = np.asarray(embed(docs))
+docs_per_s = len(docs) / (time.perf_counter() - start)
+np.save(sys.argv[3], np.vstack([query_vectors, doc_vectors]))
+try:
+    # Peak RSS of this process image; ru_maxrss would include the parent's
+    # peak, which Linux carries over across fork and exec.
+    with open("/proc/self/status") as f:
+        rss_mb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+except OSError:
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"cold_s": cold, "docs_per_s": docs_per_s, "rss_mb": rss_mb}))
+"""
+
+
+def load_queries(path: Path) -> list:
+    queries = []
+    for turn in json.loads(path.read_text()):
+        if turn.get("expected_tool_use"):
+            queries.append(turn["query"])
+            queries.extend(
+                use["tool_input"]["query"] for use in turn["expected_tool_use"]
+            )
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS
+    )
+    parser.add_argument(
+        "--docs", type=int, default=256, help="Stored chunks encoded for throughput"
+    )
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    collection = tools.get_collection()
+    docs = collection.get(limit=args.docs, include=["documents"])["documents"]
+    queries = load_queries(DATASET)
+
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = Path(tmp) / "texts.json"
+        texts_path.write_text(json.dumps({"queries": queries, "docs": docs}))
+        for backend in args.backends:
+            vectors_path = Path(tmp) / f"{backend}.npy"
+            completed = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    WORKER,
+                    backend,
+                    str(texts_path),
+                    str(vectors_path),
+                ],
+                cwd=RAG_DIR,
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                error = (
+                    completed.stderr.strip().splitlines()[-1]
+                    if completed.stderr
+                    else "failed"
+                )
+                print(f"{backend:<10} failed: {error}")
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(vectors_path)
+
+    reference = vectors.get("torch")
+    reference_ids = None
+    if reference is not None:
+        reference_ids = collection.query(
+            query_embeddings=reference[: len(queries)], n_results=args.k, include=[]
+        )["ids"]
+
+    print(f"{len(queries)} queries, {len(docs)} docs\n")
+    print(
+        f"{'backend':<10} {'cold s':>7} {'docs/s':>8} {'RSS MB':>7} {'cos mean':>9} {'cos min':>8} {f'top-{args.k} overlap':>14}"
+    )
+    for backend, stats in results.items():
+        row = f"{backend:<10} {stats['cold_s']:7.2f} {stats['docs_per_s']:8.1f} {stats['rss_mb']:7.0f}"
+        if reference is not None:
+            cosine = np.sum(vectors[backend] * reference, axis=1) / (
+                np.linalg.norm(vectors[backend], axis=1)
+                * np.linalg.norm(reference, axis=1)
+            )
+            ids = collection.query(
+                query_embeddings=vectors[backend][: len(queries)],
+                n_results=args.k,
+                include=[],
+            )["ids"]
+            overlap = np.mean(
+                [
+                    len(set(a) & set(b)) / args.k
+                    for a, b in zip(ids, reference_ids, strict=True)
+                ]
+            )
+            row += f" {cosine.mean():9.4f} {cosine.min():8.4f} {overlap:14.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Section-scoped questions with and without metadata filters.
+
+Each question names a part of the 10-K, as users do ("according to the
+MD&A", "in the risk factors"). For every question, retrieval runs once over
+the whole knowledge base and once with the `section` filter the tools build
+from that name, and the script reports:
+
+- `in section`: share of the returned chunks that come from the named Item;
+- `pages`: distinct pages the chunks come from;
+- `p50 ms`: median retrieval latency over `--repeat` runs (query embeddings
+  are cached after the first run, so this is mostly the index).
+
+Needs a store ingested with section metadata (`python -m rag_agent.ingest`).
+Run from the `RAG` directory, for ChromaDB or the flat index:
+
+    uv run python eval/bench_filtered_retrieval.py --k 5
+    RAG_VECTOR_STORE=flat uv run python eval/bench_filtered_retrieval.py --k 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAG_DIR))
+
+from rag_agent import tools  # noqa: E402
+from rag_agent.config import config  # noqa: E402
+from rag_agent.sections import resolve  # noqa: E402
+
+# (question, section as the user names it)
+CASES: list[tuple[str, str]] = [
+    ("What are the main risks to Alphabet's advertising revenue?", "risk factors"),
+    ("How does Alphabet explain the change in operating income?", "MD&A"),
+    (
+        "How would a change in interest rates affect the investment portfolio?",
+        "market risk",
+    ),
+    ("What foreign currency exposure does Alphabet hedge?", "Item 7A"),
+    ("How is property and equipment depreciated?", "financial statements"),
+    ("How does Alphabet manage cybersecurity threats?", "Item 1C"),
+    ("What legal matters is Alphabet involved in?", "legal proceedings"),
+    ("How many employees does Alphabet have?", "Item 1"),
+    ("What were the share repurchases in the fourth quarter?", "Item 5"),
+    (
+        "Did management conclude that internal control over financial reporting is effective?",
+        "Item 9A",
+    ),
+]
+
+
+def timed(query: str, k: int, where, repeat: int) -> tuple[dict, float]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = tools.retrieve([query], k, where)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, statistics.median(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=5, help="Chunks retrieved")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tools.warm_up()
+    print(
+        f"{config.vector_store} store, hybrid={config.hybrid}, rerank={config.rerank}, k={args.k}\n"
+    )
+    print(f"{'section':<22} {'in section':>17} {'pages':>11} {'p50 ms':>13}")
+    print(
+        f"{'':<22} {'all':>8} {'filter':>8} {'all':>5} {'filter':>5} {'all':>6} {'filter':>6}"
+    )
+    totals = [0.0, 0.0]
+    for query, name in CASES:
+        sections = resolve(name)
+        row = f"{name:<22}"
+        shares, pages, latencies = [], [], []
+        for where in (None, tools.build_where(section=name)):
+            results, latency = timed(query, args.k, where, args.repeat)
+            metas = results["metadatas"][0]
+            shares.append(
+                sum(m.get("section") in sections for m in metas) / max(len(metas), 1)
+            )
+            pages.append(len({m["page_number"] for m in metas}))
+            latencies.append(latency)
+        totals[0] += shares[0]
+        totals[1] += shares[1]
+        row += f" {shares[0]:8.2f} {shares[1]:8.2f} {pages[0]:5d} {pages[1]:5d} {latencies[0]:6.1f} {latencies[1]:6.1f}"
+        print(row)
+    print(f"{'mean':<22} {totals[0] / len(CASES):8.2f} {totals[1] / len(CASES):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""ChromaDB vs the memory-mapped flat index: startup, query latency, memory, recall.
+
+Each store runs in a fresh interpreter, which reports:
+
+- `open ms`: import, open and the first query, i.e. what a new worker pays;
+- `p50 ms` / `p95 ms`: latency of one query with its documents and metadata;
+- `RSS MB`: peak resident memory, and how much of the resident memory is
+  file-backed (`file MB`), i.e. pages shared with other workers through
+  the OS page cache.
+
+`top-k overlap` compares the ids returned for each eval question with
+ChromaDB's HNSW results. The query embeddings are computed once up front,
+so the encoder is not part of the measurements.
+
+Run from the `RAG` directory, after exporting the flat index with
+`python -m rag_agent.flat_index export`:
+
+    uv run python eval/bench_flat_index.py --k 5 --nlist 16 --nprobe 4
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAG_DIR))
+
+from rag_agent import flat_index, tools  # noqa: E402
+from rag_agent.config import config  # noqa: E402
+
+DATASET = RAG_DIR / "eval" / "data" / "conversation.test.1.json"
+
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+import numpy as np
+store, path, collection_name, vectors_path, k, nprobe = sys.argv[1:7]
+if store == "chroma":
+    import chromadb
+    collection = chromadb.PersistentClient(path=path).get_collection(collection_name, embedding_function=None)
+else:
+    from rag_agent.flat_index import FlatIndex
+    collection = FlatIndex(path, nprobe=int(nprobe))
+vectors = np.load(vectors_path)
+include = ["documents", "metadatas"]
+collection.query(query_embeddings=vectors[:1], n_results=int(k), include=include)
+open_ms = (time.perf_counter() - start) * 1000
+latencies, ids = [], []
+for vector in vectors:
+    start = time.perf_counter()
+    ids.append(collection.query(query_embeddings=[vector], n_results=int(k), include=include)["ids"][0])
+    latencies.append((time.perf_counter() - start) * 1000)
+status = dict(line.split(":", 1) for line in open("/proc/self/status") if ":" in line)
+print(json.dumps({
+    "open_ms": open_ms,
+    "p50_ms": float(np.percentile(latencies, 50)),
+    "p95_ms": float(np.percentile(latencies, 95)),
+    "rss_mb": int(status["VmHWM"].split()[0]) / 1024,
+    "file_mb": int(status.get("RssFile", "0 kB").split()[0]) / 1024,
+    "ids": ids,
+}))
+"""
+
+
+def load_queries(path: Path) -> list:
+    queries = []
+    for turn in json.loads(path.read_text()):
+        if turn.get("expected_tool_use"):
+            queries.append(turn["query"])
+            queries.extend(
+                use["tool_input"]["query"] for use in turn["expected_tool_use"]
+            )
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument(
+        "--flat-path",
+        default=config.flat_index_path,
+        help="Flat export (default: next to the store)",
+    )
+    parser.add_argument(
+        "--nlist",
+        type=int,
+        default=16,
+        help="IVF lists of the extra IVF export (0 skips it)",
+    )
+    parser.add_argument(
+        "--nprobe", type=int, default=4, help="IVF lists scanned per query"
+    )
+    args = parser.parse_args()
+
+    flat_path = args.flat_path or flat_index.default_path(
+        config.chroma_path, config.collection_name
+    )
+    queries = load_queries(DATASET)
+    vectors = np.asarray(tools.embed_queries(queries), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vectors_path = Path(tmp) / "queries.npy"
+        np.save(vectors_path, vectors)
+        stores = [("chroma", config.chroma_path), ("flat", flat_path)]
+        if args.nlist:
+            ivf_path = str(Path(tmp) / "ivf")
+            flat_index.export_collection(
+                tools.get_collection(), ivf_path, nlist=args.nlist
+            )
+            stores.append((f"flat-ivf{args.nprobe}", ivf_path))
+
+        results = {}
+        for store, path in stores:
+            completed = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    WORKER,
+                    store.split("-")[0],
+                    path,
+                    config.collection_name,
+                    str(vectors_path),
+                    str(args.k),
+                    str(args.nprobe),
+                ],
+                cwd=RAG_DIR,
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                error = (
+                    completed.stderr.strip().splitlines()[-1]
+                    if completed.stderr
+                    else "failed"
+                )
+                print(f"{store:<12} failed: {error}")
+                continue
+            results[store] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    reference = results.get("chroma", {}).get("ids")
+    print(f"{len(queries)} queries, k={args.k}\n")
+    print(
+        f"{'store':<12} {'open ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'RSS MB':>7} {'file MB':>8} {f'top-{args.k} overlap':>14}"
+    )
+    for store, stats in results.items():
+        row = (
+            f"{store:<12} {stats['open_ms']:8.1f} {stats['p50_ms']:7.2f} {stats['p95_ms']:7.2f} "
+            f"{stats['rss_mb']:7.0f} {stats['file_mb']:8.1f}"
+        )
+        if reference is not None:
+            overlap = np.mean(
+                [
+                    len(set(a) & set(b)) / args.k
+                    for a, b in zip(stats["ids"], reference, strict=True)
+                ]
+            )
+            row += f" {overlap:14.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Recall@k and latency of vector, BM25 and hybrid (RRF) retrieval.
+
+With `RAG_RERANK=1`, hybrid retrieval followed by cross-encoder re-ranking
+is measured too; its scores are cached, so every run after the first for a
+question measures the cached path.
+
+Uses the questions in `eval/data/conversation.test.1.json` that expect a
+retrieval call: both the user question and the rewritten query in
+`expected_tool_use`. The dataset has no chunk-level labels, so relevance is
+a proxy: the `--gold` chunks sharing the most reference-answer terms (IDF
+weighted) are the relevant ones. That proxy favours lexical matching, so
+read the BM25 column as an upper bound and compare vector against hybrid.
+
+Needs the collection and its lexical index, i.e. a run of
+`python -m rag_agent.ingest`. Run from the `RAG` directory:
+
+    uv run python eval/bench_hybrid_retrieval.py --k 3 5 10 --repeat 5
+"""
+
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAG_DIR))
+
+from rag_agent import tools  # noqa: E402
+from rag_agent.config import config  # noqa: E402
+from rag_agent.lexical_index import tokenize  # noqa: E402
+
+DATASET = RAG_DIR / "eval" / "data" / "conversation.test.1.json"
+
+
+def load_cases(path: Path) -> list[tuple[str, str]]:
+    """(query, reference answer) pairs for the turns that expect retrieval."""
+    cases = []
+    for turn in json.loads(path.read_text()):
+        if not turn.get("expected_tool_use"):
+            continue
+        # Drop the trailing "[Citation: ...]" from the reference.
+        reference = turn["reference"].split("[Citation")[0]
+        cases.append((turn["query"], reference))
+        for tool_use in turn["expected_tool_use"]:
+            rewritten = tool_use.get("tool_input", {}).get("query")
+            if rewritten:
+                cases.append((rewritten, reference))
+    return cases
+
+
+def gold_chunks(reference: str, documents: dict[str, str], n: int) -> set[str]:
+    """The `n` chunks covering the most IDF-weighted reference terms."""
+    chunk_terms = {chunk_id: set(tokenize(doc)) for chunk_id, doc in documents.items()}
+    df = Counter(term for terms in chunk_terms.values() for term in terms)
+    idf = {term: math.log(len(documents) / count) for term, count in df.items()}
+    reference_terms = set(tokenize(reference))
+    scores = {
+        chunk_id: sum(idf.get(term, 0.0) for term in reference_terms & terms)
+        for chunk_id, terms in chunk_terms.items()
+    }
+    return set(sorted(scores, key=scores.get, reverse=True)[:n])
+
+
+def run_mode(
+    search: Callable[[str, int], list[str]],
+    cases: list[tuple[str, set[str]]],
+    ks: list[int],
+    repeat: int,
+) -> tuple[dict[int, float], list[float]]:
+    recalls: dict[int, list[float]] = {k: [] for k in ks}
+    latencies = []
+    for query, gold in cases:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ids = search(query, max(ks))
+            latencies.append(time.perf_counter() - start)
+        for k in ks:
+            recalls[k].append(len(set(ids[:k]) & gold) / len(gold))
+    return {k: statistics.mean(values) for k, values in recalls.items()}, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", type=Path, default=DATASET)
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument(
+        "--gold", type=int, default=3, help="Relevant chunks per question"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per question")
+    args = parser.parse_args()
+
+    # Time the retrievers, not the query embedding cache.
+    config.embedding_cache_size = 0
+    collection = tools.get_collection()
+    lexical = tools.get_lexical_index()
+    if lexical is None:
+        sys.exit("No lexical index; run `python -m rag_agent.ingest <pdf>` first.")
+    tools.warm_up()
+
+    stored = collection.get(include=["documents"])
+    documents = dict(zip(stored["ids"], stored["documents"], strict=True))
+    cases = [
+        (query, gold_chunks(reference, documents, args.gold))
+        for query, reference in load_cases(args.dataset)
+    ]
+    print(
+        f"{len(cases)} queries, {len(documents)} chunks, {args.gold} relevant chunks per query\n"
+    )
+
+    def vector(query: str, n: int) -> list[str]:
+        config.hybrid = False
+        try:
+            return tools.first_stage([query], n)["ids"][0]
+        finally:
+            config.hybrid = True
+
+    def bm25(query: str, n: int) -> list[str]:
+        return [chunk_id for chunk_id, _ in lexical.search(query, n)]
+
+    def hybrid(query: str, n: int) -> list[str]:
+        return tools.first_stage([query], n)["ids"][0]
+
+    def rerank(query: str, n: int) -> list[str]:
+        return tools.retrieve([query], n)["ids"][0]
+
+    modes = [("vector", vector), ("bm25", bm25), ("hybrid", hybrid)]
+    if tools.get_reranker() is not None:
+        modes.append(("rerank", rerank))
+
+    header = "".join(f"  recall@{k:<3}" for k in args.k)
+    print(f"{'mode':<8}{header}  {'p50 ms':>8}  {'p95 ms':>8}")
+    for label, search in modes:
+        recalls, latencies = run_mode(search, cases, args.k, args.repeat)
+        latencies_ms = sorted(t * 1000 for t in latencies)
+        p95 = latencies_ms[min(len(latencies_ms) - 1, int(0.95 * len(latencies_ms)))]
+        row = "".join(f"  {recalls[k]:>9.3f}" for k in args.k)
+        print(f"{label:<8}{row}  {statistics.median(latencies_ms):8.2f}  {p95:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
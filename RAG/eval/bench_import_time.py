@@ -0,0 +1,91 @@
+"""Import time of rag_agent.tools: lazy initialization vs the old import-time setup.
+
+Each measurement runs in a fresh interpreter, so module caches do not carry
+over between runs:
+
+- `eager`: what importing `rag_agent.tools` used to do - import chromadb,
+  load the SentenceTransformer model and open the collection.
+- `lazy import`: importing `rag_agent.tools` now.
+- `warm_up`: the deferred work, paid once by `warm_up()` or the first query.
+
+Run from the `RAG` directory:
+
+    uv run python eval/bench_import_time.py --runs 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+
+EAGER = """
+import time
+start = time.perf_counter()
+import chromadb
+from chromadb.utils import embedding_functions
+from rag_agent.config import config
+embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=config.embedding_model)
+client = chromadb.PersistentClient(path=config.chroma_path)
+client.get_collection(name=config.collection_name, embedding_function=embedding_function)
+print(time.perf_counter() - start)
+"""
+
+LAZY_IMPORT = """
+import time
+start = time.perf_counter()
+import rag_agent.tools
+print(time.perf_counter() - start)
+"""
+
+WARM_UP = """
+import time
+import rag_agent.tools
+start = time.perf_counter()
+rag_agent.tools.warm_up()
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=RAG_DIR, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            error = (
+                completed.stderr.strip().splitlines()[-1]
+                if completed.stderr
+                else "failed"
+            )
+            raise RuntimeError(error)
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, code in (
+        ("eager", EAGER),
+        ("lazy import", LAZY_IMPORT),
+        ("warm_up", WARM_UP),
+    ):
+        try:
+            timings = measure(code, args.runs)
+        except RuntimeError as e:
+            print(f"{label:<12} failed: {e}")
+            continue
+        print(
+            f"{label:<12} median={statistics.median(timings) * 1000:8.1f}ms "
+            f"min={min(timings) * 1000:8.1f}ms max={max(timings) * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Comparing filings as the knowledge base grows: fan-out latency and the collection LRU.
+
+The 10-K collection is copied into N synthetic filings (tickers F000,
+F001, ...) in a temporary store, registered as `rag_agent.ingest --ticker`
+would. For each N, a fresh interpreter answers "compare two filings"
+requests: each eval question is asked of a pair of filings, drawn with
+Zipf-skewed popularity (`--skew`, 0 is uniform), as one `ask_chromadb_multi`
+call (the two filings searched concurrently) and, in a second fresh
+interpreter, as two sequential `ask_chromadb` calls. It reports:
+
+- `p50 ms` / `p95 ms`: latency of a compare request through `ask_chromadb_multi`;
+- `seq p50`: the same pairs as two sequential `ask_chromadb` calls;
+- `hit rate`: share of collection lookups served by an open handle;
+- `opens` / `evictions`: collections opened and closed by the LRU
+  (`--max-open`, like `RAG_MAX_OPEN_COLLECTIONS`).
+
+Query embeddings are computed before the timed requests, so the encoder is
+not part of the measurements. Run from the `RAG` directory:
+
+    uv run python eval/bench_multi_collection.py --filings 2 8 32 --max-open 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAG_DIR))
+
+from rag_agent import flat_index, lexical_index, registry  # noqa: E402
+from rag_agent.config import config  # noqa: E402
+
+DATASET = RAG_DIR / "eval" / "data" / "conversation.test.1.json"
+
+WORKER = """
+import json, random, sys, time
+import numpy as np
+from rag_agent import tools
+mode, filings, queries, rounds, skew = sys.argv[1], int(sys.argv[2]), json.loads(sys.argv[3]), int(sys.argv[4]), float(sys.argv[5])
+tickers = [f"F{i:03d}" for i in range(filings)]
+weights = [1 / (rank + 1) ** skew for rank in range(filings)]
+rng = random.Random(0)
+tools.embed_queries(queries)
+tools.warm_up([tools.resolve_document(tickers[0])])
+start = tools.collection_cache_stats()
+latencies = []
+for _ in range(rounds):
+    for query in queries:
+        a = rng.choices(range(filings), weights)[0]
+        b = rng.choices(range(filings), weights)[0]
+        while b == a and filings > 1:
+            b = rng.randrange(filings)
+        t = time.perf_counter()
+        if mode == "multi":
+            tools.ask_chromadb_multi(query, [tickers[a], tickers[b]])
+        else:
+            tools.ask_chromadb(query, document=tickers[a])
+            tools.ask_chromadb(query, document=tickers[b])
+        latencies.append((time.perf_counter() - t) * 1000)
+stats = tools.collection_cache_stats()
+hits, opens = stats["hits"] - start["hits"], stats["opens"] - start["opens"]
+print(json.dumps({
+    "p50_ms": float(np.percentile(latencies, 50)),
+    "p95_ms": float(np.percentile(latencies, 95)),
+    "hit_rate": hits / max(hits + opens, 1),
+    "opens": opens,
+    "evictions": stats["evictions"] - start["evictions"],
+}))
+"""
+
+
+def load_queries(path: Path) -> list:
+    queries = []
+    for turn in json.loads(path.read_text()):
+        if turn.get("expected_tool_use"):
+            queries.append(turn["query"])
+            queries.extend(
+                use["tool_input"]["query"] for use in turn["expected_tool_use"]
+            )
+    return queries
+
+
+def run(
+    mode: str, filings: int, queries: list, args: argparse.Namespace, env: dict
+) -> dict:
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            WORKER,
+            mode,
+            str(filings),
+            json.dumps(queries),
+            str(args.rounds),
+            str(args.skew),
+        ],
+        cwd=RAG_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        error = (
+            completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"
+        )
+        raise RuntimeError(error)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def add_filings(source, store: str, start: int, stop: int, flat: bool) -> None:
+    """Copy the source collection into filings `start` .. `stop - 1` of `store`."""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=store)
+    data = source.get(include=["embeddings", "documents", "metadatas"])
+    lexical_source = lexical_index.default_path(
+        config.chroma_path, config.collection_name
+    )
+    for i in range(start, stop):
+        name = f"filing_{i:03d}"
+        collection = client.create_collection(
+            name, embedding_function=None, metadata=source.metadata
+        )
+        metadatas = [
+            dict(meta, source=f"f{i:03d}-10-K.pdf") for meta in data["metadatas"]
+        ]
+        for offset in range(0, len(data["ids"]), 5000):
+            page = slice(offset, offset + 5000)
+            collection.add(
+                ids=data["ids"][page],
+                embeddings=data["embeddings"][page],
+                documents=data["documents"][page],
+                metadatas=metadatas[page],
+            )
+        if os.path.exists(lexical_source):
+            target = lexical_index.default_path(store, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy(lexical_source, target)
+        if flat:
+            flat_index.export_collection(
+                collection, flat_index.default_path(store, name)
+            )
+        registry.register(
+            store,
+            name,
+            ticker=f"F{i:03d}",
+            company=f"Filer {i}",
+            year=2024,
+            form="10-K",
+        )
+
+
+def main() -> None:
+    import chromadb
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--filings",
+        type=int,
+        nargs="+",
+        default=[2, 8, 32],
+        help="Knowledge base sizes",
+    )
+    parser.add_argument(
+        "--stores", nargs="+", default=["chroma", "flat"], choices=["chroma", "flat"]
+    )
+    parser.add_argument("--max-open", type=int, default=config.max_open_collections)
+    parser.add_argument(
+        "--skew", type=float, default=1.0, help="Zipf exponent of filing popularity"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=10, help="Passes over the eval questions"
+    )
+    args = parser.parse_args()
+
+    source = chromadb.PersistentClient(path=config.chroma_path).get_collection(
+        config.collection_name, embedding_function=None
+    )
+    queries = load_queries(DATASET)
+    print(
+        f"{source.count()} chunks per filing, {len(queries) * args.rounds} compare requests, "
+        f"max open {args.max_open}, skew {args.skew}\n"
+    )
+    print(
+        f"{'store':<7} {'filings':>7} {'p50 ms':>7} {'p95 ms':>7} {'seq p50':>8} {'hit rate':>9} "
+        f"{'opens':>6} {'evictions':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "chroma_db_chunks")
+        built = 0
+        for filings in sorted(args.filings):
+            add_filings(source, store, built, filings, "flat" in args.stores)
+            built = filings
+            for vector_store in args.stores:
+                env = dict(
+                    os.environ,
+                    RAG_CHROMA_PATH=store,
+                    RAG_VECTOR_STORE=vector_store,
+                    RAG_MAX_OPEN_COLLECTIONS=str(args.max_open),
+                )
+                try:
+                    stats = run("multi", filings, queries, args, env)
+                    sequential = run("sequential", filings, queries, args, env)
+                except RuntimeError as e:
+                    print(f"{vector_store:<7} {filings:>7} failed: {e}")
+                    continue
+                print(
+                    f"{vector_store:<7} {filings:>7} {stats['p50_ms']:7.1f} {stats['p95_ms']:7.1f} "
+                    f"{sequential['p50_ms']:8.1f} {stats['hit_rate']:9.2f} {stats['opens']:6d} "
+                    f"{stats['evictions']:9d}"
+                )
+
+
+if __name__ == "__main__":
+    main()
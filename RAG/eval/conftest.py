@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# `rag_agent` is imported from the RAG directory, wherever pytest is started.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,77 @@
+import numpy as np
+from rag_agent.answer_cache import AnswerCache, question_terms
+
+VECTOR = np.ones(4)
+
+
+def test_terms_are_figures_and_names():
+    assert question_terms("What was Alphabet's revenue in 2023?") == {
+        "alphabet",
+        "2023",
+    }
+    assert question_terms("How much did MSFT spend on R&D in Q3 2024?") == {
+        "msft",
+        "r&d",
+        "q3",
+        "2024",
+    }
+    assert question_terms("what are the main risk factors?") == set()
+
+
+def test_hit_needs_similarity():
+    cache = AnswerCache(threshold=0.9)
+    cache.add(
+        "What was Alphabet's revenue in 2023?", VECTOR, ["c1"], "$307B", 2.0, "fp"
+    )
+    assert (
+        cache.lookup(
+            "What was Alphabet's revenue in 2023?", np.array([1.0, 0.0, 0.0, 0.0]), "fp"
+        )
+        is None
+    )
+    hit = cache.lookup("What was Alphabet's revenue in 2023?", VECTOR * 2, "fp")
+    assert hit is not None and hit.answer == "$307B"
+    assert cache.stats()["hits"] == 1
+
+
+def test_hit_needs_same_terms():
+    cache = AnswerCache(threshold=0.9)
+    cache.add(
+        "What was Alphabet's revenue in 2023?", VECTOR, ["c1"], "$307B", 2.0, "fp"
+    )
+    assert cache.lookup("What was Alphabet's revenue in 2022?", VECTOR, "fp") is None
+    assert cache.lookup("What was Microsoft's revenue in 2023?", VECTOR, "fp") is None
+    hit = cache.lookup("How much revenue did Alphabet make in 2023?", VECTOR, "fp")
+    assert hit is not None and hit.answer == "$307B"
+    assert cache.stats()["hits"] == 1
+
+
+def test_closest_entry_with_same_terms_wins():
+    cache = AnswerCache(threshold=0.5)
+    cache.add("Revenue in 2022", np.array([1.0, 0.0]), ["c1"], "2022 answer", 1.0, "fp")
+    cache.add("Revenue in 2023", np.array([0.8, 0.6]), ["c2"], "2023 answer", 1.0, "fp")
+    assert (
+        cache.lookup("Revenue in 2023", np.array([1.0, 0.0]), "fp").answer
+        == "2023 answer"
+    )
+
+
+def test_new_fingerprint_drops_entries():
+    cache = AnswerCache()
+    cache.add("q", VECTOR, ["c1"], "a", 1.0, "fp1")
+    assert cache.lookup("q", VECTOR, "fp2") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_other_dimension_is_a_miss(tmp_path):
+    path = str(tmp_path / "answers.sqlite")
+    cache = AnswerCache(path=path)
+    cache.add("q", VECTOR, ["c1"], "a", 1.0, "fp")
+    assert cache.lookup("q", np.ones(8), "fp") is None
+    cache.add("q", np.ones(8), ["c1"], "b", 1.0, "fp")
+    assert cache.lookup("q", np.ones(8), "fp").answer == "b"
+
+    # Rows of mixed dimension on disk: the newest dimension is kept.
+    restarted = AnswerCache(path=path)
+    assert restarted.lookup("q", np.ones(8), "fp").answer == "b"
+    assert restarted.stats()["entries"] == 1
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from rag_agent import async_tools, tools
+from rag_agent.async_tools import _offload
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A fresh tool pool of 2 threads with room for 1 waiting call."""
+    monkeypatch.setattr(async_tools.config, "tool_workers", 2)
+    monkeypatch.setattr(async_tools.config, "tool_queue", 1)
+    monkeypatch.setattr(async_tools, "_executor", None)
+    for counter in ("_pending", "_completed", "_rejected"):
+        monkeypatch.setattr(async_tools, counter, 0)
+    yield
+    if async_tools._executor is not None:
+        async_tools._executor.shutdown(wait=True)
+
+
+def tool(query_text: str) -> list[str]:
+    """A synchronous tool."""
+
+
+def test_calls_beyond_workers_and_queue_are_busy(pool):
+    release = threading.Event()
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def retrieve(query_text: str) -> tuple[list[str], list[str]]:
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        release.wait(5)
+        with lock:
+            running["now"] -= 1
+        return [f"answer to {query_text}"], [f"chunk-{query_text}"]
+
+    ask = _offload(tool, retrieve, lambda kwargs: ["busy"])
+    context = SimpleNamespace(state={})
+
+    async def main() -> list[list[str]]:
+        calls = [
+            asyncio.ensure_future(ask(query_text=str(i), tool_context=context))
+            for i in range(6)
+        ]
+        # Calls past 2 running + 1 waiting are turned away without waiting.
+        await asyncio.sleep(0.1)
+        assert sum(call.done() for call in calls) == 3
+        assert async_tools.tool_pool_stats()["pending"] == 3
+        release.set()
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(main())
+    assert results[:3] == [["answer to 0"], ["answer to 1"], ["answer to 2"]]
+    assert results[3:] == [["busy"]] * 3
+    assert running["peak"] == 2
+    # Each accepted call's chunk ids are recorded, in completion order.
+    assert sorted(context.state[tools.RETRIEVED_CHUNKS_STATE_KEY]) == [
+        "chunk-0",
+        "chunk-1",
+        "chunk-2",
+    ]
+    stats = async_tools.tool_pool_stats()
+    assert (stats["pending"], stats["completed"], stats["rejected"]) == (0, 3, 3)
+    assert ask.__name__ == "tool" and ask.__doc__ == tool.__doc__
+
+
+def test_pool_frees_up_after_a_busy_burst(pool):
+    ask = _offload(tool, lambda query_text: ([query_text], []), lambda kwargs: None)
+
+    async def main() -> list[list[str]]:
+        return [await ask(query_text=str(i)) for i in range(5)]
+
+    assert asyncio.run(main()) == [[str(i)] for i in range(5)]
+    assert async_tools.tool_pool_stats()["rejected"] == 0
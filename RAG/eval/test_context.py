@@ -0,0 +1,129 @@
+from rag_agent import context
+from rag_agent.context import Span, count_tokens, merge_chunks, pack
+
+
+def meta(page=1, chunk_id=None, start=None, end=None, source="a.pdf"):
+    m = {"source": source, "page_number": page}
+    if chunk_id is not None:
+        m["chunk_id"] = chunk_id
+    if start is not None:
+        m.update(char_start=start, char_end=end)
+    return m
+
+
+def test_overlapping_offsets_are_merged():
+    page = "The quick brown fox jumps over the lazy dog"
+    docs = [page[10:30], page[0:15]]
+    spans = merge_chunks(
+        docs, [meta(chunk_id=1, start=10, end=30), meta(chunk_id=0, start=0, end=15)]
+    )
+    assert len(spans) == 1
+    assert spans[0].text == page[0:30]
+    assert spans[0].chunk_ids == [0, 1]
+    assert spans[0].rank == 0
+
+
+def test_touching_offsets_are_merged():
+    spans = merge_chunks(
+        ["abc", "def"],
+        [meta(chunk_id=0, start=0, end=3), meta(chunk_id=1, start=4, end=7)],
+    )
+    assert [s.text for s in spans] == ["abc\ndef"]
+
+
+def test_distant_chunks_stay_apart():
+    spans = merge_chunks(
+        ["abc", "xyz"],
+        [meta(chunk_id=0, start=0, end=3), meta(chunk_id=5, start=500, end=503)],
+    )
+    assert [s.text for s in spans] == ["abc", "xyz"]
+
+
+def test_other_pages_and_sources_are_not_merged():
+    metas = [
+        meta(page=1, chunk_id=0, start=0, end=3),
+        meta(page=2, chunk_id=1, start=3, end=6),
+        meta(source="b.pdf", chunk_id=2, start=6, end=9),
+    ]
+    assert len(merge_chunks(["abc", "def", "ghi"], metas)) == 3
+
+
+def test_consecutive_ids_without_offsets_merge_on_text_overlap():
+    spans = merge_chunks(
+        ["one two three", "three four"], [meta(chunk_id=3), meta(chunk_id=4)]
+    )
+    assert [s.text for s in spans] == ["one two three four"]
+
+
+def test_chunks_without_ids_are_not_merged():
+    spans = merge_chunks(["one two", "two three"], [meta(), meta()])
+    assert [s.text for s in spans] == ["one two", "two three"]
+
+
+def test_spans_keep_best_rank_and_score():
+    spans = merge_chunks(
+        ["c", "a", "b"],
+        [
+            meta(page=2, chunk_id=9),
+            meta(chunk_id=0, start=0, end=1),
+            meta(chunk_id=1, start=1, end=2),
+        ],
+        scores=[0.2, 0.5, 0.9],
+    )
+    assert [s.text for s in spans] == ["c", "ab"]
+    assert spans[1].score == 0.9
+
+
+def render(span: Span) -> str:
+    return span.text
+
+
+def test_pack_stops_at_budget(monkeypatch):
+    monkeypatch.setattr(context, "count_tokens", lambda text: len(text.split()))
+    spans = [
+        Span(text="a " * 10, metadata={}, rank=0),
+        Span(text="b " * 10, metadata={}, rank=1),
+    ]
+    assert pack(spans, 0, render) == [s.text for s in spans]
+    assert pack(spans, 15, render, min_truncated_tokens=10) == [spans[0].text]
+
+
+def test_pack_truncates_at_word_boundary(monkeypatch):
+    monkeypatch.setattr(context, "count_tokens", lambda text: len(text.split()))
+    spans = [
+        Span(text="a " * 10, metadata={}, rank=0),
+        Span(text="one two three four five six", metadata={}, rank=1),
+    ]
+    packed = pack(spans, 14, render, min_truncated_tokens=3)
+    assert len(packed) == 2
+    assert packed[1].endswith(" ...")
+    assert len(packed[1].split()) <= 4
+    assert "one two" in packed[1]
+
+
+def test_first_span_always_included(monkeypatch):
+    monkeypatch.setattr(context, "count_tokens", lambda text: len(text.split()))
+    packed = pack([Span(text="word " * 50, metadata={}, rank=0)], 5, render)
+    assert len(packed) == 1 and len(packed[0].split()) <= 5
+
+
+def test_count_tokens_never_fails():
+    assert count_tokens("") == 0
+    assert count_tokens("text with <|endoftext|> in it") > 0
+
+
+def test_contained_chunk_adds_no_text():
+    page = "The quick brown fox jumps over the lazy dog"
+    spans = merge_chunks(
+        [page[20:30], page[0:25], page[5:15]],
+        [
+            meta(chunk_id=2, start=20, end=30),
+            meta(chunk_id=0, start=0, end=25),
+            meta(chunk_id=1, start=5, end=15),
+        ],
+        scores=[0.4, 0.3, 0.8],
+    )
+    assert [s.text for s in spans] == [page[0:30]]
+    assert spans[0].rank == 0
+    assert spans[0].score == 0.8
+    assert spans[0].char_end == 30
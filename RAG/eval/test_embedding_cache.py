@@ -0,0 +1,51 @@
+import numpy as np
+from rag_agent.embedding_cache import EmbeddingCache
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_miss_encodes_once_then_hits():
+    cache = EmbeddingCache("model-a")
+    encode = CountingEncoder()
+    first = cache.embed(["revenue 2023", "risk factors", "revenue 2023"], encode)
+    assert encode.batches == [["revenue 2023", "risk factors"]]
+    assert np.array_equal(first[0], first[2])
+
+    again = cache.embed(["revenue  2023", "risk factors"], encode)
+    assert len(encode.batches) == 1
+    assert np.array_equal(again[0], first[0])
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 3
+
+
+def test_lru_evicts_oldest():
+    cache = EmbeddingCache("model-a", max_entries=2)
+    for text in ("a", "b", "c"):
+        cache.set(text, [1.0])
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+def test_model_change_misses(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache("model-a", path=path)
+    cache.set("revenue 2023", [1.0, 2.0])
+    cache.close()
+
+    reopened = EmbeddingCache("model-a", path=path)
+    vector = reopened.get("revenue 2023")
+    assert vector is not None and vector.tolist() == [1.0, 2.0]
+    assert reopened.stats()["disk_hits"] == 1
+
+    other_model = EmbeddingCache("model-b", path=path)
+    assert other_model.get("revenue 2023") is None
+    encode = CountingEncoder()
+    other_model.embed(["revenue 2023"], encode)
+    assert encode.batches == [["revenue 2023"]]
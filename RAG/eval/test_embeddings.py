@@ -0,0 +1,71 @@
+import threading
+import time
+
+from rag_agent.embeddings import CoalescingEncoder
+
+
+class BlockingEncoder:
+    """Returns each text as its own "vector"; the first call blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[str]:
+        if not self.batches:
+            self.release.wait(5)
+        self.batches.append(list(texts))
+        if any("bad" in text for text in texts):
+            raise ValueError("cannot encode")
+        return [f"vec:{text}" for text in texts]
+
+
+def run_concurrently(encoder: CoalescingEncoder, inputs: list[list[str]]) -> list:
+    """Call `encoder` from one thread per input while the first call is running."""
+    results: list = [None] * len(inputs)
+
+    def call(i: int) -> None:
+        try:
+            results[i] = encoder(inputs[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(inputs))]
+    threads[0].start()
+    while not encoder._encoding:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while len(encoder._queue) < len(inputs) - 1:
+        time.sleep(0.001)
+    encoder.embedding_function.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_waiting_callers_share_one_batch():
+    model = BlockingEncoder()
+    inputs = [["first"]] + [[f"q{i}a", f"q{i}b"] for i in range(8)]
+    results = run_concurrently(CoalescingEncoder(model), inputs)
+    # The first call, then everything queued behind it in one forward pass.
+    assert len(model.batches) == 2
+    assert sorted(model.batches[1]) == sorted(t for texts in inputs[1:] for t in texts)
+    for texts, vectors in zip(inputs, results, strict=True):
+        assert vectors == [f"vec:{text}" for text in texts]
+
+
+def test_failing_request_does_not_fail_the_batch():
+    model = BlockingEncoder()
+    inputs = [["first"], ["good 1"], ["bad"], ["good 2"]]
+    results = run_concurrently(CoalescingEncoder(model), inputs)
+    assert results[1] == ["vec:good 1"]
+    assert isinstance(results[2], ValueError)
+    assert results[3] == ["vec:good 2"]
+
+
+def test_single_caller_encodes_at_once():
+    model = BlockingEncoder()
+    model.release.set()
+    assert CoalescingEncoder(model)(["a", "b"]) == ["vec:a", "vec:b"]
+    assert model.batches == [["a", "b"]]
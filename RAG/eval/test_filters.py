@@ -0,0 +1,76 @@
+from rag_agent import tools
+from rag_agent.tools import NO_FILTER_MATCH, build_where
+
+
+def test_no_filters():
+    assert build_where() is None
+    assert build_where(section="") is None
+
+
+def test_single_filters():
+    assert build_where(section="Item 1A") == {"section": "Item 1A"}
+    assert build_where(section="MD&A") == {"section": "Item 7"}
+    assert build_where(first_page=10) == {"page_number": {"$gte": 10}}
+    assert build_where(source="a.pdf") == {"source": "a.pdf"}
+
+
+def test_section_with_several_items():
+    assert build_where(section="Items 7 and 7A") == {
+        "section": {"$in": ["Item 7", "Item 7A"]}
+    }
+
+
+def test_unknown_section_is_ignored():
+    assert build_where(section="weather forecast") is None
+    assert build_where(section="weather forecast", source="a.pdf") == {
+        "source": "a.pdf"
+    }
+
+
+def test_filters_are_combined():
+    assert build_where(section="risk factors", first_page="3", last_page=9) == {
+        "$and": [
+            {"section": "Item 1A"},
+            {"page_number": {"$gte": 3}},
+            {"page_number": {"$lte": 9}},
+        ]
+    }
+
+
+def fake_retrieve(matching_where):
+    calls = []
+
+    def retrieve(
+        query_texts, n_results, where=None, collection_name=None, query_embeddings=None
+    ):
+        calls.append(where)
+        ids = [["c1", "c2"]] if where is None or where == matching_where else [[]]
+        return {"ids": ids * len(query_texts), "documents": [[]], "metadatas": [[]]}
+
+    return retrieve, calls
+
+
+def test_filtered_results_are_returned(monkeypatch):
+    where = {"section": "Item 7"}
+    retrieve, calls = fake_retrieve(where)
+    monkeypatch.setattr(tools, "retrieve", retrieve)
+    results, note = tools._retrieve_filtered(["q"], 3, where)
+    assert note is None
+    assert results["ids"] == [["c1", "c2"]]
+    assert calls == [where]
+
+
+def test_no_match_falls_back_to_unfiltered_search(monkeypatch):
+    retrieve, calls = fake_retrieve(matching_where=None)
+    monkeypatch.setattr(tools, "retrieve", retrieve)
+    results, note = tools._retrieve_filtered(["q"], 3, {"section": "Item 9"})
+    assert note == NO_FILTER_MATCH
+    assert results["ids"] == [["c1", "c2"]]
+    assert calls == [{"section": "Item 9"}, None]
+
+
+def test_no_filter_searches_once(monkeypatch):
+    retrieve, calls = fake_retrieve(matching_where=None)
+    monkeypatch.setattr(tools, "retrieve", retrieve)
+    assert tools._retrieve_filtered(["q"], 3, None)[1] is None
+    assert calls == [None]
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from rag_agent.flat_index import FlatIndex, export_collection
+
+
+class FakeCollection:
+    """The part of a Chroma collection `export_collection` reads."""
+
+    def __init__(self, name, embeddings, documents, metadatas, space="cosine"):
+        self.name = name
+        self.metadata = {"hnsw:space": space}
+        self.ids = [f"id{i}" for i in range(len(embeddings))]
+        self.embeddings = embeddings
+        self.documents = documents
+        self.metadatas = metadatas
+
+    def get(self, limit, offset, include):
+        page = slice(offset, offset + limit)
+        return {
+            "ids": self.ids[page],
+            "embeddings": self.embeddings[page],
+            "documents": self.documents[page],
+            "metadatas": self.metadatas[page],
+        }
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(0)
+    # Clustered vectors, as sentence embeddings of one filing are.
+    centres = rng.normal(size=(8, 32))
+    vectors = np.vstack(
+        [centre + 0.3 * rng.normal(size=(100, 32)) for centre in centres]
+    ).astype(np.float32)
+    documents = [f"chunk {i}" for i in range(len(vectors))]
+    metadatas = [
+        {"page_number": i % 50, "section": f"Item {i % 3}"} for i in range(len(vectors))
+    ]
+    queries = centres[[0, 3, 5]] + 0.3 * rng.normal(size=(3, 32))
+    return vectors, documents, metadatas, queries.astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def export(corpus, tmp_path_factory):
+    vectors, documents, metadatas, _ = corpus
+    path = str(tmp_path_factory.mktemp("flat") / "filing")
+    export_collection(
+        FakeCollection("filing", vectors, documents, metadatas),
+        path,
+        nlist=8,
+        page_size=300,
+    )
+    return path
+
+
+def exact_top(vectors, query, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"id{i}" for i in np.argsort(-(unit @ (query / np.linalg.norm(query))))[:k]]
+
+
+def test_full_scan_matches_brute_force(corpus, export):
+    vectors, _, _, queries = corpus
+    index = FlatIndex(export, nprobe=8)
+    results = index.query(queries, n_results=10)
+    for query, ids in zip(queries, results["ids"], strict=True):
+        # float16 storage may swap near-ties
+        assert len(set(ids) & set(exact_top(vectors, query, 10))) >= 9
+    distances = results["distances"][0]
+    assert distances == sorted(distances)
+
+
+def test_ivf_recall(corpus, export):
+    vectors, _, _, queries = corpus
+    exact = FlatIndex(export, nprobe=8).query(queries, n_results=10)["ids"]
+    approximate = FlatIndex(export, nprobe=2).query(queries, n_results=10)["ids"]
+    recall = np.mean(
+        [len(set(a) & set(e)) / 10 for a, e in zip(approximate, exact, strict=True)]
+    )
+    assert recall >= 0.9
+
+
+def test_where_filter_is_exact(corpus, export):
+    vectors, _, metadatas, queries = corpus
+    index = FlatIndex(export, nprobe=1)
+    where = {"$and": [{"section": "Item 1"}, {"page_number": {"$gte": 10}}]}
+    results = index.query(queries[:1], n_results=5, where=where)
+    assert all(
+        meta["section"] == "Item 1" and meta["page_number"] >= 10
+        for meta in results["metadatas"][0]
+    )
+    allowed = [
+        i
+        for i, meta in enumerate(metadatas)
+        if meta["section"] == "Item 1" and meta["page_number"] >= 10
+    ]
+    top = exact_top(vectors[allowed], queries[0], 5)
+    expected = [f"id{allowed[int(i[2:])]}" for i in top]
+    assert len(set(results["ids"][0]) & set(expected)) >= 4
+
+
+def test_get_by_id_and_filter(export):
+    index = FlatIndex(export)
+    assert index.count() == 800
+    chunk = index.get(ids=["id7", "missing"])
+    assert chunk["ids"] == ["id7"]
+    assert chunk["documents"] == ["chunk 7"]
+    assert chunk["metadatas"] == [{"page_number": 7, "section": "Item 1"}]
+    assert len(index.get(where={"section": "Item 0"})["ids"]) == 267
+
+
+def test_nprobe_must_be_positive(export):
+    with pytest.raises(ValueError):
+        FlatIndex(export, nprobe=0)
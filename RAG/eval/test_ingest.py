@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import chromadb
+import pytest
+from rag_agent import embeddings, ingest
+from rag_agent.lexical_index import LexicalIndex, default_path
+
+PAGES = [
+    "Item 7. Management's discussion: revenue grew on advertising and cloud.",
+    "Item 7A. Market risk: foreign exchange exposure is hedged with forwards.",
+    "Item 8. Financial statements: goodwill impairment testing was performed.",
+]
+
+
+class StubEmbedder:
+    """Records every text it embeds; vectors only need the right shape."""
+
+    def __init__(self):
+        self.embedded: list[str] = []
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        self.embedded.extend(input)
+        return [[float(len(text)), 1.0, 0.0] for text in input]
+
+
+@pytest.fixture
+def fixture_pdf(tmp_path, monkeypatch):
+    """A fake PDF whose pages come from `write`, without pypdf."""
+    path = tmp_path / "filing.pdf"
+    embedder = StubEmbedder()
+
+    def write(pages: list[str]) -> None:
+        path.write_text("\f".join(pages))
+        reader = SimpleNamespace(
+            pages=[
+                SimpleNamespace(extract_text=lambda text=text: text) for text in pages
+            ]
+        )
+        monkeypatch.setattr(ingest, "_reader", reader)
+        monkeypatch.setattr(ingest, "_page_count", lambda file_path: len(pages))
+
+    monkeypatch.setattr(ingest.config, "embedding_backend", "onnx")
+    monkeypatch.setattr(embeddings, "load_embedding_function", lambda *args: embedder)
+    return SimpleNamespace(path=str(path), write=write, embedder=embedder)
+
+
+def run_ingest(fixture_pdf, db_path: str) -> ingest.IngestStats:
+    return ingest.ingest_pdf(
+        fixture_pdf.path,
+        collection_name="filing",
+        db_path=db_path,
+        workers=1,
+        progress_every=0,
+    )
+
+
+def test_reingest_updates_only_changed_chunks(fixture_pdf, tmp_path):
+    db_path = str(tmp_path / "chroma")
+    fixture_pdf.write(PAGES)
+    first = run_ingest(fixture_pdf, db_path)
+    assert first.chunks_embedded == 3
+    assert sorted(fixture_pdf.embedder.embedded) == sorted(PAGES)
+
+    # Page 2 is rewritten and page 3 disappears.
+    edited = "Item 7A. Market risk: interest rate exposure rose with new debt."
+    fixture_pdf.embedder.embedded.clear()
+    fixture_pdf.write([PAGES[0], edited])
+    second = run_ingest(fixture_pdf, db_path)
+
+    # Only the edited chunk is embedded again; the unchanged one is updated in place.
+    assert fixture_pdf.embedder.embedded == [edited]
+    assert second.chunks_embedded == 1
+    assert second.chunks_deleted == 1
+
+    collection = chromadb.PersistentClient(path=db_path).get_collection("filing")
+    stored = collection.get(include=["documents", "metadatas"])
+    documents = dict(zip(stored["ids"], stored["documents"], strict=True))
+    assert documents == {"filing.pdf_p1_c1": PAGES[0], "filing.pdf_p2_c1": edited}
+    # The unchanged chunk carries the new file hash, so a third run is a no-op.
+    assert {meta["file_hash"] for meta in stored["metadatas"]} == {
+        ingest.file_hash(fixture_pdf.path)
+    }
+
+    lexical = LexicalIndex.load(default_path(db_path, "filing"))
+    assert len(lexical) == 2
+    assert all(chunk_id in lexical for chunk_id in documents)
+    assert lexical.search("goodwill impairment") == []
+    assert lexical.search("foreign exchange forwards") == []
+    assert [i for i, _ in lexical.search("interest rate debt")] == ["filing.pdf_p2_c1"]
+
+    fixture_pdf.embedder.embedded.clear()
+    third = run_ingest(fixture_pdf, db_path)
+    assert third.chunks_embedded == 0 and not fixture_pdf.embedder.embedded
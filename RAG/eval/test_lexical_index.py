@@ -0,0 +1,72 @@
+import pytest
+from rag_agent.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+def test_rrf_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "b", "d"]], k=60)
+    ids = [chunk_id for chunk_id, _ in fused]
+    # "b" is second in both lists, "a" and "c" are first in only one.
+    assert ids[0] in {"b", "c"}
+    assert set(ids) == {"a", "b", "c", "d"}
+    assert ids[-1] == "d"
+
+
+def test_rrf_scores():
+    fused = dict(reciprocal_rank_fusion([["a", "b"], ["b"]], k=10))
+    assert fused["a"] == pytest.approx(1 / 11)
+    assert fused["b"] == pytest.approx(1 / 12 + 1 / 11)
+
+
+def test_rrf_single_ranking_keeps_order():
+    assert [i for i, _ in reciprocal_rank_fusion([["x", "y", "z"]])] == ["x", "y", "z"]
+
+
+def test_tokenize_keeps_items_and_figures():
+    assert tokenize("Item 7A: revenue was $1,234.5 million in the 10-K") == [
+        "item",
+        "7a",
+        "revenue",
+        "1,234.5",
+        "million",
+        "10-k",
+    ]
+
+
+@pytest.fixture
+def index():
+    index = LexicalIndex()
+    index.add(
+        ["c1", "c2", "c3"],
+        [
+            "Item 7A quantitative and qualitative disclosures about market risk",
+            "Revenue grew because of advertising revenue",
+            "Employees and human capital",
+        ],
+    )
+    return index
+
+
+def test_bm25_ranks_matching_chunks(index):
+    assert [i for i, _ in index.search("market risk Item 7A")] == ["c1"]
+    assert [i for i, _ in index.search("advertising revenue")][0] == "c2"
+    assert index.search("unrelated words") == []
+
+
+def test_bm25_allowed_filter(index):
+    assert index.search("revenue risk", allowed={"c1"})[0][0] == "c1"
+    assert index.search("advertising", allowed={"c1", "c3"}) == []
+
+
+def test_add_replaces_and_remove(index):
+    index.add(["c2"], ["employees"])
+    assert {i for i, _ in index.search("employees")} == {"c2", "c3"}
+    assert index.search("advertising") == []
+    index.remove(["c3"])
+    assert "c3" not in index
+
+
+def test_save_and_load(index, tmp_path):
+    index.path = str(tmp_path / "lexical.json.gz")
+    index.save()
+    loaded = LexicalIndex.load(index.path)
+    assert loaded.search("market risk") == index.search("market risk")
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from rag_agent.config import config
+from rag_agent.embeddings import ONNX_FILES, OnnxEmbeddingFunction, export_onnx
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+SentenceTransformer = pytest.importorskip("sentence_transformers").SentenceTransformer
+
+SENTENCES = [
+    "What was Alphabet's total revenue in 2023?",
+    "Item 1A. Risk Factors",
+    "Google Cloud operating income grew as infrastructure costs fell.",
+    "Foreign exchange fluctuations could adversely affect our results.",
+]
+# Minimum cosine similarity to the sentence-transformers embedding
+THRESHOLDS = {"onnx": 0.999, "onnx-int8": 0.95}
+
+
+@pytest.fixture(scope="module")
+def export_dir(tmp_path_factory):
+    try:
+        return export_onnx(
+            config.embedding_model, str(tmp_path_factory.mktemp("onnx")), quantize=True
+        )
+    except OSError as e:
+        pytest.skip(f"{config.embedding_model} is not available: {e}")
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_matches_sentence_transformers(export_dir, backend):
+    reference = SentenceTransformer(config.embedding_model, device="cpu").encode(
+        SENTENCES, normalize_embeddings=True
+    )
+    vectors = np.array(
+        OnnxEmbeddingFunction(export_dir, onnx_file=ONNX_FILES[backend])(SENTENCES)
+    )
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    cosines = (vectors * reference).sum(axis=1)
+    assert cosines.min() >= THRESHOLDS[backend], cosines
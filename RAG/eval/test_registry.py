@@ -0,0 +1,113 @@
+import os
+
+import chromadb
+import pytest
+from rag_agent.registry import (
+    CollectionHandle,
+    CollectionRegistry,
+    UnknownDocument,
+    register,
+    resolve_document,
+)
+
+
+def add_chunks(client, name: str, chunks: dict[str, str]) -> None:
+    collection = client.get_or_create_collection(name, embedding_function=None)
+    collection.upsert(
+        ids=list(chunks),
+        embeddings=[[1.0, 0.0]] * len(chunks),
+        metadatas=[{"content_hash": text} for text in chunks.values()],
+    )
+
+
+def test_fingerprint_is_cached_per_revision(tmp_path, monkeypatch):
+    path = str(tmp_path / "chroma")
+    client = chromadb.PersistentClient(path=path)
+    add_chunks(client, "googl_10k_2024", {"c1": "v1", "c2": "v1"})
+    register(path, "googl_10k_2024", ticker="GOOGL", revised=True)
+
+    registry = CollectionRegistry(path)
+    fingerprint = registry.fingerprint("googl_10k_2024")
+    opened = []
+    open_chroma = registry._open_chroma
+    monkeypatch.setattr(
+        registry, "_open_chroma", lambda name: opened.append(name) or open_chroma(name)
+    )
+
+    # Writing another collection touches the shared store file, not this revision.
+    add_chunks(client, "msft_10k_2024", {"m1": "v1"})
+    os.utime(os.path.join(path, "chroma.sqlite3"))
+    assert registry.fingerprint("googl_10k_2024") == fingerprint
+    assert opened == []
+
+    add_chunks(client, "googl_10k_2024", {"c2": "v2"})
+    register(path, "googl_10k_2024", revised=True)
+    assert registry.fingerprint("googl_10k_2024") != fingerprint
+    assert opened == ["googl_10k_2024"]
+
+
+class FakeCollection:
+    def __init__(self, count: int):
+        self._count = count
+
+    def count(self) -> int:
+        return self._count
+
+
+def fake_registry(tmp_path, monkeypatch, chunks: int = 10, **kwargs):
+    registry = CollectionRegistry(str(tmp_path / "chroma"), **kwargs)
+    monkeypatch.setattr(
+        registry,
+        "_open",
+        lambda name: CollectionHandle(
+            name, FakeCollection(chunks), str(tmp_path / name), 256, 4
+        ),
+    )
+    return registry
+
+
+def test_lru_evicts_least_recently_used(tmp_path, monkeypatch):
+    registry = fake_registry(tmp_path, monkeypatch, max_open=2)
+    for name in ("a", "b", "a", "c"):
+        registry.get(name)
+    assert registry.stats()["open"] == ["a", "c"]
+    assert registry.evictions == 1
+    assert registry.hits == 1
+
+
+def test_memory_cap_evicts_oldest(tmp_path, monkeypatch):
+    # 1024 chunks x 256 dimensions x 4 bytes = 1 MiB per collection
+    registry = fake_registry(
+        tmp_path, monkeypatch, chunks=1024, max_open=8, memory_limit_mb=2.5
+    )
+    for name in ("a", "b", "c"):
+        registry.get(name)
+    assert registry.stats()["open"] == ["b", "c"]
+    # The collection just requested stays even if it alone exceeds the cap.
+    registry.memory_limit_bytes = 1
+    registry.get("d")
+    assert registry.stats()["open"] == ["d"]
+
+
+ENTRIES = {
+    "googl_10k_2023": {"ticker": "GOOGL", "company": "Alphabet", "year": 2023},
+    "googl_10k_2024": {"ticker": "GOOGL", "company": "Alphabet", "year": 2024},
+    "msft_10k_2024": {"ticker": "MSFT", "company": "Microsoft", "year": 2024},
+}
+
+
+def test_resolve_document_names():
+    assert resolve_document("googl_10k_2023", ENTRIES) == "googl_10k_2023"
+    assert resolve_document("MSFT_10K_2024", ENTRIES) == "msft_10k_2024"
+    assert resolve_document("alphabet 2023", ENTRIES) == "googl_10k_2023"
+    # Several filings match: the latest year wins.
+    assert resolve_document("GOOGL", ENTRIES) == "googl_10k_2024"
+    assert resolve_document("Tesla", ENTRIES) is None
+    assert resolve_document("Microsoft 2019", ENTRIES) is None
+
+
+def test_unknown_document_lists_filings(tmp_path, monkeypatch):
+    registry = CollectionRegistry(str(tmp_path / "chroma"))
+    monkeypatch.setattr(registry, "documents", lambda: ENTRIES)
+    with pytest.raises(UnknownDocument, match=r"MSFT 2024 \(Microsoft\)"):
+        registry.resolve("Tesla")
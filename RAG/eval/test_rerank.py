@@ -0,0 +1,78 @@
+import time
+
+from rag_agent.rerank import Reranker
+
+
+class StubCrossEncoder:
+    """Scores a pair by how many query words the chunk contains."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.pairs: list[tuple[str, str]] = []
+
+    def predict(self, pairs, batch_size=None):
+        time.sleep(self.delay)
+        self.pairs.extend(pairs)
+        return [
+            float(sum(word in doc.split() for word in query.split()))
+            for query, doc in pairs
+        ]
+
+
+def reranker(model: StubCrossEncoder, **kwargs) -> Reranker:
+    reranker = Reranker("stub", **kwargs)
+    reranker._model = model
+    return reranker
+
+
+def results(docs: dict[str, str], hashes: dict[str, str] | None = None) -> dict:
+    hashes = hashes or {}
+    return {
+        "ids": [list(docs)],
+        "documents": [list(docs.values())],
+        "metadatas": [[{"content_hash": hashes.get(i, i)} for i in docs]],
+    }
+
+
+DOCS = {"a": "cloud margin", "b": "cloud revenue growth", "c": "revenue growth"}
+QUERY = "cloud revenue growth"
+
+
+def test_reorders_by_score_and_reuses_cache():
+    model = StubCrossEncoder()
+    ranker = reranker(model)
+    first = ranker.rerank([QUERY], results(DOCS), n_results=2)
+    assert first["ids"] == [["b", "c"]]
+    assert first["scores"] == [[3.0, 2.0]]
+    assert first["reranked"] == [True]
+    assert len(model.pairs) == 3
+
+    again = ranker.rerank([" cloud  revenue growth"], results(DOCS), n_results=2)
+    assert again["ids"] == first["ids"]
+    assert len(model.pairs) == 3
+    assert ranker.stats()["cache_hits"] == 3
+
+
+def test_edited_chunk_is_rescored():
+    model = StubCrossEncoder()
+    ranker = reranker(model)
+    ranker.rerank([QUERY], results(DOCS), n_results=3)
+    edited = {**DOCS, "a": "cloud revenue growth accelerated"}
+    reranked = ranker.rerank(
+        [QUERY], results(edited, hashes={"a": "a-v2"}), n_results=3
+    )
+    # Same id, new content hash: only that chunk goes back to the model.
+    assert model.pairs[3:] == [(QUERY, edited["a"])]
+    assert reranked["ids"] == [["a", "b", "c"]]
+    assert reranked["scores"] == [[3.0, 3.0, 2.0]]
+
+
+def test_exhausted_budget_keeps_first_stage_order():
+    model = StubCrossEncoder(delay=0.02)
+    ranker = reranker(model, batch_size=1, budget_ms=1)
+    reranked = ranker.rerank([QUERY], results(DOCS), n_results=3)
+    assert reranked["ids"] == [["a", "b", "c"]]
+    assert reranked["scores"] == [[None, None, None]]
+    assert reranked["reranked"] == [False]
+    assert len(model.pairs) < 3
+    assert ranker.stats()["fallbacks"] == 1
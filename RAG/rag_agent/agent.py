@@ -1,6 +1,10 @@
 
+# Async tools: retrieval runs on a thread pool instead of blocking the server's event loop.
+from .async_tools import ask_chromadb, ask_chromadb_batch, ask_chromadb_multi
+from .callbacks import answer_cache_after_model, answer_cache_before_model
+from .config import config
 from .prompts import return_instructions_root
-from .tools import ask_chromadb
+from .tools import warm_up
 from google.adk.agents import Agent
 from google.adk.models.lite_llm import LiteLlm
 from openinference.instrumentation import using_session
@@ -10,6 +14,10 @@ from .tracing import instrument_adk_with_phoenix
 # Run Phoenix UI: phoenix serve
 _ = instrument_adk_with_phoenix()
 
+# Servers can load the knowledge base up front (RAG_WARM_UP=1) rather than on the first question.
+if config.warm_up:
+    warm_up()
+
 MODEL=LiteLlm(model="openai/gpt-oss:20b",
                     api_base="http://localhost:11434/v1", 
                 api_key="my_api_key"
@@ -20,7 +28,10 @@ with using_session(session_id=uuid.uuid4()):
         model=MODEL,
     description="A simple agent that can answer questions based on documents.",
     instruction=return_instructions_root(),
-    tools=[ask_chromadb],
+    tools=[ask_chromadb, ask_chromadb_batch, ask_chromadb_multi],
+    # Opt-in semantic answer cache (RAG_ANSWER_CACHE=1)
+    before_model_callback=answer_cache_before_model if config.answer_cache else None,
+    after_model_callback=answer_cache_after_model if config.answer_cache else None,
 )
 
 print("✅ Root Agent defined.")
@@ -0,0 +1,226 @@
+import json
+import re
+import sqlite3
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# Figures ("2023", "1,234.5", "10-K") and capitalized or upper-case words
+_TERM = re.compile(r"\d[\d,.]*(?:-?[A-Za-z]+)?|\b[A-Z][\w&.'\u2019-]*")
+# Capitalized words that start a question rather than name something
+_NOT_ENTITIES = frozenset(
+    "a an and are as at by can compare describe did do does explain for from give how i in is it list me "
+    "of on or please show summarize tell the to was were what when where which who why will with".split()
+)
+
+
+def question_terms(question: str) -> frozenset[str]:
+    """Numbers and names in `question`, lower-cased.
+
+    Questions that differ only in a year, an amount or a company embed
+    almost identically, so a cache hit also requires equal terms.
+    """
+    terms = (
+        term.lower().replace("\u2019", "'").removesuffix("'s").rstrip(".,'")
+        for term in _TERM.findall(question)
+    )
+    return frozenset(term for term in terms if term and term not in _NOT_ENTITIES)
+
+
+@dataclass
+class CachedAnswer:
+    """A previous answer and what it was built from."""
+
+    question: str
+    chunk_ids: list[str]
+    answer: str
+    latency_s: float
+    similarity: float = 1.0
+
+
+class AnswerCache:
+    """Semantic cache of (question, retrieved chunk ids, answer) entries.
+
+    A new question is compared by cosine similarity with the embeddings of
+    the questions answered so far; the closest one at or above `threshold`
+    that has the same numbers and names (`question_terms`) is a hit. Every entry is tagged with the fingerprint of the collection
+    it was answered from, and a lookup with a different fingerprint (the
+    knowledge base was re-ingested, or the embedding model changed) drops
+    every entry first. When `path` is
+    given, entries are also kept in a SQLite file and survive restarts.
+
+    Args:
+        threshold: Minimum cosine similarity of a hit
+        max_entries: Entries kept; the oldest are dropped first
+        path: Optional SQLite file for persistence
+    """
+
+    def __init__(
+        self, threshold: float = 0.92, max_entries: int = 256, path: str | None = None
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.fingerprint: str | None = None
+        self._entries: list[CachedAnswer] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._loaded = False
+        self.lookups = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self.invalidations = 0
+
+    @property
+    def db(self) -> sqlite3.Connection | None:
+        if self.path and self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "fingerprint TEXT NOT NULL, question TEXT NOT NULL, chunk_ids TEXT NOT NULL, "
+                "answer TEXT NOT NULL, latency_s REAL NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _sync(self, fingerprint: str) -> None:
+        """Load persisted entries once, and drop all entries of another fingerprint."""
+        if self._loaded and fingerprint == self.fingerprint:
+            return
+        if self._loaded:
+            self.invalidations += 1
+        self.fingerprint = fingerprint
+        self._entries, vectors = [], []
+        if self.db is not None:
+            self.db.execute(
+                "DELETE FROM answers WHERE fingerprint != ?", (fingerprint,)
+            )
+            self.db.commit()
+            rows = self.db.execute(
+                "SELECT question, chunk_ids, answer, latency_s, vector FROM answers ORDER BY id"
+            ).fetchall()
+            rows = rows[-self.max_entries :]
+            # Files written before the fingerprint named the embedding model
+            # can mix dimensions; keep those of the newest entry.
+            dimension = len(rows[-1][4]) if rows else 0
+            for question, chunk_ids, answer, latency_s, vector in rows:
+                if len(vector) == dimension:
+                    self._entries.append(
+                        CachedAnswer(question, json.loads(chunk_ids), answer, latency_s)
+                    )
+                    vectors.append(np.frombuffer(vector, dtype=np.float32))
+        self._vectors = (
+            np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        )
+        self._loaded = True
+
+    def lookup(
+        self, question: str, vector: Sequence[float], fingerprint: str
+    ) -> CachedAnswer | None:
+        """The cached answer closest to `vector`, if similar enough and about
+        the same numbers and names as `question`.
+
+        Args:
+            question: The new question
+            vector: Embedding of the new question
+            fingerprint: Current collection and embedding model fingerprint
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            self._sync(fingerprint)
+            self.lookups += 1
+            if not self._entries or self._vectors.shape[1] != len(query):
+                return None
+            similarities = self._vectors @ query
+            terms = question_terms(question)
+            for best in np.argsort(-similarities):
+                if similarities[best] < self.threshold:
+                    return None
+                entry = self._entries[best]
+                if question_terms(entry.question) == terms:
+                    self.hits += 1
+                    return CachedAnswer(
+                        entry.question,
+                        entry.chunk_ids,
+                        entry.answer,
+                        entry.latency_s,
+                        float(similarities[best]),
+                    )
+            return None
+
+    def record_saving(self, seconds: float) -> None:
+        """Count time saved by answering from the cache instead of the model."""
+        with self._lock:
+            self.saved_seconds += seconds
+
+    def add(
+        self,
+        question: str,
+        vector: Sequence[float],
+        chunk_ids: Sequence[str],
+        answer: str,
+        latency_s: float,
+        fingerprint: str,
+    ) -> None:
+        vector = self._normalize(vector)
+        with self._lock:
+            self._sync(fingerprint)
+            entry = CachedAnswer(question, list(chunk_ids), answer, latency_s)
+            if len(self._vectors) and self._vectors.shape[1] != len(vector):
+                self._entries, self._vectors = [], np.zeros((0, 0), dtype=np.float32)
+            self._entries.append(entry)
+            self._vectors = (
+                vector[None, :]
+                if not len(self._vectors)
+                else np.vstack([self._vectors, vector])
+            )
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries :]
+                self._vectors = self._vectors[-self.max_entries :]
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT INTO answers (fingerprint, question, chunk_ids, answer, latency_s, vector) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        fingerprint,
+                        question,
+                        json.dumps(entry.chunk_ids),
+                        answer,
+                        latency_s,
+                        vector.tobytes(),
+                    ),
+                )
+                self.db.execute(
+                    "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY id DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self.db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            if self.db is not None:
+                self.db.execute("DELETE FROM answers")
+                self.db.commit()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 2),
+            "invalidations": self.invalidations,
+            "threshold": self.threshold,
+        }
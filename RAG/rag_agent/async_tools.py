@@ -0,0 +1,148 @@
+"""Async versions of the retrieval tools, for agents served from an event loop.
+
+The tools in `rag_agent.tools` are synchronous: encoding the question and
+querying the index block the thread that calls them. Under `adk web` or
+`adk api_server` that thread runs the event loop, so every other session
+served by the process stalls for the whole retrieval. The tools here have
+the same names, arguments and docstrings (ADK builds the model's function
+declarations from them), but run the synchronous retrieval on a bounded
+thread pool and await it. The returned chunk ids are then noted in the
+invocation state back on the event loop, so tools running concurrently in
+one turn do not overwrite each other's ids.
+
+The pool has `RAG_TOOL_WORKERS` threads. Encoding (PyTorch, ONNX Runtime)
+and searching (ChromaDB, NumPy) release the GIL, so the threads run in
+parallel, and the models and indexes are shared. A process pool would load
+a copy of each per process. At most `RAG_TOOL_QUEUE` further calls wait for
+a thread. Beyond that a call returns a "busy" message at once, so a burst
+cannot queue unbounded work behind the sessions already waiting. The
+answer cache callbacks (`rag_agent.callbacks`) submit their encoding and
+SQLite work through the same pool and limit.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from . import tools
+from .config import config
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_pending = 0
+_completed = 0
+_rejected = 0
+
+
+def _reset_after_fork() -> None:
+    global _lock, _executor, _pending
+    _lock = threading.Lock()
+    _executor = None
+    _pending = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Threads that run the synchronous tools (`RAG_TOOL_WORKERS`)."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, config.tool_workers),
+                    thread_name_prefix="rag-tool",
+                )
+    return _executor
+
+
+def tool_pool_stats() -> dict[str, Any]:
+    """Calls running or waiting, completed and rejected by the tool pool."""
+    return {
+        "workers": max(1, config.tool_workers),
+        "queue": config.tool_queue,
+        "pending": _pending,
+        "completed": _completed,
+        "rejected": _rejected,
+    }
+
+
+def _busy_message() -> str:
+    return (
+        f"Knowledge base busy: {_pending} retrievals are running or waiting. "
+        f"Try again shortly."
+    )
+
+
+def submit(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future | None:
+    """Run `fn` on the tool pool, or return None without running it if
+    `RAG_TOOL_QUEUE` calls are already waiting for a thread."""
+    global _pending, _rejected
+    with _lock:
+        if _pending >= max(1, config.tool_workers) + config.tool_queue:
+            _rejected += 1
+            return None
+        _pending += 1
+    future = get_executor().submit(fn, *args, **kwargs)
+    # Released when the thread is done, not when the caller stops waiting:
+    # a cancelled session's retrieval still occupies its thread.
+    future.add_done_callback(_release)
+    return future
+
+
+def _offload(
+    tool: Callable[..., Any],
+    retrieve: Callable[..., tuple[Any, list[str]]],
+    busy: Callable[[dict[str, Any]], Any],
+) -> Callable[..., Any]:
+    """Wrap a synchronous tool so it runs on the tool pool.
+
+    Args:
+        tool: Synchronous tool from `rag_agent.tools`, whose name, signature
+            and docstring are kept
+        retrieve: Its body, taking the same arguments but `tool_context` and
+            returning the result and the chunk ids retrieved
+        busy: Builds the tool's result when the queue is full, from the call's
+            keyword arguments
+    """
+
+    @functools.wraps(tool)
+    async def run(*args: Any, tool_context: Any | None = None, **kwargs: Any) -> Any:
+        future = submit(retrieve, *args, **kwargs)
+        if future is None:
+            return busy(kwargs)
+        result, chunk_ids = await asyncio.wrap_future(future)
+        tools._record_retrieval(tool_context, chunk_ids)
+        return result
+
+    return run
+
+
+def _release(_future: Any) -> None:
+    global _pending, _completed
+    with _lock:
+        _pending -= 1
+        _completed += 1
+
+
+ask_chromadb = _offload(
+    tools.ask_chromadb, tools._ask_chromadb, lambda kwargs: [_busy_message()]
+)
+ask_chromadb_batch = _offload(
+    tools.ask_chromadb_batch,
+    tools._ask_chromadb_batch,
+    lambda kwargs: {query: [_busy_message()] for query in kwargs.get("queries", [])},
+)
+ask_chromadb_multi = _offload(
+    tools.ask_chromadb_multi,
+    tools._ask_chromadb_multi,
+    lambda kwargs: {
+        document: [_busy_message()] for document in kwargs.get("documents", [])
+    },
+)
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from . import async_tools, tools
+from .answer_cache import AnswerCache, CachedAnswer
+from .config import config
+
+# Invocation state kept between the two callbacks of a cache miss
+QUESTION_STATE_KEY = "temp:answer_cache_question"
+STARTED_STATE_KEY = "temp:answer_cache_started"
+
+_lock = threading.Lock()
+_answer_cache: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache:
+    global _answer_cache
+    if _answer_cache is None:
+        with _lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(
+                    threshold=config.answer_cache_threshold,
+                    max_entries=config.answer_cache_size,
+                    path=config.answer_cache_path,
+                )
+    return _answer_cache
+
+
+def answer_cache_stats() -> dict[str, Any]:
+    """Lookups, hits, hit rate and model time saved by the answer cache."""
+    return get_answer_cache().stats()
+
+
+def _fingerprint() -> str:
+    """Fingerprint of the knowledge base and of the model embedding the
+    questions; cached vectors of another model are not comparable."""
+    return f"{config.embedding_backend}:{config.embedding_model}:{tools.knowledge_base_fingerprint()}"
+
+
+def _lookup(question: str) -> CachedAnswer | None:
+    vector = tools.embed_queries([question])[0]
+    return get_answer_cache().lookup(question, vector, _fingerprint())
+
+
+def _store(question: str, chunk_ids: list[str], answer: str, latency_s: float) -> None:
+    vector = tools.embed_queries([question])[0]
+    get_answer_cache().add(
+        question, vector, chunk_ids, answer, latency_s, _fingerprint()
+    )
+
+
+async def _run(future: Future | None) -> tuple[bool, Any]:
+    """Await work submitted to the tool pool: `(False, None)` if the pool was
+    full or the knowledge base cannot be opened, else `(True, result)`."""
+    if future is None:
+        return False, None
+    try:
+        return True, await asyncio.wrap_future(future)
+    except tools.KnowledgeBaseUnavailable:
+        return False, None
+
+
+def _user_question(llm_request: LlmRequest) -> str | None:
+    """The new user question, if this is the first model call of a turn.
+
+    Later calls in the same turn end with tool results instead.
+    """
+    if not llm_request.contents:
+        return None
+    last = llm_request.contents[-1]
+    if last.role != "user" or not last.parts:
+        return None
+    if any(part.function_response for part in last.parts):
+        return None
+    question = "".join(part.text or "" for part in last.parts).strip()
+    return question or None
+
+
+async def answer_cache_before_model(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> LlmResponse | None:
+    """Answers a paraphrase of an earlier question from the answer cache.
+
+    A paraphrase must name the same figures and entities as the cached
+    question ("revenue in 2023" does not hit "revenue in 2022").
+
+    On a hit in `return` mode the cached answer is the model response, so
+    neither the model nor retrieval runs. In `seed` mode the cached answer
+    and the chunks it cited are added to the instructions and the model
+    still answers. On a miss, the question and start time are kept so
+    `answer_cache_after_model` can store the final answer.
+
+    Encoding the question, fingerprinting the knowledge base and reading
+    the SQLite tier run on the tool pool (`rag_agent.async_tools`), not on
+    the event loop; when the pool is full the turn skips the cache.
+
+    Args:
+        callback_context (CallbackContext): Holds the invocation state.
+        llm_request (LlmRequest): The request about to be sent to the model.
+
+    Returns:
+        Optional[LlmResponse]: The cached answer, or None to call the model.
+    """
+    question = _user_question(llm_request)
+    if question is None:
+        return None
+    done, hit = await _run(async_tools.submit(_lookup, question))
+    if not done:
+        return None
+    if hit is None:
+        callback_context.state[QUESTION_STATE_KEY] = question
+        callback_context.state[STARTED_STATE_KEY] = time.time()
+        callback_context.state[tools.RETRIEVED_CHUNKS_STATE_KEY] = []
+        return None
+    if config.answer_cache_mode == "seed":
+        llm_request.append_instructions(
+            [
+                "A very similar question was answered before. Previous question: "
+                f"{hit.question}\nPrevious answer:\n{hit.answer}\n"
+                f"It was based on these chunks: {', '.join(hit.chunk_ids)}. Reuse it if it "
+                "answers the current question; retrieve again only for what it does not cover."
+            ]
+        )
+        return None
+    get_answer_cache().record_saving(hit.latency_s)
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=hit.answer)])
+    )
+
+
+async def answer_cache_after_model(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> LlmResponse | None:
+    """Stores the final answer of a cache miss, with the chunk ids the tools
+    returned during the turn. Answers given without retrieval (small talk,
+    clarifying questions) are not cached. Like the lookup, storing runs on
+    the tool pool and is skipped when the pool is full.
+
+    Args:
+        callback_context (CallbackContext): Holds the invocation state.
+        llm_response (LlmResponse): The model response.
+
+    Returns:
+        Optional[LlmResponse]: Always None; the response is left unchanged.
+    """
+    question = callback_context.state.get(QUESTION_STATE_KEY)
+    if not question or llm_response.partial or not llm_response.content:
+        return None
+    parts = llm_response.content.parts or []
+    if any(part.function_call for part in parts):
+        # The model is calling a tool; the answer comes later.
+        return None
+    callback_context.state[QUESTION_STATE_KEY] = None
+    answer = "".join(part.text or "" for part in parts if not part.thought).strip()
+    chunk_ids = callback_context.state.get(tools.RETRIEVED_CHUNKS_STATE_KEY) or []
+    if not answer or not chunk_ids:
+        return None
+    latency_s = time.time() - callback_context.state.get(STARTED_STATE_KEY, time.time())
+    await _run(async_tools.submit(_store, question, chunk_ids, answer, latency_s))
+    return None
@@ -0,0 +1,181 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+# The RAG/ directory; the ingest notebook writes its ChromaDB store here.
+RAG_DIR = Path(__file__).resolve().parents[1]
+
+# Ingest chunking, in characters; context assembly relies on the overlap too.
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class RagConfiguration:
+    """Knowledge base location and retrieval settings, read from the environment.
+
+    Attributes:
+        chroma_path (str): ChromaDB directory (`RAG_CHROMA_PATH`).
+        collection_name (str): Collection holding the document chunks (`RAG_COLLECTION_NAME`).
+        embedding_model (str): SentenceTransformer model; must match the one used
+            at ingest (`RAG_EMBEDDING_MODEL`).
+        embedding_backend (str): `torch`, `onnx` or `onnx-int8`; see
+            `rag_agent.embeddings` (`RAG_EMBEDDING_BACKEND`).
+        embedding_onnx_path (Optional[str]): Local ONNX export of the model,
+            used instead of the Hub files (`RAG_EMBEDDING_ONNX_PATH`).
+        vector_store (str): `chroma`, or `flat` for the memory-mapped export
+            of the collection; see `rag_agent.flat_index` (`RAG_VECTOR_STORE`).
+        flat_index_path (Optional[str]): Flat export directory; defaults to
+            `<chroma_path>_flat/<collection_name>` (`RAG_FLAT_INDEX_PATH`).
+        flat_nprobe (int): IVF lists scanned per query when the flat export
+            has them (`RAG_FLAT_NPROBE`).
+        max_open_collections (int): Filing collections kept open, with their
+            lexical indexes; see `rag_agent.registry` (`RAG_MAX_OPEN_COLLECTIONS`).
+        collection_cache_mb (float): Estimated memory of the open collections
+            before the least recently used are closed; 0 disables the cap
+            (`RAG_COLLECTION_CACHE_MB`).
+        fanout_workers (int): Threads querying several filings at once for
+            `ask_chromadb_multi` (`RAG_FANOUT_WORKERS`).
+        tool_workers (int): Threads running retrievals for the async tools
+            of `rag_agent.async_tools` (`RAG_TOOL_WORKERS`).
+        tool_queue (int): Retrievals that may wait for a thread before the
+            async tools answer "busy" (`RAG_TOOL_QUEUE`).
+        n_results (int): Chunks returned per query (`RAG_N_RESULTS`).
+        warm_up (bool): Open the collection and load the model when the agent
+            module is imported instead of on the first query (`RAG_WARM_UP`).
+        embedding_cache_size (int): Query embeddings kept in memory; 0 disables
+            the cache (`RAG_EMBEDDING_CACHE_SIZE`).
+        embedding_cache_path (Optional[str]): SQLite file that persists query
+            embeddings across runs (`RAG_EMBEDDING_CACHE_PATH`).
+        hybrid (bool): Fuse BM25 lexical results with the vector results when
+            the lexical index exists; off by default (`RAG_HYBRID`).
+        hybrid_candidates (int): Candidates taken from each retriever before
+            fusion (`RAG_HYBRID_CANDIDATES`).
+        rrf_k (int): Reciprocal rank fusion damping constant (`RAG_RRF_K`).
+        rerank (bool): Re-rank candidates with a cross-encoder (`RAG_RERANK`).
+        rerank_model (str): sentence-transformers CrossEncoder (`RAG_RERANK_MODEL`).
+        rerank_candidates (int): Candidates fetched for re-ranking (`RAG_RERANK_CANDIDATES`).
+        rerank_budget_ms (float): Re-ranking time per call before falling back
+            to first-stage order; 0 disables the limit (`RAG_RERANK_BUDGET_MS`).
+        rerank_batch_size (int): Pairs scored per forward pass (`RAG_RERANK_BATCH_SIZE`).
+        context_packing (bool): Merge neighbouring chunks of a page and pack
+            them into `context_tokens`; off by default (`RAG_CONTEXT_PACKING`).
+        context_tokens (int): Token budget of the context returned per query;
+            0 means no limit (`RAG_CONTEXT_TOKENS`).
+        answer_cache (bool): Answer paraphrases of earlier questions from the
+            semantic answer cache (`RAG_ANSWER_CACHE`).
+        answer_cache_threshold (float): Minimum cosine similarity between
+            questions for a cache hit (`RAG_ANSWER_CACHE_THRESHOLD`).
+        answer_cache_mode (str): `return` answers a hit without calling the
+            model; `seed` gives the cached answer to the model as a hint
+            (`RAG_ANSWER_CACHE_MODE`).
+        answer_cache_size (int): Answers kept (`RAG_ANSWER_CACHE_SIZE`).
+        answer_cache_path (Optional[str]): SQLite file that persists answers
+            across runs (`RAG_ANSWER_CACHE_PATH`).
+    """
+
+    chroma_path: str = str(RAG_DIR / "chroma_db_chunks")
+    collection_name: str = "alphabet_10k_collection_chunks"
+    embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_backend: str = "torch"
+    embedding_onnx_path: str | None = None
+    vector_store: str = "chroma"
+    flat_index_path: str | None = None
+    flat_nprobe: int = 8
+    max_open_collections: int = 8
+    collection_cache_mb: float = 2048.0
+    fanout_workers: int = 8
+    tool_workers: int = 4
+    tool_queue: int = 64
+    n_results: int = 3
+    warm_up: bool = False
+    embedding_cache_size: int = 1024
+    embedding_cache_path: str | None = None
+    hybrid: bool = False
+    hybrid_candidates: int = 20
+    rrf_k: int = 60
+    rerank: bool = False
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 20
+    rerank_budget_ms: float = 500.0
+    rerank_batch_size: int = 16
+    context_packing: bool = False
+    context_tokens: int = 1024
+    answer_cache: bool = False
+    answer_cache_threshold: float = 0.92
+    answer_cache_mode: str = "return"
+    answer_cache_size: int = 256
+    answer_cache_path: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "RagConfiguration":
+        return cls(
+            chroma_path=os.environ.get("RAG_CHROMA_PATH", cls.chroma_path),
+            collection_name=os.environ.get("RAG_COLLECTION_NAME", cls.collection_name),
+            embedding_model=os.environ.get("RAG_EMBEDDING_MODEL", cls.embedding_model),
+            embedding_backend=os.environ.get(
+                "RAG_EMBEDDING_BACKEND", cls.embedding_backend
+            ),
+            embedding_onnx_path=os.environ.get("RAG_EMBEDDING_ONNX_PATH") or None,
+            vector_store=os.environ.get("RAG_VECTOR_STORE", cls.vector_store),
+            flat_index_path=os.environ.get("RAG_FLAT_INDEX_PATH") or None,
+            flat_nprobe=int(os.environ.get("RAG_FLAT_NPROBE", cls.flat_nprobe)),
+            max_open_collections=int(
+                os.environ.get("RAG_MAX_OPEN_COLLECTIONS", cls.max_open_collections)
+            ),
+            collection_cache_mb=float(
+                os.environ.get("RAG_COLLECTION_CACHE_MB", cls.collection_cache_mb)
+            ),
+            fanout_workers=int(
+                os.environ.get("RAG_FANOUT_WORKERS", cls.fanout_workers)
+            ),
+            tool_workers=int(os.environ.get("RAG_TOOL_WORKERS", cls.tool_workers)),
+            tool_queue=int(os.environ.get("RAG_TOOL_QUEUE", cls.tool_queue)),
+            n_results=int(os.environ.get("RAG_N_RESULTS", cls.n_results)),
+            warm_up=_env_bool("RAG_WARM_UP", cls.warm_up),
+            embedding_cache_size=int(
+                os.environ.get("RAG_EMBEDDING_CACHE_SIZE", cls.embedding_cache_size)
+            ),
+            embedding_cache_path=os.environ.get("RAG_EMBEDDING_CACHE_PATH") or None,
+            hybrid=_env_bool("RAG_HYBRID", cls.hybrid),
+            hybrid_candidates=int(
+                os.environ.get("RAG_HYBRID_CANDIDATES", cls.hybrid_candidates)
+            ),
+            rrf_k=int(os.environ.get("RAG_RRF_K", cls.rrf_k)),
+            rerank=_env_bool("RAG_RERANK", cls.rerank),
+            rerank_model=os.environ.get("RAG_RERANK_MODEL", cls.rerank_model),
+            rerank_candidates=int(
+                os.environ.get("RAG_RERANK_CANDIDATES", cls.rerank_candidates)
+            ),
+            rerank_budget_ms=float(
+                os.environ.get("RAG_RERANK_BUDGET_MS", cls.rerank_budget_ms)
+            ),
+            rerank_batch_size=int(
+                os.environ.get("RAG_RERANK_BATCH_SIZE", cls.rerank_batch_size)
+            ),
+            context_packing=_env_bool("RAG_CONTEXT_PACKING", cls.context_packing),
+            context_tokens=int(
+                os.environ.get("RAG_CONTEXT_TOKENS", cls.context_tokens)
+            ),
+            answer_cache=_env_bool("RAG_ANSWER_CACHE", cls.answer_cache),
+            answer_cache_threshold=float(
+                os.environ.get("RAG_ANSWER_CACHE_THRESHOLD", cls.answer_cache_threshold)
+            ),
+            answer_cache_mode=os.environ.get(
+                "RAG_ANSWER_CACHE_MODE", cls.answer_cache_mode
+            ),
+            answer_cache_size=int(
+                os.environ.get("RAG_ANSWER_CACHE_SIZE", cls.answer_cache_size)
+            ),
+            answer_cache_path=os.environ.get("RAG_ANSWER_CACHE_PATH") or None,
+        )
+
+
+config = RagConfiguration.from_env()
@@ -0,0 +1,209 @@
+"""Context assembly: merge neighbouring chunks and pack them into a token budget.
+
+Ingest splits every page into chunks of about 1000 characters that overlap by
+up to 100, and retrieval often returns two neighbours from the same page.
+Sent as-is, the overlap is paid for twice in prompt tokens. Here chunks of
+the same page whose `char_start`/`char_end` ranges touch or overlap are
+merged into one span with the overlap removed. The spans are then packed,
+most relevant first, until the token budget is used up.
+"""
+
+import math
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from .config import CHUNK_OVERLAP
+
+# Chunks this many characters apart (the whitespace the splitter cut on) still count as adjacent.
+MAX_GAP = 2
+# A span is only truncated to fit the budget if at least this many tokens are left.
+MIN_TRUNCATED_TOKENS = 64
+
+_encoder: Callable[[str], list[int]] | None = None
+_encoder_loaded = False
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text`: exact with tiktoken's o200k encoding (the gpt-oss
+    vocabulary) when it is installed and cached, else about 4 characters per token."""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+
+            # encode() raises on text that spells a special token such as <|endoftext|>
+            _encoder = tiktoken.get_encoding("o200k_base").encode_ordinary
+        except Exception:
+            # Not installed, or the encoding cannot be downloaded (offline).
+            _encoder = None
+    if _encoder is not None:
+        try:
+            return len(_encoder(text))
+        except Exception:
+            pass
+    return math.ceil(len(text) / 4)
+
+
+@dataclass
+class Span:
+    """Consecutive text of one page, made of one or more retrieved chunks."""
+
+    text: str
+    metadata: dict[str, Any]
+    rank: int
+    score: float | None = None
+    chunk_ids: list[int] = field(default_factory=list)
+    char_start: int = -1
+    char_end: int = -1
+
+
+def _suffix_prefix_overlap(left: str, right: str, max_len: int) -> int:
+    """Length of the longest end of `left` that starts `right`, up to `max_len`."""
+    for length in range(min(max_len, len(left), len(right)), 0, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+def _extend(span: Span, doc: str, meta: dict[str, Any], max_overlap: int) -> bool:
+    """Append the chunk after `span` if it is its neighbour on the page; False otherwise.
+
+    A chunk that lies inside the span already joins it without adding text.
+    """
+    start, end = meta.get("char_start", -1), meta.get("char_end", -1)
+    if span.char_start >= 0 and start >= 0:
+        if start > span.char_end + MAX_GAP:
+            return False
+        if end <= span.char_end:
+            if start < span.char_start:
+                return False
+        else:
+            if start < span.char_end:
+                span.text += doc[span.char_end - start :]
+            else:
+                span.text += "\n" + doc if start > span.char_end else doc
+            span.char_end = end
+    else:
+        # Stores indexed without usable offsets: consecutive chunk ids and a
+        # textual overlap still identify neighbours. Without ids (stores from
+        # the load-data notebook) chunks are never merged.
+        chunk_id, previous = meta.get("chunk_id"), span.chunk_ids[-1]
+        if (
+            not isinstance(chunk_id, int)
+            or not isinstance(previous, int)
+            or chunk_id != previous + 1
+        ):
+            return False
+        span.text += doc[_suffix_prefix_overlap(span.text, doc, max_overlap) :]
+    span.chunk_ids.append(meta.get("chunk_id"))
+    return True
+
+
+def merge_chunks(
+    documents: Sequence[str],
+    metadatas: Sequence[dict[str, Any]],
+    scores: Sequence[float | None] | None = None,
+    max_overlap: int = CHUNK_OVERLAP,
+) -> list[Span]:
+    """Merge retrieved chunks that are neighbours on the same page.
+
+    Args:
+        documents: Chunk texts, most relevant first
+        metadatas: Their metadata (`source`, `page_number`, `chunk_id`, and
+            the `char_start`/`char_end` offsets written at ingest)
+        scores: Optional relevance scores, aligned with `documents`
+        max_overlap: Longest overlap looked for when offsets are missing
+
+    Returns:
+        Spans ordered by their best-ranked chunk; a span's score is the best
+        score among its chunks.
+    """
+    scores = scores if scores is not None else [None] * len(documents)
+    pages: dict[Any, list[int]] = {}
+    for i, meta in enumerate(metadatas):
+        pages.setdefault((meta.get("source"), meta.get("page_number")), []).append(i)
+
+    spans = []
+    for indices in pages.values():
+        indices.sort(
+            key=lambda i: (
+                metadatas[i].get("chunk_id", 0),
+                metadatas[i].get("char_start", -1),
+            )
+        )
+        span = None
+        for i in indices:
+            meta = metadatas[i]
+            if span is None or not _extend(span, documents[i], meta, max_overlap):
+                span = Span(
+                    text=documents[i],
+                    metadata=meta,
+                    rank=i,
+                    chunk_ids=[meta.get("chunk_id")],
+                    char_start=meta.get("char_start", -1),
+                    char_end=meta.get("char_end", -1),
+                )
+                spans.append(span)
+            span.rank = min(span.rank, i)
+            if scores[i] is not None and (span.score is None or scores[i] > span.score):
+                span.score = scores[i]
+    return sorted(spans, key=lambda s: s.rank)
+
+
+def pack(
+    spans: Sequence[Span],
+    token_budget: int,
+    render: Callable[[Span], str],
+    min_truncated_tokens: int = MIN_TRUNCATED_TOKENS,
+) -> list[str]:
+    """Render spans in order until `token_budget` tokens are used.
+
+    The span that does not fit is cut at a word boundary if at least
+    `min_truncated_tokens` tokens are left, and packing stops there. The
+    first span is always included, truncated if need be.
+
+    Args:
+        spans: Spans, most relevant first
+        token_budget: Tokens allowed for all rendered spans; 0 means no limit
+        render: Formats a span, citation header included
+        min_truncated_tokens: Smallest useful truncated span
+    """
+    packed = []
+    used = 0
+    for span in spans:
+        rendered = render(span)
+        tokens = count_tokens(rendered)
+        if not token_budget or used + tokens <= token_budget:
+            packed.append(rendered)
+            used += tokens
+            continue
+        remaining = token_budget - used
+        if remaining >= min_truncated_tokens or not packed:
+            truncated = _truncate(span, max(remaining, 1), render)
+            if truncated is not None:
+                packed.append(truncated)
+        break
+    return packed
+
+
+def _truncate(span: Span, max_tokens: int, render: Callable[[Span], str]) -> str | None:
+    text = span.text
+    while text:
+        # Shrink proportionally, then back off to the last whole word.
+        rendered = render(
+            Span(
+                text=text + " ...",
+                metadata=span.metadata,
+                rank=span.rank,
+                score=span.score,
+            )
+        )
+        tokens = count_tokens(rendered)
+        if tokens <= max_tokens:
+            return rendered
+        head = text[: int(len(text) * max_tokens / tokens * 0.95)]
+        words = head.rsplit(None, 1)
+        text = words[0] if len(words) > 1 else head.strip()
+    return None
@@ -0,0 +1,139 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """LRU cache of query text -> embedding vector, with an optional SQLite tier.
+
+    Queries are compared after collapsing whitespace, and keys include the
+    model name, so switching `RAG_EMBEDDING_MODEL` never returns vectors from
+    another model. When `path` is given, every vector is also written to a
+    SQLite file so repeated eval runs skip the encoder too.
+
+    Args:
+        model_name: Embedding model the vectors come from
+        max_entries: Maximum number of vectors held in memory
+        path: Optional SQLite file for the persistent tier
+    """
+
+    def __init__(
+        self, model_name: str, max_entries: int = 1024, path: str | None = None
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def make_key(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode()).hexdigest()
+
+    @property
+    def db(self) -> sqlite3.Connection | None:
+        if self.path and self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = self.make_key(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT vector FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def set(self, text: str, vector: Sequence[float]) -> None:
+        key = self.make_key(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+                    (key, vector.tobytes()),
+                )
+                self.db.commit()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def embed(
+        self, texts: Sequence[str], encode: Callable[[list[str]], Sequence[Any]]
+    ) -> list[np.ndarray]:
+        """Embeddings for `texts`, calling `encode` once for all cache misses.
+
+        Args:
+            texts: Query strings
+            encode: Batch encoder, e.g. a Chroma embedding function
+        """
+        vectors: list[np.ndarray | None] = [self.get(text) for text in texts]
+        missing = list(
+            dict.fromkeys(t for t, v in zip(texts, vectors, strict=True) if v is None)
+        )
+        if missing:
+            encoded = dict(zip(missing, encode(missing), strict=True))
+            for text, vector in encoded.items():
+                self.set(text, vector)
+            vectors = [
+                v if v is not None else np.asarray(encoded[t], dtype=np.float32)
+                for t, v in zip(texts, vectors, strict=True)
+            ]
+        return vectors
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM query_embeddings")
+                self.db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite tier. It is reopened on next use."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self.path is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3)
+            if lookups
+            else 0.0,
+        }
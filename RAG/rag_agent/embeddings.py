@@ -0,0 +1,333 @@
+"""Embedding backends for the query path and ingestion.
+
+- `torch`: the SentenceTransformer model on PyTorch, as before.
+- `onnx`: the same model exported to ONNX and run with ONNX Runtime. The
+  tokenizer comes from `tokenizers`, so neither torch nor transformers is
+  imported.
+- `onnx-int8`: the ONNX model with dynamically quantized int8 weights.
+
+sentence-transformers/all-MiniLM-L6-v2 ships both ONNX files on the Hugging
+Face Hub, and they are downloaded on first use. Other models, or offline
+machines, need a local export first (this needs torch and the `onnx` package):
+
+    uv run python -m rag_agent.embeddings export all-MiniLM-L6-v2 models/all-MiniLM-L6-v2 --int8
+
+and then `RAG_EMBEDDING_ONNX_PATH=models/all-MiniLM-L6-v2`.
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+# File names used by the sentence-transformers ONNX exports on the Hub
+ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_quint8_avx2.onnx",
+}
+_MODEL_FILES = [
+    "tokenizer.json",
+    "tokenizer_config.json",
+    "config.json",
+    "modules.json",
+    "sentence_bert_config.json",
+    "1_Pooling/config.json",
+]
+
+
+def _model_dir(model_name: str, onnx_file: str) -> str:
+    """Local directory holding the model's tokenizer, configs and `onnx_file`."""
+    if os.path.isdir(model_name):
+        return model_name
+    from huggingface_hub import snapshot_download
+
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return snapshot_download(repo_id, allow_patterns=_MODEL_FILES + [onnx_file])
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+class OnnxEmbeddingFunction:
+    """Sentence embeddings from an ONNX export of a SentenceTransformer model.
+
+    Reproduces the SentenceTransformer pipeline (truncate to the model's max
+    sequence length, transformer, mean or CLS pooling, optional L2
+    normalization) with ONNX Runtime and `tokenizers` only. Called like a
+    Chroma embedding function.
+
+    Args:
+        model_name: Hub model name or local directory (see `export_onnx`)
+        onnx_file: ONNX file inside that directory
+        batch_size: Texts per inference call
+        threads: ONNX Runtime intra-op threads (default: runtime's choice)
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        onnx_file: str = ONNX_FILES["onnx"],
+        batch_size: int = 32,
+        threads: int | None = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        model_dir = _model_dir(model_name, onnx_file)
+
+        st_config = _read_json(os.path.join(model_dir, "sentence_bert_config.json"))
+        tokenizer_config = _read_json(os.path.join(model_dir, "tokenizer_config.json"))
+        max_length = (
+            st_config.get("max_seq_length")
+            or tokenizer_config.get("model_max_length")
+            or 512
+        )
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=min(int(max_length), 512))
+        pad_token = tokenizer_config.get("pad_token", "[PAD]")
+        self.tokenizer.enable_padding(
+            pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token
+        )
+
+        pooling = _read_json(os.path.join(model_dir, "1_Pooling", "config.json"))
+        # sentence-transformers < 5 writes flags, newer versions a mode name
+        self.cls_pooling = pooling.get("pooling_mode") == "cls" or pooling.get(
+            "pooling_mode_cls_token", False
+        )
+        modules = _read_json(os.path.join(model_dir, "modules.json")) or []
+        self.normalize = any(m.get("type", "").endswith("Normalize") for m in modules)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, onnx_file),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(
+            None, {k: v for k, v in feeds.items() if k in self.input_names}
+        )[0]
+        if self.cls_pooling:
+            embeddings = token_embeddings[:, 0]
+        else:
+            mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(
+                mask.sum(axis=1), 1e-9, None
+            )
+        if self.normalize:
+            embeddings = embeddings / np.clip(
+                np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None
+            )
+        return embeddings.astype(np.float32)
+
+    def __call__(self, input: Sequence[str]) -> list[np.ndarray]:
+        vectors: list[np.ndarray] = []
+        for start in range(0, len(input), self.batch_size):
+            vectors.extend(self._encode_batch(input[start : start + self.batch_size]))
+        return vectors
+
+
+class CoalescingEncoder:
+    """Encodes the texts of concurrent callers together.
+
+    While one thread runs the model, texts passed by other threads are
+    queued; the next caller to run encodes the whole queue in one batch. A
+    forward pass over a few texts costs little more than over one, so
+    concurrent sessions share it instead of each paying for their own. A
+    single caller encodes at once.
+
+    Args:
+        embedding_function: Embedding function to batch calls to
+    """
+
+    def __init__(self, embedding_function: Callable[[Sequence[str]], Any]):
+        self.embedding_function = embedding_function
+        self._condition = threading.Condition()
+        self._queue: list[dict[str, Any]] = []
+        self._encoding = False
+
+    def __call__(self, input: Sequence[str]) -> list[Any]:
+        request: dict[str, Any] = {"texts": list(input), "done": False}
+        with self._condition:
+            self._queue.append(request)
+            while self._encoding and not request["done"]:
+                self._condition.wait()
+            leader = not request["done"]
+            if leader:
+                batch, self._queue = self._queue, []
+                self._encoding = True
+        if leader:
+            try:
+                results = self._encode(batch)
+            except BaseException as e:
+                # e.g. KeyboardInterrupt: fail the batch rather than leave it waiting
+                results = [([], e)] * len(batch)
+                raise
+            finally:
+                with self._condition:
+                    for queued, (vectors, error) in zip(batch, results, strict=True):
+                        queued.update(vectors=vectors, error=error, done=True)
+                    self._encoding = False
+                    self._condition.notify_all()
+        if request["error"] is not None:
+            raise request["error"]
+        return request["vectors"]
+
+    def _encode(
+        self, batch: list[dict[str, Any]]
+    ) -> list[tuple[list[Any], BaseException | None]]:
+        """(vectors, error) of each queued request. If the batch fails, each
+        request is encoded on its own, so only the one at fault gets the error."""
+        try:
+            vectors = list(
+                self.embedding_function(
+                    [text for queued in batch for text in queued["texts"]]
+                )
+            )
+        except Exception as e:
+            if len(batch) == 1:
+                return [([], e)]
+            return [self._encode([queued])[0] for queued in batch]
+        results, start = [], 0
+        for queued in batch:
+            end = start + len(queued["texts"])
+            results.append((vectors[start:end], None))
+            start = end
+        return results
+
+
+def load_embedding_function(
+    backend: str, model_name: str, onnx_path: str | None = None
+) -> Callable[[Sequence[str]], Any]:
+    """Return an embedding function for `backend`.
+
+    Args:
+        backend: One of `BACKENDS`
+        model_name: SentenceTransformer model name
+        onnx_path: Local directory written by `export_onnx`, used by the ONNX
+            backends instead of downloading `model_name` from the Hub
+
+    Raises:
+        ValueError: For an unknown backend.
+    """
+    if backend == "torch":
+        from chromadb.utils import embedding_functions
+
+        return embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=model_name
+        )
+    if backend in ONNX_FILES:
+        return OnnxEmbeddingFunction(
+            onnx_path or model_name, onnx_file=ONNX_FILES[backend]
+        )
+    raise ValueError(
+        f"Unknown embedding backend '{backend}'; expected one of {', '.join(BACKENDS)}"
+    )
+
+
+def export_onnx(
+    model_name: str, output_dir: str, quantize: bool = False, opset: int = 17
+) -> str:
+    """Export a SentenceTransformer model for the ONNX backends.
+
+    Saves the model (tokenizer and pooling configs included) to `output_dir`
+    and writes `onnx/model.onnx`, plus the int8 `onnx/model_quint8_avx2.onnx`
+    when `quantize` is set.
+
+    Returns:
+        `output_dir`
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    model.save(output_dir)
+    transformer = model[0].auto_model.eval()
+    onnx_path = os.path.join(output_dir, ONNX_FILES["onnx"])
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+
+    sample = model.tokenizer(["export"], return_tensors="pt")
+    input_names = [
+        name
+        for name in ("input_ids", "attention_mask", "token_type_ids")
+        if name in sample
+    ]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _LastHiddenState(torch.nn.Module):
+        # Fixes the argument order; transformers' forward() signatures vary by version.
+        def __init__(self) -> None:
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+            return self.transformer(
+                **dict(zip(input_names, inputs, strict=True))
+            ).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(),
+            tuple(sample[name] for name in input_names),
+            onnx_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            onnx_path,
+            os.path.join(output_dir, ONNX_FILES["onnx-int8"]),
+            weight_type=QuantType.QUInt8,
+        )
+    return output_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export a SentenceTransformer model for the ONNX backends."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Export to ONNX (and int8)")
+    export.add_argument("model", help="SentenceTransformer model name or path")
+    export.add_argument("output_dir", help="Directory to write the export to")
+    export.add_argument(
+        "--int8", action="store_true", help="Also write the int8 quantized model"
+    )
+    args = parser.parse_args()
+
+    output_dir = export_onnx(args.model, args.output_dir, quantize=args.int8)
+    print(f"Exported {args.model} to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+"""Read-only, memory-mapped export of a ChromaDB collection.
+
+The 10-K collection is written once by ingest and then only read, so the
+agent does not need ChromaDB's SQLite and HNSW machinery to query it. This
+module exports a collection to a directory of flat files and searches it
+with NumPy:
+
+- `embeddings.npy`: float16 matrix, one row per chunk, memory-mapped;
+- `norms.npy`: float32 row norms, for cosine and L2 distances;
+- `documents.bin` / `offsets.npy`: the chunk texts as one UTF-8 blob and
+  the byte offset of each chunk, memory-mapped;
+- `columns.json`: the chunk ids, one list per metadata key, and a manifest
+  (distance space, dimension, IVF lists).
+
+Opening the index maps the files and parses only `columns.json`, so a
+worker starts in milliseconds, and every process reading the same export
+shares its pages through the OS page cache.
+
+With `nlist` > 0 the export also clusters the rows with k-means into IVF
+lists, stored contiguously, and a query only scans the `nprobe` lists
+whose centroids are closest. The default exact scan is fast enough for a
+few hundred thousand chunks.
+
+Export after ingest (`rag_agent.ingest` refreshes an existing export):
+
+    uv run python -m rag_agent.flat_index export
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+INDEX_VERSION = 1
+# Rows converted to float32 at a time during a scan
+_SCAN_BLOCK = 65536
+# Filter masks kept per index, keyed by the `where` clause
+_MASK_CACHE_SIZE = 64
+
+# Chroma `where` operators
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+
+def default_path(chroma_path: str, collection_name: str) -> str:
+    """Where the flat export of a collection lives: next to its ChromaDB store."""
+    return os.path.join(f"{os.path.normpath(chroma_path)}_flat", collection_name)
+
+
+def _collection_space(collection: Any) -> str:
+    """Distance space of a Chroma collection: `l2`, `cosine` or `ip`."""
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space is None:
+        # chromadb >= 1.0 keeps it in the collection configuration
+        hnsw = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+        space = hnsw.get("space")
+    return space or "l2"
+
+
+def _kmeans(
+    vectors: np.ndarray, nlist: int, iterations: int = 20, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means centroids (unit length) of `vectors`."""
+    rng = np.random.default_rng(seed)
+    unit = vectors / np.clip(
+        np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None
+    )
+    centroids = unit[rng.choice(len(unit), size=nlist, replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(unit @ centroids.T, axis=1)
+        for i in range(nlist):
+            members = unit[assignment == i]
+            # An empty list keeps its centroid rather than collapsing.
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+        centroids /= np.clip(
+            np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12, None
+        )
+    return centroids.astype(np.float32)
+
+
+def export_collection(
+    collection: Any, output_dir: str, nlist: int | None = None, page_size: int = 5000
+) -> dict[str, Any]:
+    """Write `collection` to `output_dir` as a flat, memory-mappable index.
+
+    The export is written to a temporary directory and swapped in, so
+    readers see either the old or the new index.
+
+    Args:
+        collection: ChromaDB collection to export
+        output_dir: Directory to write the index to
+        nlist: IVF lists to partition the rows into; 0 disables IVF and None
+            keeps the setting of the export being replaced
+        page_size: Chunks fetched from Chroma per request
+
+    Returns:
+        The manifest written to `columns.json`
+    """
+    if nlist is None:
+        try:
+            with open(os.path.join(output_dir, "columns.json"), encoding="utf-8") as f:
+                nlist = json.load(f)["manifest"].get("nlist", 0)
+        except (OSError, ValueError, KeyError):
+            nlist = 0
+
+    ids: list[str] = []
+    documents: list[str] = []
+    metadatas: list[dict[str, Any]] = []
+    embeddings: list[np.ndarray] = []
+    offset = 0
+    while True:
+        page = collection.get(
+            limit=page_size,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"],
+        )
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        documents.extend(doc or "" for doc in page["documents"])
+        metadatas.extend(meta or {} for meta in page["metadatas"])
+        embeddings.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page["ids"])
+
+    vectors = (
+        np.vstack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+    )
+    nlist = min(nlist, len(ids))
+    lists = None
+    if nlist > 0:
+        centroids = _kmeans(vectors, nlist)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        # Rows of one list are stored together, so a probe reads a contiguous range.
+        order = np.argsort(assignment, kind="stable")
+        vectors = vectors[order]
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+        lists = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignment, minlength=nlist))]
+        )
+
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "embeddings.npy"), vectors.astype(np.float16))
+    np.save(
+        os.path.join(tmp_dir, "norms.npy"),
+        np.linalg.norm(vectors, axis=1).astype(np.float32),
+    )
+    blobs = [doc.encode("utf-8") for doc in documents]
+    offsets = np.concatenate([[0], np.cumsum([len(blob) for blob in blobs])]).astype(
+        np.int64
+    )
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+    with open(os.path.join(tmp_dir, "documents.bin"), "wb") as f:
+        f.write(b"".join(blobs))
+    if lists is not None:
+        np.save(os.path.join(tmp_dir, "ivf_centroids.npy"), centroids)
+        np.save(os.path.join(tmp_dir, "ivf_lists.npy"), lists.astype(np.int64))
+
+    keys = sorted({key for meta in metadatas for key in meta})
+    manifest = {
+        "version": INDEX_VERSION,
+        "collection": collection.name,
+        "space": _collection_space(collection),
+        "count": len(ids),
+        "dimension": int(vectors.shape[1]) if len(ids) else 0,
+        "nlist": nlist,
+        "exported_at": time.time(),
+    }
+    with open(os.path.join(tmp_dir, "columns.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "manifest": manifest,
+                "ids": ids,
+                "metadata": {
+                    key: [meta.get(key) for meta in metadatas] for key in keys
+                },
+            },
+            f,
+            separators=(",", ":"),
+        )
+
+    old_dir = f"{output_dir.rstrip(os.sep)}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(output_dir):
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+def _test(operator: Callable[[Any, Any], bool], value: Any, operand: Any) -> bool:
+    if value is None:
+        return False
+    try:
+        return bool(operator(value, operand))
+    except TypeError:
+        # e.g. a string compared with a number
+        return False
+
+
+class FlatIndex:
+    """Memory-mapped index written by `export_collection`.
+
+    Answers `query`, `get` and `count` with the arguments and result shapes
+    of a ChromaDB collection, so the tools can use it in place of one.
+    Distances follow the collection's space: squared L2, `1 - cosine` or
+    `1 - inner product`. A `where` filter is evaluated on the metadata
+    columns first, and the scan then covers only the matching rows (exactly,
+    without IVF).
+
+    Args:
+        path: Directory written by `export_collection`
+        nprobe: IVF lists scanned per query, when the export has them (at least 1)
+
+    Raises:
+        ValueError: If `nprobe` is below 1, or the export has another version.
+    """
+
+    def __init__(self, path: str, nprobe: int = 8):
+        if nprobe < 1:
+            raise ValueError(
+                f"nprobe must be at least 1, got {nprobe} (RAG_FLAT_NPROBE)"
+            )
+        self.path = path
+        self.nprobe = nprobe
+        with open(os.path.join(path, "columns.json"), encoding="utf-8") as f:
+            columns = json.load(f)
+        self.manifest: dict[str, Any] = columns["manifest"]
+        if self.manifest.get("version") != INDEX_VERSION:
+            raise ValueError(
+                f"Flat index at {path} has version {self.manifest.get('version')}; re-export it."
+            )
+        self.name = self.manifest["collection"]
+        self.space = self.manifest["space"]
+        self.metadata = {"hnsw:space": self.space}
+        self.ids: list[str] = columns["ids"]
+        self._metadata: dict[str, list[Any]] = columns["metadata"]
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self._masks: dict[str, np.ndarray] = {}
+        # Queries to several collections run on threads (see `rag_agent.tools`).
+        self._masks_lock = threading.Lock()
+
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.norms = np.load(os.path.join(path, "norms.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self._documents = b""
+        if self.offsets[-1] > 0:
+            with open(os.path.join(path, "documents.bin"), "rb") as f:
+                self._documents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.centroids: np.ndarray | None = None
+        self.lists: np.ndarray | None = None
+        if self.manifest.get("nlist"):
+            self.centroids = np.load(os.path.join(path, "ivf_centroids.npy"))
+            self.lists = np.load(os.path.join(path, "ivf_lists.npy"))
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def _document(self, i: int) -> str:
+        return self._documents[self.offsets[i] : self.offsets[i + 1]].decode("utf-8")
+
+    def _metadata_row(self, i: int) -> dict[str, Any]:
+        return {
+            key: values[i]
+            for key, values in self._metadata.items()
+            if values[i] is not None
+        }
+
+    def _match(self, where: dict[str, Any]) -> np.ndarray:
+        masks = []
+        for field, condition in where.items():
+            if field in ("$and", "$or"):
+                clauses = [self._match(clause) for clause in condition]
+                masks.append(
+                    np.logical_and.reduce(clauses)
+                    if field == "$and"
+                    else np.logical_or.reduce(clauses)
+                )
+                continue
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            values = self._metadata.get(field, [None] * len(self.ids))
+            for operator, operand in condition.items():
+                if operator not in _OPERATORS:
+                    raise ValueError(f"Unsupported where operator '{operator}'")
+                masks.append(
+                    np.fromiter(
+                        (
+                            _test(_OPERATORS[operator], value, operand)
+                            for value in values
+                        ),
+                        dtype=bool,
+                        count=len(values),
+                    )
+                )
+        return (
+            np.logical_and.reduce(masks)
+            if masks
+            else np.ones(len(self.ids), dtype=bool)
+        )
+
+    def where_mask(self, where: dict[str, Any]) -> np.ndarray:
+        """Boolean mask of the rows matching a Chroma `where` filter
+        (`$and`, `$or`, `$eq`, `$ne`, `$gt`, `$gte`, `$lt`, `$lte`, `$in`, `$nin`).
+        Chunks without the field never match."""
+        key = json.dumps(where, sort_keys=True)
+        with self._masks_lock:
+            mask = self._masks.get(key)
+        if mask is None:
+            mask = self._match(where)
+            with self._masks_lock:
+                if key not in self._masks and len(self._masks) >= _MASK_CACHE_SIZE:
+                    self._masks.pop(next(iter(self._masks)))
+                self._masks[key] = mask
+        return mask
+
+    def _rows(self, query: np.ndarray) -> np.ndarray:
+        """Row numbers of the `nprobe` IVF lists closest to `query`."""
+        unit = query / max(float(np.linalg.norm(query)), 1e-12)
+        probes = np.argpartition(-(self.centroids @ unit), self.nprobe - 1)[
+            : self.nprobe
+        ]
+        return np.concatenate(
+            [np.arange(self.lists[p], self.lists[p + 1]) for p in sorted(probes)]
+        )
+
+    def _distances(
+        self, queries: np.ndarray, rows: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Distances from each query to `rows` (default: every row), in the
+        collection's space. The matrix is read once for all queries."""
+        total = len(self.ids) if rows is None else len(rows)
+        dots = np.empty((len(queries), total), dtype=np.float32)
+        for start in range(0, total, _SCAN_BLOCK):
+            stop = min(start + _SCAN_BLOCK, total)
+            block = (
+                self.embeddings[start:stop]
+                if rows is None
+                else self.embeddings[rows[start:stop]]
+            )
+            dots[:, start:stop] = queries @ block.astype(np.float32).T
+        norms = self.norms if rows is None else self.norms[rows]
+        query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        if self.space == "cosine":
+            return 1.0 - dots / np.clip(norms * query_norms, 1e-12, None)
+        if self.space == "ip":
+            return 1.0 - dots
+        return norms**2 - 2.0 * dots + query_norms**2
+
+    def _results(
+        self,
+        rows: list[list[int]],
+        include: Sequence[str],
+        distances: list[list[float]] | None,
+    ) -> dict[str, Any]:
+        return {
+            "ids": [[self.ids[i] for i in query_rows] for query_rows in rows],
+            "documents": [
+                [self._document(i) for i in query_rows] for query_rows in rows
+            ]
+            if "documents" in include
+            else None,
+            "metadatas": [
+                [self._metadata_row(i) for i in query_rows] for query_rows in rows
+            ]
+            if "metadatas" in include
+            else None,
+            "embeddings": [
+                [self.embeddings[i].astype(np.float32) for i in query_rows]
+                for query_rows in rows
+            ]
+            if "embeddings" in include
+            else None,
+            "distances": distances if "distances" in include else None,
+        }
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: dict[str, Any] | None = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> dict[str, Any]:
+        """Nearest chunks to each query embedding, as `collection.query` returns them."""
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(
+            len(query_embeddings), -1
+        )
+        filtered = np.flatnonzero(self.where_mask(where)) if where else None
+        ivf = (
+            filtered is None
+            and self.centroids is not None
+            and self.nprobe < len(self.centroids)
+        )
+        exact = None if ivf else self._distances(queries, filtered)
+        rows, distances = [], []
+        for i, query in enumerate(queries):
+            candidates = self._rows(query) if ivf else filtered
+            scores = self._distances(query[None, :], candidates)[0] if ivf else exact[i]
+            n = min(n_results, len(scores))
+            top = (
+                np.argpartition(scores, n - 1)[:n] if n else np.zeros(0, dtype=np.int64)
+            )
+            top = top[np.argsort(scores[top], kind="stable")]
+            rows.append(
+                [int(row) for row in (top if candidates is None else candidates[top])]
+            )
+            distances.append([float(scores[j]) for j in top])
+        return self._results(rows, include, distances)
+
+    def get(
+        self,
+        ids: Sequence[str] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        where: dict[str, Any] | None = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+    ) -> dict[str, Any]:
+        """Chunks by id (unknown ids are skipped), or a page of all chunks,
+        optionally filtered, as `collection.get` returns them."""
+        if ids is None:
+            rows = list(range(len(self.ids)))
+        else:
+            rows = [self._positions[i] for i in ids if i in self._positions]
+        if where:
+            mask = self.where_mask(where)
+            rows = [i for i in rows if mask[i]]
+        if ids is None:
+            rows = rows[offset:] if limit is None else rows[offset : offset + limit]
+        results = self._results([rows], include, None)
+        return {
+            key: value[0] if value is not None else None
+            for key, value in results.items()
+        }
+
+
+def main() -> None:
+    from .config import config
+
+    parser = argparse.ArgumentParser(
+        description="Export a ChromaDB collection to a memory-mapped flat index."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Export the collection")
+    export.add_argument(
+        "--db-path", default=config.chroma_path, help="ChromaDB directory"
+    )
+    export.add_argument(
+        "--collection", default=config.collection_name, help="Collection to export"
+    )
+    export.add_argument(
+        "--output", help="Output directory (default: next to the ChromaDB store)"
+    )
+    export.add_argument(
+        "--nlist",
+        type=int,
+        help="IVF lists; 0 for exact search (default: keep the existing export's, else 0)",
+    )
+    args = parser.parse_args()
+
+    import chromadb
+
+    client = chromadb.PersistentClient(path=args.db_path)
+    # Without embedding_function=None, chromadb >= 1.0 loads the persisted model.
+    collection = client.get_collection(name=args.collection, embedding_function=None)
+    output = args.output or default_path(args.db_path, args.collection)
+    start = time.perf_counter()
+    manifest = export_collection(collection, output, nlist=args.nlist)
+    print(
+        f"Exported {manifest['count']} chunks of '{args.collection}' to {output} "
+        f"({manifest['space']}, {manifest['nlist']} IVF lists) in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+"""Incremental, parallel PDF ingestion into the RAG ChromaDB collection.
+
+Pages are extracted and split into chunks in a process pool, embedded in
+batches and written with streamed `upsert` calls. Every chunk stores hashes
+of its file, its page and its own text, so re-ingesting a document only
+embeds chunks whose text changed, and an identical file is skipped outright.
+Chunks of a Form 10-K are tagged with the Item they fall under (see
+`rag_agent.sections`), so retrieval can filter on it. The BM25 lexical index
+used for hybrid retrieval is updated in the same pass, and so is the flat
+export of the collection (`rag_agent.flat_index`), if there is one.
+Run from the `RAG` directory:
+
+    uv run python -m rag_agent.ingest data/alphabet-form-10-K-2024.pdf
+
+Each filing goes into its own collection, recorded with its company in the
+store's registry of filings (`rag_agent.registry`):
+
+    uv run python -m rag_agent.ingest data/msft-10-K-2024.pdf --collection msft_10k_2024 --ticker MSFT --company Microsoft --year 2024
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from . import flat_index
+from .config import CHUNK_OVERLAP, CHUNK_SIZE, config
+from .lexical_index import LexicalIndex, default_path
+from .registry import register
+from .sections import assign as assign_sections
+from .sections import find_headings
+
+# Part of every file hash: bump it when extraction or chunking changes, so
+# re-ingesting an unchanged PDF re-processes it instead of skipping it.
+INGEST_VERSION = 3
+
+_reader: Any | None = None
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _open_reader(file_path: str) -> None:
+    """Process pool initializer: parse the PDF once per worker."""
+    global _reader
+    from pypdf import PdfReader
+
+    _reader = PdfReader(file_path)
+
+
+def _page_count(file_path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(file_path).pages)
+
+
+def extract_pages(
+    file_path: str,
+    start: int,
+    stop: int,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> list[tuple[int, str, list[dict[str, Any]], list[tuple[int, str]]]]:
+    """Extract and chunk pages `start`..`stop` (0-based, exclusive).
+
+    Returns:
+        One `(page_index, page_hash, chunks, headings)` tuple per page with
+        text, where each chunk is a dict with the chunk's id, text and
+        metadata, and `headings` are the page's 10-K Item headings (see
+        `rag_agent.sections.find_headings`).
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    if _reader is None:
+        _open_reader(file_path)
+    source = os.path.basename(file_path)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
+
+    pages = []
+    for page_index in range(start, stop):
+        page_text = _reader.pages[page_index].extract_text()
+        if not page_text:
+            continue
+        page_hash = content_hash(page_text)
+
+        chunks = []
+        char_cursor = 0
+        # Split THIS PAGE only
+        for chunk_index, chunk in enumerate(text_splitter.split_text(page_text)):
+            char_start = page_text.find(chunk, char_cursor)
+            char_end = char_start + len(chunk)
+            # The next chunk may start up to `chunk_overlap` characters back,
+            # but always after this one's start.
+            char_cursor = max(char_start + 1, char_end - chunk_overlap)
+            chunks.append(
+                {
+                    "id": f"{source}_p{page_index + 1}_c{chunk_index + 1}",
+                    "document": chunk,
+                    "metadata": {
+                        "source": source,
+                        "page_number": page_index,
+                        "chunk_id": chunk_index + 1,
+                        "char_start": char_start,
+                        "char_end": char_end,
+                        "page_hash": page_hash,
+                        "content_hash": content_hash(chunk),
+                    },
+                }
+            )
+        pages.append((page_index, page_hash, chunks, find_headings(page_text)))
+    return pages
+
+
+def iter_pages(
+    file_path: str, workers: int | None = None, pages_per_task: int = 8
+) -> Iterator[tuple[int, str, list[dict[str, Any]], list[tuple[int, str]]]]:
+    """Yield extracted pages in page order, extracting them in a process pool."""
+    page_count = _page_count(file_path)
+    ranges = [
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+    if workers == 1:
+        for start, stop in ranges:
+            yield from extract_pages(file_path, start, stop)
+        return
+    # spawn, not fork: the parent may already hold chromadb/torch threads.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_open_reader,
+        initargs=(file_path,),
+    ) as executor:
+        # Keep a bounded window of ranges in flight so memory does not grow with the PDF.
+        window = 2 * (workers or os.cpu_count() or 1)
+        pending: deque[Future] = deque()
+        for start, stop in ranges:
+            pending.append(executor.submit(extract_pages, file_path, start, stop))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+@dataclass
+class IngestStats:
+    """Counters for one ingestion run."""
+
+    source: str
+    pages: int = 0
+    pages_skipped: int = 0
+    chunks: int = 0
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_s(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def chunks_per_s(self) -> float:
+        return self.chunks_embedded / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "seconds": round(self.seconds, 2),
+            "pages_per_s": round(self.pages_per_s, 1),
+            "chunks_per_s": round(self.chunks_per_s, 1),
+        }
+
+
+class _BatchWriter:
+    """Buffers chunks and writes them `batch_size` at a time: new or changed
+    chunks are embedded and upserted, unchanged ones only get fresh metadata."""
+
+    def __init__(
+        self,
+        collection: Any,
+        embedding_function: Any,
+        batch_size: int,
+        stats: IngestStats,
+    ):
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.batch_size = batch_size
+        self.stats = stats
+        self._pending: list[dict[str, Any]] = []
+        self._unchanged: list[dict[str, Any]] = []
+
+    def add(self, chunk: dict[str, Any]) -> None:
+        self._pending.append(chunk)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def keep(self, chunk: dict[str, Any]) -> None:
+        self._unchanged.append(chunk)
+        if len(self._unchanged) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._unchanged:
+            batch, self._unchanged = self._unchanged, []
+            self.collection.update(
+                ids=[chunk["id"] for chunk in batch],
+                metadatas=[chunk["metadata"] for chunk in batch],
+            )
+        if self._pending:
+            batch, self._pending = self._pending, []
+            documents = [chunk["document"] for chunk in batch]
+            self.collection.upsert(
+                ids=[chunk["id"] for chunk in batch],
+                documents=documents,
+                metadatas=[chunk["metadata"] for chunk in batch],
+                embeddings=self.embedding_function(documents),
+            )
+            self.stats.chunks_embedded += len(batch)
+            self.stats.batches += 1
+
+
+def file_hash(file_path: str) -> str:
+    digest = hashlib.sha256(f"{INGEST_VERSION}\0".encode())
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def ingest_pdf(
+    file_path: str,
+    collection_name: str | None = None,
+    db_path: str | None = None,
+    batch_size: int = 64,
+    workers: int | None = None,
+    force: bool = False,
+    progress_every: int = 25,
+    ticker: str | None = None,
+    company: str | None = None,
+    year: int | None = None,
+) -> IngestStats:
+    """
+    Load a PDF into ChromaDB, re-embedding only chunks whose text changed.
+
+    An identical file is skipped without extracting any page. Otherwise
+    every page is extracted and chunked, chunks whose id and text hash match
+    the stored ones only get their metadata refreshed, the rest are
+    embedded, and chunks of pages that changed shape or disappeared are
+    deleted. The collection's lexical index (see `rag_agent.lexical_index`)
+    is kept in step with the collection, and its flat export (see
+    `rag_agent.flat_index`) is rewritten if one exists. The collection is
+    recorded in the store's registry of filings (see `rag_agent.registry`).
+
+    Args:
+        file_path: PDF to ingest
+        collection_name: Target collection (default: `RAG_COLLECTION_NAME`)
+        db_path: ChromaDB directory (default: `RAG_CHROMA_PATH`)
+        batch_size: Chunks embedded and upserted per batch
+        workers: Extraction processes (default: CPU count; 1 extracts inline)
+        force: Re-embed every chunk even if its hash is unchanged
+        progress_every: Print progress every this many pages (0 disables it)
+        ticker: Ticker of the filing's company, for `document` routing
+        company: Company name of the filing
+        year: Fiscal year of the filing
+    """
+    import chromadb
+    from chromadb.errors import ChromaError
+
+    from .embeddings import load_embedding_function
+
+    source = os.path.basename(file_path)
+    stats = IngestStats(source=source)
+    started = time.perf_counter()
+    digest = file_hash(file_path)
+    collection_name = collection_name or config.collection_name
+    db_path = db_path or config.chroma_path
+    client = chromadb.PersistentClient(path=db_path)
+    lexical = LexicalIndex.load(default_path(db_path, collection_name))
+
+    # What is already stored for this document. Opening the collection without
+    # an embedding function does not load the model.
+    try:
+        stored_collection = client.get_collection(
+            name=collection_name, embedding_function=None
+        )
+        stored = stored_collection.get(where={"source": source}, include=["metadatas"])
+    except (ValueError, ChromaError):
+        stored_collection = None
+        stored = {"ids": [], "metadatas": []}
+    if (
+        stored["ids"]
+        and not force
+        and all(m.get("file_hash") == digest for m in stored["metadatas"])
+    ):
+        # Stores written before the lexical index existed only need it backfilled.
+        missing = [chunk_id for chunk_id in stored["ids"] if chunk_id not in lexical]
+        if missing:
+            backfill = stored_collection.get(ids=missing, include=["documents"])
+            lexical.add(backfill["ids"], backfill["documents"])
+            lexical.save()
+        # Lets an unchanged re-run add or correct the ticker, company and year.
+        register(db_path, collection_name, ticker, company, year, source=source)
+        stats.seconds = time.perf_counter() - started
+        print(f"{source} is unchanged in '{collection_name}'; nothing to do.")
+        return stats
+
+    # page -> (page hash, {chunk id: content hash})
+    existing: dict[int, tuple[str | None, dict[str, str | None]]] = {}
+    for chunk_id, meta in zip(stored["ids"], stored["metadatas"], strict=True):
+        page_hash, chunks = existing.setdefault(
+            meta["page_number"], (meta.get("page_hash"), {})
+        )
+        chunks[chunk_id] = meta.get("content_hash")
+
+    # Must match the model used at query time.
+    embedding_function = load_embedding_function(
+        config.embedding_backend, config.embedding_model, config.embedding_onnx_path
+    )
+    collection = stored_collection
+    if collection is None:
+        # Embeddings are always passed explicitly; only the PyTorch function is
+        # recorded in the collection's configuration, as the notebook used to do.
+        collection = client.create_collection(
+            name=collection_name,
+            embedding_function=embedding_function
+            if config.embedding_backend == "torch"
+            else None,
+        )
+
+    writer = _BatchWriter(collection, embedding_function, batch_size, stats)
+    stale_ids: list[str] = []
+    seen_pages = set()
+    # The Item the previous page ended in; sections run across pages.
+    section: str | None = None
+    for page_index, page_hash, chunks, headings in iter_pages(file_path, workers):
+        seen_pages.add(page_index)
+        section = assign_sections(chunks, headings, section)
+        stats.pages += 1
+        stats.chunks += len(chunks)
+        stored_hash, stored_chunks = existing.get(page_index, (None, {}))
+
+        unchanged = 0
+        for chunk in chunks:
+            chunk["metadata"]["file_hash"] = digest
+            if (
+                not force
+                and stored_chunks.get(chunk["id"]) == chunk["metadata"]["content_hash"]
+            ):
+                # Same text under the same id: keep the vector, refresh offsets, hashes and section.
+                writer.keep(chunk)
+                unchanged += 1
+            else:
+                writer.add(chunk)
+        if stored_hash == page_hash and unchanged == len(chunks):
+            stats.pages_skipped += 1
+        lexical.add(
+            [chunk["id"] for chunk in chunks], [chunk["document"] for chunk in chunks]
+        )
+        new_ids = {chunk["id"] for chunk in chunks}
+        stale_ids.extend(i for i in stored_chunks if i not in new_ids)
+
+        if progress_every and stats.pages % progress_every == 0:
+            elapsed = time.perf_counter() - started
+            print(
+                f"{source}: {stats.pages} pages ({stats.pages_skipped} unchanged), "
+                f"{stats.chunks_embedded} chunks embedded, {stats.pages / elapsed:.1f} pages/s"
+            )
+    writer.flush()
+
+    # Pages that no longer exist (or lost their text) in the new version
+    for page_index, (_, stored_chunks) in existing.items():
+        if page_index not in seen_pages:
+            stale_ids.extend(stored_chunks)
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+        lexical.remove(stale_ids)
+        stats.chunks_deleted = len(stale_ids)
+    lexical.save()
+
+    flat_path = flat_index.default_path(db_path, collection_name)
+    if os.path.isdir(flat_path):
+        flat_index.export_collection(collection, flat_path)
+    # Only once the chunks are written: a failed ingest leaves no routable filing.
+    register(
+        db_path, collection_name, ticker, company, year, source=source, revised=True
+    )
+
+    stats.seconds = time.perf_counter() - started
+    print(
+        f"Ingested {source} into '{collection_name}': {stats.pages} pages "
+        f"({stats.pages_skipped} unchanged), {stats.chunks_embedded} chunks embedded, "
+        f"{stats.chunks_deleted} deleted in {stats.seconds:.1f}s "
+        f"({stats.pages_per_s:.1f} pages/s, {stats.chunks_per_s:.1f} chunks/s)"
+    )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingest PDFs into the RAG ChromaDB collection."
+    )
+    parser.add_argument("files", nargs="+", help="PDF files to ingest")
+    parser.add_argument(
+        "--collection", help="Collection name (default: $RAG_COLLECTION_NAME)"
+    )
+    parser.add_argument(
+        "--db-path", help="ChromaDB directory (default: $RAG_CHROMA_PATH)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=64, help="Chunks embedded per batch"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Page extraction processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Re-embed unchanged chunks too"
+    )
+    parser.add_argument("--ticker", help="Ticker of the filing's company, e.g. GOOGL")
+    parser.add_argument("--company", help="Company name of the filing")
+    parser.add_argument("--year", type=int, help="Fiscal year of the filing")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        ingest_pdf(
+            file_path,
+            collection_name=args.collection,
+            db_path=args.db_path,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            force=args.force,
+            ticker=args.ticker,
+            company=args.company,
+            year=args.year,
+        )
+
+
+if __name__ == "__main__":
+    main()
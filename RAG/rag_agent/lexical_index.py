@@ -0,0 +1,198 @@
+import gzip
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from collections.abc import Container, Iterable, Sequence
+
+# Numbers keep their separators ("1,234.5", "10-k", "2024") and item headings
+# stay searchable: "Item 7A" becomes the tokens "item" and "7a".
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,\-'][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    """a about above after again all also an and any are as at be been before being
+    between both but by can could did do does doing during each few for from further
+    had has have having he her here hers him his how i if in into is it its itself
+    just may me might more most much must my no nor not of off on once only or other
+    our ours out over own same shall she should so some such than that the their them
+    then there these they this those through to too under until up very was we were
+    what when where which while who whom why will with would you your""".split()
+)
+
+INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase terms of `text` for the lexical index, without stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def default_path(chroma_path: str, collection_name: str) -> str:
+    """Where the lexical index of a collection lives: next to its ChromaDB store."""
+    return os.path.join(
+        f"{os.path.normpath(chroma_path)}_lexical", f"{collection_name}.json.gz"
+    )
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[str]], k: int = 60
+) -> list[tuple[str, float]]:
+    """Fuse ranked id lists with reciprocal rank fusion.
+
+    Each list contributes `1 / (k + rank)` (rank starting at 1) to the score of
+    every id it contains, so ids ranked well by several retrievers rise to the
+    top without having to calibrate their raw scores against each other.
+
+    Args:
+        rankings: Ranked id lists, best first
+        k: Damping constant; 60 is the value from the original RRF paper
+
+    Returns:
+        `(id, score)` pairs, best first
+    """
+    scores: dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+class LexicalIndex:
+    """BM25 inverted index over chunk texts, keyed by Chroma chunk id.
+
+    Dense MiniLM retrieval tends to miss exact terms such as line-item names,
+    "Item 7" or figures; this index catches them and is fused with the vector
+    results by `reciprocal_rank_fusion`. It is built by `rag_agent.ingest` and
+    saved as gzipped JSON next to the ChromaDB store. Only per-chunk term
+    counts are persisted; the postings are rebuilt on load.
+
+    Args:
+        path: gzipped JSON file the index is loaded from and saved to
+        k1: BM25 term frequency saturation
+        b: BM25 document length normalization
+    """
+
+    def __init__(self, path: str | None = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._docs: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """Load an index saved by `save`; a missing file gives an empty index."""
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            # Written by another version; rebuilt on the next ingest.
+            return index
+        index.k1 = data["k1"]
+        index.b = data["b"]
+        for chunk_id, term_counts in data["docs"].items():
+            index._insert(chunk_id, term_counts)
+        return index
+
+    def save(self, path: str | None = None) -> None:
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            data = {
+                "version": INDEX_VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "docs": self._docs,
+            }
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+        # Readers never see a half-written index.
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._docs
+
+    def postings(self) -> int:
+        """Number of (term, chunk) postings, a measure of the index's memory use."""
+        return sum(len(term_counts) for term_counts in list(self._docs.values()))
+
+    def _insert(self, chunk_id: str, term_counts: dict[str, int]) -> None:
+        self._docs[chunk_id] = term_counts
+        length = sum(term_counts.values())
+        self._lengths[chunk_id] = length
+        self._total_length += length
+        for term, count in term_counts.items():
+            self._postings[term][chunk_id] = count
+
+    def _delete(self, chunk_id: str) -> None:
+        term_counts = self._docs.pop(chunk_id, None)
+        if term_counts is None:
+            return
+        self._total_length -= self._lengths.pop(chunk_id)
+        for term in term_counts:
+            postings = self._postings[term]
+            postings.pop(chunk_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def add(self, chunk_ids: Sequence[str], documents: Sequence[str]) -> None:
+        """Index chunks, replacing any already indexed under the same ids."""
+        with self._lock:
+            for chunk_id, document in zip(chunk_ids, documents, strict=True):
+                self._delete(chunk_id)
+                self._insert(chunk_id, dict(Counter(tokenize(document))))
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._delete(chunk_id)
+
+    def search(
+        self, query: str, n_results: int = 10, allowed: Container[str] | None = None
+    ) -> list[tuple[str, float]]:
+        """Top `n_results` chunks for `query` by BM25 score.
+
+        Args:
+            query: Query text
+            n_results: Chunks returned
+            allowed: If given, only these chunk ids are scored (a metadata
+                filter resolved by the caller); term statistics still cover
+                the whole index
+
+        Returns:
+            `(chunk_id, score)` pairs, best first; chunks sharing no term with
+            the query are not returned.
+        """
+        terms = tokenize(query)
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs or not terms:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: dict[str, float] = defaultdict(float)
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in postings.items():
+                    if allowed is not None and chunk_id not in allowed:
+                        continue
+                    norm = self.k1 * (
+                        1.0 - self.b + self.b * self._lengths[chunk_id] / avg_length
+                    )
+                    scores[chunk_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+        return ranked[:n_results]
@@ -14,6 +14,14 @@ def return_instructions_root() -> str:
 
         But if the user is asking a specific question about a knowledge they expect you to have,
         you can use the retrieval tool to fetch the most relevant information.
+        If the question needs several separate lookups, call ask_chromadb_batch once
+        with all of the sub-questions instead of calling ask_chromadb repeatedly.
+        When the question points at a part of the 10-K ("in the MD&A", "Item 1A risk
+        factors", "on pages 30 to 45"), pass it as the section, first_page/last_page
+        or source argument so only that part is searched.
+        The knowledge base can hold several filings. When the question is about a
+        particular company or year, pass it as the document argument ("GOOGL 2023");
+        to compare filings, call ask_chromadb_multi once with all of them.
         
         If you are not certain about the user intent, make sure to ask clarifying questions
         before answering. Once you have the information you need, you can use the retrieval tool
@@ -0,0 +1,611 @@
+"""Registry of the filings in the knowledge base, one collection per filing.
+
+Each filing is ingested into its own collection (`python -m rag_agent.ingest
+FILE --collection googl_10k_2024 --ticker GOOGL --company Alphabet --year
+2024`). Ingest records the collection in a small JSON file next to the
+ChromaDB store (`chroma_db_chunks_registry.json`):
+
+    {"version": 1, "collections": {"googl_10k_2024": {"ticker": "GOOGL", ...}}}
+
+The tools name a filing the way a user does ("GOOGL", "Alphabet 2023",
+"msft_10k_2024"), and `resolve_document` maps that to a collection.
+Collections in the store that were never registered can still be named
+directly.
+
+`CollectionRegistry` keeps the open collections, together with their warmed
+lexical indexes, in an LRU with a cap on both the count and the estimated
+memory, so a process serving many filings only holds the ones in use.
+Existing collections can be registered without re-ingesting them:
+
+    uv run python -m rag_agent.registry register alphabet_10k_collection_chunks --ticker GOOGL --year 2024
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+REGISTRY_VERSION = 1
+# Rough in-memory cost of one posting (term, chunk) of the lexical index
+_POSTING_BYTES = 120
+
+
+class KnowledgeBaseUnavailable(RuntimeError):
+    """The ChromaDB collection could not be opened."""
+
+
+class UnknownDocument(KnowledgeBaseUnavailable):
+    """No collection matches the requested document."""
+
+
+def default_path(chroma_path: str) -> str:
+    """Where the registry of a store lives: next to its ChromaDB directory."""
+    return f"{os.path.normpath(chroma_path)}_registry.json"
+
+
+def load_entries(chroma_path: str) -> dict[str, dict[str, Any]]:
+    """Registered collections of a store: collection name -> filing details."""
+    try:
+        with open(default_path(chroma_path), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return (
+        data.get("collections", {}) if data.get("version") == REGISTRY_VERSION else {}
+    )
+
+
+def register(
+    chroma_path: str,
+    collection_name: str,
+    ticker: str | None = None,
+    company: str | None = None,
+    year: int | None = None,
+    form: str | None = None,
+    source: str | None = None,
+    revised: bool = False,
+) -> dict[str, Any]:
+    """Record (or update) the filing details of a collection.
+
+    Details not given keep their registered values; `source` is added to the
+    collection's list of source files. With `revised` (ingest wrote chunks),
+    the collection's `revision` counter is bumped, which invalidates its
+    cached fingerprint (see `CollectionRegistry.fingerprint`).
+
+    Returns:
+        The collection's registry entry
+    """
+    entries = load_entries(chroma_path)
+    entry = entries.setdefault(collection_name, {})
+    for key, value in (
+        ("ticker", ticker and ticker.upper()),
+        ("company", company),
+        ("year", year),
+        ("form", form),
+    ):
+        if value is not None:
+            entry[key] = value
+    if source and source not in entry.setdefault("sources", []):
+        entry["sources"].append(source)
+    if revised:
+        entry["revision"] = entry.get("revision", 0) + 1
+
+    path = default_path(chroma_path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": REGISTRY_VERSION, "collections": entries},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+    os.replace(tmp_path, path)
+    return entry
+
+
+def describe(name: str, entry: dict[str, Any]) -> str:
+    """How a filing is listed to the model: "GOOGL 2024 10-K (Alphabet)"."""
+    label = " ".join(
+        str(entry[key]) for key in ("ticker", "year", "form") if entry.get(key)
+    )
+    if entry.get("company"):
+        label = f"{label} ({entry['company']})" if label else entry["company"]
+    return label or name
+
+
+def _terms(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def resolve_document(document: str, entries: dict[str, dict[str, Any]]) -> str | None:
+    """The collection a user's name for a filing refers to, or None.
+
+    A collection name or ticker matches directly. Otherwise every word of
+    `document` is looked up in each collection's name, ticker, company,
+    form, year and source file names. A year in `document` must match. Of
+    several matching filings, the one matching most words wins, then the
+    latest year.
+
+    Args:
+        document: e.g. "GOOGL", "Alphabet 2023", "googl_10k_2024"
+        entries: collection name -> registry entry (empty for unregistered ones)
+    """
+    query = document.strip().lower()
+    if not query:
+        return None
+    if query in {name.lower() for name in entries}:
+        return next(name for name in entries if name.lower() == query)
+
+    words = _terms(query)
+    years = {int(word) for word in words if re.fullmatch(r"(19|20)\d\d", word)}
+    best, best_key = None, None
+    for name, entry in entries.items():
+        if (
+            years
+            and entry.get("year") not in years
+            and not any(str(year) in name for year in years)
+        ):
+            continue
+        if entry.get("ticker") and entry["ticker"].lower() in words:
+            matched = len(words)
+        else:
+            vocabulary = set(_terms(name))
+            for key in ("ticker", "company", "form", "year"):
+                vocabulary.update(_terms(str(entry.get(key) or "")))
+            for source in entry.get("sources", []):
+                vocabulary.update(_terms(os.path.splitext(source)[0]))
+            matched = sum(word in vocabulary for word in words)
+        if not matched:
+            continue
+        key = (matched, entry.get("year") or 0)
+        if best_key is None or key > best_key:
+            best, best_key = name, key
+    return best
+
+
+class CollectionHandle:
+    """An open collection and the per-collection state warmed alongside it.
+
+    Args:
+        name: Collection name
+        collection: ChromaDB collection or `FlatIndex`
+        lexical_path: Where the collection's BM25 index is saved
+        dimension: Embedding dimension, for the memory estimate
+        bytes_per_value: 4 for an in-process HNSW index, 2 for the float16 flat index
+        export_mtime: Modification time of the flat export when it was mapped
+            (None for ChromaDB, which reads its files live)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        collection: Any,
+        lexical_path: str,
+        dimension: int,
+        bytes_per_value: int,
+        export_mtime: float | None = None,
+    ):
+        self.name = name
+        self.collection = collection
+        self.lexical_path = lexical_path
+        self.export_mtime = export_mtime
+        self._vector_bytes = collection.count() * dimension * bytes_per_value
+        self._lexical: Any | None = None
+        self._lexical_mtime: float | None = None
+        self._lock = threading.Lock()
+
+    def lexical_index(self) -> Any | None:
+        """The collection's BM25 index, reloaded when ingest rewrites it, or
+        None if it was never built."""
+        from .lexical_index import LexicalIndex
+
+        try:
+            mtime = os.path.getmtime(self.lexical_path)
+        except OSError:
+            return None
+        if self._lexical is None or mtime != self._lexical_mtime:
+            with self._lock:
+                if self._lexical is None or mtime != self._lexical_mtime:
+                    self._lexical = LexicalIndex.load(self.lexical_path)
+                    self._lexical_mtime = mtime
+        return self._lexical
+
+    def nbytes(self) -> int:
+        """Estimated memory held for this collection: its vectors and, once
+        loaded, its lexical index."""
+        lexical = (
+            self._lexical.postings() * _POSTING_BYTES
+            if self._lexical is not None
+            else 0
+        )
+        return self._vector_bytes + lexical
+
+
+class CollectionRegistry:
+    """Open collections of one store, most recently used last.
+
+    `get` opens a collection on first use and keeps its handle. When more
+    than `max_open` handles are open, or their estimated memory exceeds
+    `memory_limit_mb`, the least recently used ones are closed (the one
+    just requested always stays). Collections are opened outside the
+    registry lock, so a slow open does not hold up queries to other filings.
+
+    ChromaDB keeps its own cache of loaded HNSW segments, sized by file
+    handles rather than bytes; closing a handle releases the lexical index
+    and the collection object, while the flat store releases its mapping.
+
+    Args:
+        chroma_path: ChromaDB directory (the flat exports and registry live next to it)
+        vector_store: `chroma` or `flat` (see `rag_agent.flat_index`)
+        max_open: Collections kept open
+        memory_limit_mb: Estimated memory of the open collections; 0 disables the cap
+        flat_paths: Flat export directories that differ from the default, by collection
+        flat_nprobe: IVF lists scanned per query by the flat store
+        forked: Refuse to open ChromaDB (its client does not survive a fork)
+    """
+
+    def __init__(
+        self,
+        chroma_path: str,
+        vector_store: str = "chroma",
+        max_open: int = 8,
+        memory_limit_mb: float = 2048,
+        flat_paths: dict[str, str] | None = None,
+        flat_nprobe: int = 8,
+        forked: bool = False,
+    ):
+        self.chroma_path = chroma_path
+        self.vector_store = vector_store
+        self.max_open = max(1, max_open)
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024)
+        self.flat_paths = flat_paths or {}
+        self.flat_nprobe = flat_nprobe
+        self.forked = forked
+        self._client: Any | None = None
+        self._handles: OrderedDict[str, CollectionHandle] = OrderedDict()
+        self._opening: dict[str, threading.Lock] = {}
+        self._fingerprints: dict[str, tuple] = {}
+        self._documents: tuple | None = None
+        self._lock = threading.Lock()
+        self._client_lock = threading.Lock()
+        self.hits = 0
+        self.opens = 0
+        self.evictions = 0
+        self.open_seconds = 0.0
+
+    @property
+    def chroma_opened(self) -> bool:
+        return self._client is not None
+
+    def _chroma_client(self) -> Any:
+        if self.forked:
+            raise KnowledgeBaseUnavailable(
+                "The ChromaDB collection was opened before this process was forked. "
+                "Call warm_up() in each worker after forking, not in the parent."
+            )
+        # Collections are opened concurrently; two clients on one path fail to start.
+        with self._client_lock:
+            if self._client is None:
+                import chromadb
+
+                if not os.path.isdir(self.chroma_path):
+                    raise KnowledgeBaseUnavailable(
+                        f"No ChromaDB store at {self.chroma_path}. Run notebooks/load-data.ipynb "
+                        f"first, or set RAG_CHROMA_PATH."
+                    )
+                self._client = chromadb.PersistentClient(path=self.chroma_path)
+        return self._client
+
+    def flat_path(self, name: str) -> str:
+        from .flat_index import default_path as flat_default_path
+
+        return self.flat_paths.get(name) or flat_default_path(self.chroma_path, name)
+
+    def store_names(self) -> list[str]:
+        """Collections present in the store, registered or not."""
+        if self.vector_store == "flat":
+            root = os.path.dirname(self.flat_path("_"))
+            names = (
+                [
+                    n
+                    for n in os.listdir(root)
+                    if os.path.isfile(os.path.join(root, n, "columns.json"))
+                ]
+                if os.path.isdir(root)
+                else []
+            )
+            return sorted(
+                set(names)
+                | {n for n, path in self.flat_paths.items() if os.path.isdir(path)}
+            )
+        return sorted(
+            c if isinstance(c, str) else c.name
+            for c in self._chroma_client().list_collections()
+        )
+
+    def _store_mtime(self) -> float | None:
+        path = (
+            os.path.dirname(self.flat_path("_"))
+            if self.vector_store == "flat"
+            else os.path.join(self.chroma_path, "chroma.sqlite3")
+        )
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def documents(self) -> dict[str, dict[str, Any]]:
+        """Every collection that can be queried: name -> registry entry
+        (empty for collections that were never registered). Listed again only
+        when the store or the registry file has changed."""
+        try:
+            registry_mtime: float | None = os.path.getmtime(
+                default_path(self.chroma_path)
+            )
+        except OSError:
+            registry_mtime = None
+        key = (registry_mtime, self._store_mtime())
+        cached = self._documents
+        if cached is not None and key[1] is not None and cached[0] == key:
+            return cached[1]
+        entries = load_entries(self.chroma_path)
+        documents = {name: entries.get(name, {}) for name in self.store_names()}
+        self._documents = (key, documents)
+        return documents
+
+    def resolve(self, document: str) -> str:
+        """The collection for a filing name (see `resolve_document`).
+
+        Raises:
+            UnknownDocument: Listing the filings that are available.
+        """
+        documents = self.documents()
+        name = resolve_document(document, documents)
+        if name is None:
+            available = (
+                "; ".join(
+                    f"{describe(n, e)} [{n}]" for n, e in sorted(documents.items())
+                )
+                or "none"
+            )
+            raise UnknownDocument(
+                f"No filing matches '{document}'. Available filings: {available}."
+            )
+        return name
+
+    def _open_chroma(self, name: str) -> Any:
+        from chromadb.errors import ChromaError
+
+        try:
+            # Queries pass query_embeddings, so the collection's own embedding
+            # function is not needed; chromadb >= 1.0 would otherwise instantiate
+            # the persisted one here.
+            return self._chroma_client().get_collection(
+                name=name, embedding_function=None
+            )
+        except (ValueError, ChromaError) as e:
+            # Older chromadb raises ValueError for a missing collection, newer NotFoundError.
+            raise KnowledgeBaseUnavailable(
+                f"ChromaDB collection '{name}' not found in {self.chroma_path}. Run "
+                f"notebooks/load-data.ipynb first, or set RAG_CHROMA_PATH / RAG_COLLECTION_NAME. ({e})"
+            ) from e
+
+    def _open_flat(self, name: str) -> Any:
+        """Map the flat export of a collection. The mapped files are shared
+        with other processes, so unlike a ChromaDB client it can be reopened
+        after a fork."""
+        from .flat_index import FlatIndex
+
+        path = self.flat_path(name)
+        if not os.path.exists(os.path.join(path, "columns.json")):
+            raise KnowledgeBaseUnavailable(
+                f"No flat index at {path}. Run `python -m rag_agent.flat_index export` after "
+                f"ingest, or set RAG_FLAT_INDEX_PATH."
+            )
+        try:
+            return FlatIndex(path, nprobe=self.flat_nprobe)
+        except ValueError as e:
+            raise KnowledgeBaseUnavailable(str(e)) from e
+
+    def _export_mtime(self, name: str) -> float | None:
+        """Modification time of a collection's flat export; ingest rewrites it."""
+        try:
+            return os.path.getmtime(os.path.join(self.flat_path(name), "columns.json"))
+        except OSError:
+            return None
+
+    def _open(self, name: str) -> CollectionHandle:
+        from .lexical_index import default_path as lexical_default_path
+
+        lexical_path = lexical_default_path(self.chroma_path, name)
+        if self.vector_store == "flat":
+            # Taken before mapping: an export swapped in meanwhile is picked up next time.
+            export_mtime = self._export_mtime(name)
+            collection = self._open_flat(name)
+            return CollectionHandle(
+                name,
+                collection,
+                lexical_path,
+                collection.manifest["dimension"],
+                2,
+                export_mtime,
+            )
+        collection = self._open_chroma(name)
+        sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        dimension = len(sample[0]) if sample is not None and len(sample) else 0
+        return CollectionHandle(name, collection, lexical_path, dimension, 4)
+
+    def _stale(self, handle: CollectionHandle) -> bool:
+        """Whether ingest has re-exported the flat index mapped by `handle`."""
+        return (
+            self.vector_store == "flat"
+            and handle.export_mtime != self._export_mtime(handle.name)
+        )
+
+    def get(self, name: str) -> CollectionHandle:
+        """The open handle of collection `name`, opening it if needed.
+
+        A flat index re-exported by ingest since it was mapped is reopened, so
+        vector search sees the same chunks as the reloaded lexical index.
+
+        Raises:
+            KnowledgeBaseUnavailable: If the collection cannot be opened.
+        """
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is not None and self._stale(handle):
+                del self._handles[name]
+                handle = None
+            if handle is not None:
+                self._handles.move_to_end(name)
+                self.hits += 1
+                return handle
+            opening = self._opening.setdefault(name, threading.Lock())
+        try:
+            with opening:
+                with self._lock:
+                    handle = self._handles.get(name)
+                if handle is None or self._stale(handle):
+                    start = time.perf_counter()
+                    handle = self._open(name)
+                    with self._lock:
+                        self._handles[name] = handle
+                        self.opens += 1
+                        self.open_seconds += time.perf_counter() - start
+                    store = (
+                        "Flat index"
+                        if self.vector_store == "flat"
+                        else "ChromaDB collection"
+                    )
+                    print(f"{store} '{name}' loaded successfully.")
+        finally:
+            # Threads already waiting hold a reference; later ones find the handle.
+            with self._lock:
+                if self._opening.get(name) is opening:
+                    del self._opening[name]
+        self.enforce_limits()
+        return handle
+
+    def enforce_limits(self) -> None:
+        """Close least recently used handles beyond `max_open` or the memory cap.
+        Call after warming a handle (loading its lexical index) grows it."""
+        with self._lock:
+            while len(self._handles) > 1 and (
+                len(self._handles) > self.max_open
+                or (self.memory_limit_bytes and self.nbytes() > self.memory_limit_bytes)
+            ):
+                self._handles.popitem(last=False)
+                self.evictions += 1
+
+    def nbytes(self) -> int:
+        return sum(handle.nbytes() for handle in list(self._handles.values()))
+
+    def fingerprint(self, name: str) -> str:
+        """Hash of every chunk id and chunk text hash in collection `name`.
+
+        It changes whenever ingest adds, removes or rewrites a chunk, so caches
+        keyed on it are invalidated by re-ingestion. It is recomputed only for
+        a new version of the collection: a new `revision` in the registry
+        (bumped by ingest), a rewritten flat export, or, for collections
+        ingest never revised, any write to the ChromaDB file. Computing it
+        does not load the collection's index.
+        """
+        if self.vector_store == "flat":
+            version = self._export_mtime(name)
+        elif (revision := self.documents().get(name, {}).get("revision")) is not None:
+            version = f"revision {revision}"
+        else:
+            # The file is shared by every collection of the store.
+            version = self._store_mtime()
+        cached = self._fingerprints.get(name)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
+        handle = self._handles.get(name)
+        if handle is not None and self._stale(handle):
+            # Hash the export the mtime above belongs to, not the old mapping.
+            handle = self.get(name)
+        if handle is not None:
+            collection = handle.collection
+        else:
+            collection = (
+                self._open_flat(name)
+                if self.vector_store == "flat"
+                else self._open_chroma(name)
+            )
+        stored = collection.get(include=["metadatas"])
+        if any("content_hash" not in meta for meta in stored["metadatas"]):
+            # Stores written before ingest recorded content hashes
+            stored = collection.get(include=["metadatas", "documents"])
+            hashes = [
+                hashlib.sha256(doc.encode()).hexdigest() for doc in stored["documents"]
+            ]
+        else:
+            hashes = [meta["content_hash"] for meta in stored["metadatas"]]
+        digest = hashlib.sha256()
+        for chunk_id, chunk_hash in sorted(zip(stored["ids"], hashes, strict=True)):
+            digest.update(f"{chunk_id}\0{chunk_hash}\n".encode())
+        fingerprint = digest.hexdigest()[:16]
+        self._fingerprints[name] = (version, fingerprint)
+        return fingerprint
+
+    def stats(self) -> dict[str, Any]:
+        """Open collections, LRU hits, opens, evictions and estimated memory."""
+        with self._lock:
+            return {
+                "open": list(self._handles),
+                "hits": self.hits,
+                "opens": self.opens,
+                "evictions": self.evictions,
+                "open_seconds": round(self.open_seconds, 3),
+                "estimated_mb": round(self.nbytes() / 1024 / 1024, 1),
+                "max_open": self.max_open,
+                "memory_limit_mb": round(self.memory_limit_bytes / 1024 / 1024, 1),
+            }
+
+
+def main() -> None:
+    from .config import config
+
+    parser = argparse.ArgumentParser(
+        description="List or register the filings of the RAG knowledge base."
+    )
+    parser.add_argument(
+        "--db-path", default=config.chroma_path, help="ChromaDB directory"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List the collections and their filing details")
+    add = subparsers.add_parser(
+        "register", help="Record the filing details of a collection"
+    )
+    add.add_argument("collection", help="Collection name")
+    add.add_argument("--ticker")
+    add.add_argument("--company")
+    add.add_argument("--year", type=int)
+    add.add_argument("--form", help="e.g. 10-K")
+    args = parser.parse_args()
+
+    if args.command == "register":
+        entry = register(
+            args.db_path,
+            args.collection,
+            args.ticker,
+            args.company,
+            args.year,
+            args.form,
+        )
+        print(f"{args.collection}: {describe(args.collection, entry)}")
+        return
+    registry = CollectionRegistry(args.db_path, vector_store=config.vector_store)
+    for name, entry in registry.documents().items():
+        print(f"{name}: {describe(name, entry)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class Reranker:
+    """Second retrieval stage: re-score first-stage candidates with a cross-encoder.
+
+    A cross-encoder reads the query and the chunk together, so it ranks far
+    more precisely than the bi-encoder used for the vector index, at the cost
+    of one forward pass per (query, chunk) pair. Pairs are scored in batches
+    on the CPU and their scores cached per (query, chunk id, chunk content
+    hash), so a repeated question or a chunk shared by several sub-questions
+    is scored once.
+
+    Each call has a latency budget. Batches stop once the next one would
+    overrun it, and the call then returns the candidates in first-stage order
+    (scores already computed stay cached, so the next call is cheaper).
+
+    Args:
+        model_name: sentence-transformers CrossEncoder name or path
+        batch_size: (query, chunk) pairs scored per forward pass
+        budget_ms: Scoring time allowed per call; None or 0 means no limit
+        cache_size: Scores kept in the LRU cache
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 16,
+        budget_ms: float | None = None,
+        cache_size: int = 4096,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+        self._model: Any | None = None
+        self._scores: OrderedDict[tuple[str, str, str | None], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.fallbacks = 0
+        self.pairs_scored = 0
+        self.cache_hits = 0
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    @staticmethod
+    def make_key(
+        query: str, chunk_id: str, meta: dict[str, Any] | None
+    ) -> tuple[str, str, str | None]:
+        # The content hash written by ingest changes when a chunk's text does.
+        return " ".join(query.split()), chunk_id, (meta or {}).get("content_hash")
+
+    def _cached(self, key: tuple[str, str, str | None]) -> float | None:
+        with self._lock:
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+                self.cache_hits += 1
+            return score
+
+    def _remember(self, key: tuple[str, str, str | None], score: float) -> None:
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+
+    def rerank(
+        self,
+        query_texts: list[str],
+        results: dict[str, list[list[Any]]],
+        n_results: int,
+    ) -> dict[str, list[list[Any]]]:
+        """Re-rank `collection.query`-shaped results and keep the top `n_results`.
+
+        Args:
+            query_texts: The queries `results` were retrieved for
+            results: First-stage results with `ids`, `documents` and `metadatas`
+            n_results: Chunks kept per query
+
+        Returns:
+            Results of the same shape plus `scores` (cross-encoder scores, or
+            None for a query left in first-stage order) and `reranked`, one
+            flag per query.
+        """
+        # Loading the model is a one-off (see `warm_up`), not part of the budget.
+        model = self.model
+        started = time.perf_counter()
+        self.calls += 1
+        candidates = []
+        for query, ids, metas in zip(
+            query_texts, results["ids"], results["metadatas"], strict=True
+        ):
+            candidates.append(
+                [
+                    self.make_key(query, chunk_id, meta)
+                    for chunk_id, meta in zip(ids, metas, strict=True)
+                ]
+            )
+
+        scores: dict[tuple[str, str, str | None], float] = {}
+        to_score: list[tuple[tuple[str, str, str | None], str, str]] = []
+        for query, keys, docs in zip(
+            query_texts, candidates, results["documents"], strict=True
+        ):
+            for key, doc in zip(keys, docs, strict=True):
+                if key in scores:
+                    continue
+                cached = self._cached(key)
+                if cached is not None:
+                    scores[key] = cached
+                else:
+                    to_score.append((key, query, doc))
+
+        budget = self.budget_ms / 1000.0 if self.budget_ms else None
+        last_batch = 0.0
+        for start in range(0, len(to_score), self.batch_size):
+            elapsed = time.perf_counter() - started
+            if budget is not None and elapsed + last_batch > budget:
+                break
+            batch = to_score[start : start + self.batch_size]
+            batch_started = time.perf_counter()
+            batch_scores = model.predict(
+                [(query, doc) for _, query, doc in batch], batch_size=self.batch_size
+            )
+            last_batch = time.perf_counter() - batch_started
+            for (key, _, _), score in zip(batch, batch_scores, strict=True):
+                scores[key] = float(score)
+                self._remember(key, float(score))
+            self.pairs_scored += len(batch)
+
+        reranked: dict[str, list[list[Any]]] = {
+            "ids": [],
+            "documents": [],
+            "metadatas": [],
+            "scores": [],
+            "reranked": [],
+        }
+        for keys, ids, docs, metas in zip(
+            candidates,
+            results["ids"],
+            results["documents"],
+            results["metadatas"],
+            strict=True,
+        ):
+            if all(key in scores for key in keys):
+                order = sorted(
+                    range(len(keys)), key=lambda i: scores[keys[i]], reverse=True
+                )
+                chunk_scores = [scores[keys[i]] for i in order[:n_results]]
+                done = True
+            else:
+                # Over budget: first-stage order.
+                order = list(range(len(keys)))
+                chunk_scores = [None] * min(n_results, len(keys))
+                done = False
+                self.fallbacks += 1
+            order = order[:n_results]
+            reranked["ids"].append([ids[i] for i in order])
+            reranked["documents"].append([docs[i] for i in order])
+            reranked["metadatas"].append([metas[i] for i in order])
+            reranked["scores"].append(chunk_scores)
+            reranked["reranked"].append(done)
+        return reranked
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "pairs_scored": self.pairs_scored,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self._scores),
+        }
@@ -0,0 +1,186 @@
+"""Form 10-K sections: heading detection at ingest, name resolution at query time.
+
+A 10-K is organised in numbered Items ("Item 1A. Risk Factors", "Item 7.
+Management's Discussion and Analysis ..."). `find_headings` locates the Item
+headings on a page, and ingest stores the Item a chunk falls under as its
+`section` metadata ("Item 7A") with the Item's title as `section_title`.
+Chunks before the first heading (cover page, table of contents) have no
+section.
+
+`resolve` maps what a user or the model calls a section ("Item 1A", "7a",
+"MD&A", "market risk", "Part II") to those `section` values, so retrieval
+can filter on them.
+"""
+
+import re
+from typing import Any
+
+from .lexical_index import tokenize
+
+# Item number -> (title, part), per the Form 10-K general instructions
+ITEMS: dict[str, tuple[str, str]] = {
+    "1": ("Business", "I"),
+    "1A": ("Risk Factors", "I"),
+    "1B": ("Unresolved Staff Comments", "I"),
+    "1C": ("Cybersecurity", "I"),
+    "2": ("Properties", "I"),
+    "3": ("Legal Proceedings", "I"),
+    "4": ("Mine Safety Disclosures", "I"),
+    "5": (
+        "Market for Registrant's Common Equity, Related Stockholder Matters and Issuer "
+        "Purchases of Equity Securities",
+        "II",
+    ),
+    "6": ("[Reserved]", "II"),
+    "7": (
+        "Management's Discussion and Analysis of Financial Condition and Results of Operations",
+        "II",
+    ),
+    "7A": ("Quantitative and Qualitative Disclosures About Market Risk", "II"),
+    "8": ("Financial Statements and Supplementary Data", "II"),
+    "9": (
+        "Changes in and Disagreements With Accountants on Accounting and Financial Disclosure",
+        "II",
+    ),
+    "9A": ("Controls and Procedures", "II"),
+    "9B": ("Other Information", "II"),
+    "9C": ("Disclosure Regarding Foreign Jurisdictions that Prevent Inspections", "II"),
+    "10": ("Directors, Executive Officers and Corporate Governance", "III"),
+    "11": ("Executive Compensation", "III"),
+    "12": (
+        "Security Ownership of Certain Beneficial Owners and Management and Related "
+        "Stockholder Matters",
+        "III",
+    ),
+    "13": (
+        "Certain Relationships and Related Transactions, and Director Independence",
+        "III",
+    ),
+    "14": ("Principal Accountant Fees and Services", "III"),
+    "15": ("Exhibits and Financial Statement Schedules", "IV"),
+    "16": ("Form 10-K Summary", "IV"),
+}
+
+# Common names that share no words with the official titles
+ALIASES: dict[str, str] = {
+    "md&a": "7",
+    "mda": "7",
+    "md and a": "7",
+    "results of operations": "7",
+    "notes to the financial statements": "8",
+    "notes to consolidated financial statements": "8",
+    "balance sheet": "8",
+    "income statement": "8",
+    "cash flow statement": "8",
+    "auditor": "9A",
+    "internal control": "9A",
+    "share repurchases": "5",
+    "stock performance": "5",
+}
+
+# A heading starts a line: "ITEM 7A. QUANTITATIVE ...". Cross-references
+# ("... included under Item 8 of this report") do not.
+_HEADING_RE = re.compile(
+    r"^[ \t]*ITEM\s+(\d{1,2}[A-C]?)\.[ \t]*(\S.*)?$", re.IGNORECASE | re.MULTILINE
+)
+# Table of contents entries end with a page number
+_TOC_ENTRY_RE = re.compile(r"\s\d{1,3}\s*$")
+# "Item 7A", "Items 7 and 7A", "Items 1, 1A or 2", "section 7"
+_ITEMS_RE = re.compile(
+    r"\b(?:items?|sections?)\s*(\d{1,2}[a-c]?\b(?:\s*(?:,|and|or|&)\s*\d{1,2}[a-c]?\b)*)",
+    re.IGNORECASE,
+)
+_NUMBER_RE = re.compile(r"\d{1,2}[a-c]?", re.IGNORECASE)
+_PART_RE = re.compile(r"\bpart\s+(iv|iii|ii|i)\b", re.IGNORECASE)
+# Words that say "a section" rather than which one
+_GENERIC = frozenset(
+    {"section", "sections", "item", "items", "part", "10-k", "form", "report", "annual"}
+)
+
+
+def section_name(item: str) -> str:
+    """The `section` metadata value of an Item: "Item 7A"."""
+    return f"Item {item.upper()}"
+
+
+def section_metadata(item: str | None) -> dict[str, Any]:
+    """`section` and `section_title` metadata of a chunk under `item` (none
+    outside any Item)."""
+    if item is None:
+        return {}
+    return {"section": section_name(item), "section_title": ITEMS[item][0]}
+
+
+def find_headings(page_text: str) -> list[tuple[int, str]]:
+    """Item headings on a page, as `(char_offset, item)` pairs in page order.
+
+    Table of contents pages list every Item with its page number; when most
+    headings on a page look like such entries, the page has no headings.
+    """
+    headings, toc_entries = [], 0
+    for match in _HEADING_RE.finditer(page_text):
+        item = match.group(1).upper()
+        if item not in ITEMS:
+            continue
+        headings.append((match.start(), item))
+        if _TOC_ENTRY_RE.search(match.group(0)):
+            toc_entries += 1
+    if headings and toc_entries * 2 > len(headings):
+        return []
+    return headings
+
+
+def assign(
+    chunks: list[dict[str, Any]], headings: list[tuple[int, str]], current: str | None
+) -> str | None:
+    """Add section metadata to the chunks of one page.
+
+    A chunk belongs to the last heading before its midpoint, or to `current`,
+    the section the previous page ended in.
+
+    Returns:
+        The section the page ends in.
+    """
+    for chunk in chunks:
+        meta = chunk["metadata"]
+        midpoint = (meta["char_start"] + meta["char_end"]) / 2
+        item = current
+        for offset, heading_item in headings:
+            if offset <= midpoint:
+                item = heading_item
+        meta.update(section_metadata(item))
+    return headings[-1][1] if headings else current
+
+
+def resolve(text: str) -> list[str]:
+    """`section` values matching a section reference, best guess first.
+
+    Accepts Item numbers ("Item 7A", "7a", "Items 7 and 7A"), parts ("Part
+    II"), common names ("MD&A") and words of an Item's title ("risk
+    factors", "market risk"). Returns an empty list when nothing matches.
+    """
+    items = [
+        number.upper()
+        for match in _ITEMS_RE.finditer(text)
+        for number in _NUMBER_RE.findall(match.group(1))
+    ]
+    if _NUMBER_RE.fullmatch(text.strip()):
+        items.append(text.strip().upper())
+    for match in _PART_RE.finditer(text):
+        part = match.group(1).upper()
+        items += [item for item, (_, item_part) in ITEMS.items() if item_part == part]
+
+    normalized = " ".join(text.lower().replace("’", "'").split())
+    for alias, item in ALIASES.items():
+        if re.search(rf"(?<!\w){re.escape(alias)}(?!\w)", normalized):
+            items.append(item)
+    if not items:
+        words = set(tokenize(normalized)) - _GENERIC
+        if words:
+            items = [
+                item
+                for item, (title, _) in ITEMS.items()
+                if words <= set(tokenize(title))
+            ]
+
+    return [section_name(item) for item in dict.fromkeys(items) if item in ITEMS]
@@ -1,58 +1,712 @@
-from typing import List
-import chromadb
-from chromadb.utils import embedding_functions
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
-# --- 1. Initialize the ChromaDB Client and Collection ---
-# This setup is run once when your agent starts up.
+from .config import config
+from .registry import CollectionRegistry, KnowledgeBaseUnavailable
 
-# Define paths (must match the path used in the loading script)
-DB_PATH = "./chroma_db_chunks" 
-COLLECTION_NAME = "alphabet_10k_collection_chunks"
+# --- 1. Lazily open the ChromaDB Client and Collections ---
+# Importing chromadb and loading the embedding model takes seconds, so nothing
+# happens at import time: collections are opened on the first query (or by
+# `warm_up`) and shared by every thread. Each filing lives in its own
+# collection; `rag_agent.registry` keeps the recently used ones open. Processes
+# forked after import (e.g. server workers) each open their own copy.
+# chromadb's native client does not survive a fork, so a child of a process
+# that already opened it gets an error instead of a query that hangs.
 
-# Initialize the embedding function used for both loading and querying
-# It must match the model used when the data was indexed.
-embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+_lock = threading.Lock()
+_registry: CollectionRegistry | None = None
+_embedding_function: Any | None = None
+_embedding_cache: Any | None = None
+_reranker: Any | None = None
+_executor: ThreadPoolExecutor | None = None
+_opened_before_fork = False
 
-# Initialize the persistent client and get the specific collection object
-try:
-    client = chromadb.PersistentClient(path=DB_PATH)
-    # The 'collection' variable is now available globally in this module's scope
-    collection = client.get_collection(name=COLLECTION_NAME, embedding_function=embedding_function)
-    print(f"ChromaDB collection '{COLLECTION_NAME}' loaded successfully.")
-except ValueError as e:
-    print(f"Error loading collection: {e}. Make sure you ran the PDF loader script first.")
-    # Exit or handle error if the collection isn't found
+# Session state key where the tools record the chunk ids they returned in the
+# current invocation ("temp:" state is not persisted with the session).
+RETRIEVED_CHUNKS_STATE_KEY = "temp:rag_retrieved_chunk_ids"
 
-# --- 2. Define the ADK Tool Function ---
-# This function is the "tool" the Google ADK agent will call.
-# It now correctly accesses the 'collection' variable defined above.
 
-def ask_chromadb(query_text: str) -> List[str]:
+def _reset_after_fork() -> None:
+    global _lock, _registry, _embedding_function, _embedding_cache, _opened_before_fork
+    global _reranker, _executor
+    _lock = threading.Lock()
+    _opened_before_fork = _opened_before_fork or (
+        _registry is not None and _registry.chroma_opened
+    )
+    _registry = None
+    _embedding_function = None
+    _embedding_cache = None
+    _reranker = None
+    # The parent's worker threads do not exist in the child.
+    _executor = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_registry() -> CollectionRegistry:
+    """The registry of open collections (see `rag_agent.registry`)."""
+    global _registry
+    if _registry is None:
+        with _lock:
+            if _registry is None:
+                _registry = CollectionRegistry(
+                    config.chroma_path,
+                    vector_store=config.vector_store,
+                    max_open=config.max_open_collections,
+                    memory_limit_mb=config.collection_cache_mb,
+                    flat_paths={config.collection_name: config.flat_index_path}
+                    if config.flat_index_path
+                    else None,
+                    flat_nprobe=config.flat_nprobe,
+                    forked=_opened_before_fork,
+                )
+    return _registry
+
+
+def get_collection(collection_name: str | None = None) -> Any:
+    """Return a knowledge base collection, opening it on first use.
+
+    Args:
+        collection_name: Filing collection (default: `RAG_COLLECTION_NAME`)
+
+    Raises:
+        KnowledgeBaseUnavailable: If the collection does not exist yet, or was
+            opened by the parent of this forked process.
+    """
+    # Check the collection exists before spending seconds loading the model.
+    collection = (
+        get_registry().get(collection_name or config.collection_name).collection
+    )
+    _get_embedding_function()
+    return collection
+
+
+def _get_embedding_function() -> Any:
+    """The query encoder, shared by every collection, and its cache."""
+    global _embedding_function, _embedding_cache
+    if _embedding_function is None:
+        with _lock:
+            if _embedding_function is None:
+                from .embeddings import CoalescingEncoder, load_embedding_function
+
+                if config.embedding_cache_size > 0:
+                    from .embedding_cache import EmbeddingCache
+
+                    # Backends produce slightly different vectors; keep their entries apart.
+                    cache_model_name = config.embedding_model
+                    if config.embedding_backend != "torch":
+                        cache_model_name = (
+                            f"{config.embedding_model}@{config.embedding_backend}"
+                        )
+                    _embedding_cache = EmbeddingCache(
+                        model_name=cache_model_name,
+                        max_entries=config.embedding_cache_size,
+                        path=config.embedding_cache_path,
+                    )
+                # Must match the model used when the data was indexed. Concurrent
+                # tool calls (see `rag_agent.async_tools`) share forward passes.
+                _embedding_function = CoalescingEncoder(
+                    load_embedding_function(
+                        config.embedding_backend,
+                        config.embedding_model,
+                        config.embedding_onnx_path,
+                    )
+                )
+    return _embedding_function
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Threads that query several filings concurrently (`RAG_FANOUT_WORKERS`)."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, config.fanout_workers),
+                    thread_name_prefix="rag-fanout",
+                )
+    return _executor
+
+
+def get_lexical_index(collection_name: str | None = None) -> Any | None:
+    """Return the BM25 index written by `rag_agent.ingest` next to the ChromaDB
+    store, or None if hybrid retrieval is off or the index was never built.
+    The index is reloaded when ingest rewrites it."""
+    if not config.hybrid:
+        return None
+    registry = get_registry()
+    handle = registry.get(collection_name or config.collection_name)
+    loaded = handle.nbytes()
+    index = handle.lexical_index()
+    if handle.nbytes() != loaded:
+        # The handle grew; other collections may have to make room.
+        registry.enforce_limits()
+    return index
+
+
+def get_reranker() -> Any | None:
+    """Return the cross-encoder re-ranker, or None if `RAG_RERANK` is off."""
+    global _reranker
+    if not config.rerank:
+        return None
+    if _reranker is None:
+        with _lock:
+            if _reranker is None:
+                from .rerank import Reranker
+
+                _reranker = Reranker(
+                    model_name=config.rerank_model,
+                    batch_size=config.rerank_batch_size,
+                    budget_ms=config.rerank_budget_ms,
+                )
+    return _reranker
+
+
+def collection_fingerprint(collection_name: str | None = None) -> str:
+    """Hash of every chunk id and chunk text hash in a collection.
+
+    It changes whenever ingest adds, removes or rewrites a chunk, so caches
+    keyed on it are invalidated by re-ingestion. It is recomputed only when
+    the ChromaDB file (or the flat export) has been written to since the
+    last call.
+    """
+    return get_registry().fingerprint(collection_name or config.collection_name)
+
+
+def knowledge_base_fingerprint() -> str:
+    """Fingerprint of every filing collection; the one collection's own
+    fingerprint when the knowledge base has a single filing."""
+    names = sorted(get_registry().documents()) or [config.collection_name]
+    if len(names) == 1:
+        return collection_fingerprint(names[0])
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(f"{name}\0{collection_fingerprint(name)}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def embed_queries(texts: list[str]) -> list[Any]:
+    """Embed query strings, reusing cached vectors; misses are encoded in one batch."""
+    embedding_function = _get_embedding_function()
+    if _embedding_cache is None:
+        return list(embedding_function(texts))
+    return _embedding_cache.embed(texts, embedding_function)
+
+
+def embedding_cache_stats() -> dict[str, Any] | None:
+    """Hit/miss counters of the query embedding cache, or None if it is off or not open yet."""
+    return _embedding_cache.stats() if _embedding_cache is not None else None
+
+
+def collection_cache_stats() -> dict[str, Any]:
+    """Open collections, hits, opens and evictions of the collection registry."""
+    return get_registry().stats()
+
+
+def warm_up(collection_names: list[str] | None = None) -> None:
+    """Open collections and run one query so the embedding model and indexes
+    are loaded before the first user request. Call from server startup.
+
+    Args:
+        collection_names: Collections to load (default: `RAG_COLLECTION_NAME`)
+    """
+    reranker = get_reranker()
+    if reranker is not None:
+        reranker.model.predict([("warm up", "warm up")])
+    for name in collection_names or [config.collection_name]:
+        get_lexical_index(name)
+        get_collection(name).query(
+            query_embeddings=_get_embedding_function()(["warm up"]),
+            n_results=1,
+            include=[],
+        )
+
+
+def resolve_document(document: str | None) -> str:
+    """The collection of the filing a tool call names, e.g. "GOOGL 2023"
+    (default: `RAG_COLLECTION_NAME`).
+
+    Raises:
+        KnowledgeBaseUnavailable: If no filing matches; the message lists them.
+    """
+    if not document or not document.strip():
+        return config.collection_name
+    return get_registry().resolve(document)
+
+
+def build_where(
+    section: str | None = None,
+    first_page: int | None = None,
+    last_page: int | None = None,
+    source: str | None = None,
+) -> dict[str, Any] | None:
+    """Chroma `where` filter for the tools' filter arguments, or None.
+
+    `section` is resolved to 10-K Items by `rag_agent.sections.resolve`
+    ("MD&A" filters on Item 7); a section that names no Item is ignored.
+    Pages are the `page_number` values shown in the tool output, inclusive.
+    """
+    clauses: list[dict[str, Any]] = []
+    if section:
+        from .sections import resolve
+
+        sections = resolve(section)
+        if len(sections) == 1:
+            clauses.append({"section": sections[0]})
+        elif sections:
+            clauses.append({"section": {"$in": sections}})
+    if first_page is not None:
+        clauses.append({"page_number": {"$gte": int(first_page)}})
+    if last_page is not None:
+        clauses.append({"page_number": {"$lte": int(last_page)}})
+    if source:
+        clauses.append({"source": source})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def retrieve(
+    query_texts: list[str],
+    n_results: int,
+    where: dict[str, Any] | None = None,
+    collection_name: str | None = None,
+    query_embeddings: list[Any] | None = None,
+) -> dict[str, list[list[Any]]]:
+    """Top `n_results` chunks for each query, in `collection.query` result shape.
+
+    A `where` filter (see `build_where`) is applied by the index before the
+    search, in both the vector and the lexical retriever. With `RAG_RERANK`
+    on, `rerank_candidates` chunks are fetched by the first stage below and
+    re-scored by the cross-encoder, which adds `scores` and `reranked` to the
+    result (see `Reranker.rerank`).
+
+    Args:
+        collection_name: Filing collection to search (default: `RAG_COLLECTION_NAME`)
+        query_embeddings: Vectors of `query_texts` when already computed, e.g.
+            to search several filings with one encode
+
+    Raises:
+        KnowledgeBaseUnavailable: If the collection cannot be opened.
+    """
+    reranker = get_reranker()
+    if reranker is None:
+        return first_stage(
+            query_texts, n_results, where, collection_name, query_embeddings
+        )
+    candidates = first_stage(
+        query_texts,
+        max(n_results, config.rerank_candidates),
+        where,
+        collection_name,
+        query_embeddings,
+    )
+    return reranker.rerank(query_texts, candidates, n_results)
+
+
+def first_stage(
+    query_texts: list[str],
+    n_results: int,
+    where: dict[str, Any] | None = None,
+    collection_name: str | None = None,
+    query_embeddings: list[Any] | None = None,
+) -> dict[str, list[list[Any]]]:
+    """Top `n_results` chunks for each query before re-ranking.
+
+    With `RAG_HYBRID` on and a lexical index available, `hybrid_candidates`
+    chunks are taken from both the vector index and BM25 and fused with
+    reciprocal rank fusion, so chunks matching exact terms ("Item 7", line
+    items, figures) are found even when their embedding is not the closest.
+    Otherwise this is a plain vector query.
+    """
+    collection = get_collection(collection_name)
+    lexical = get_lexical_index(collection_name)
+    if query_embeddings is None:
+        query_embeddings = embed_queries(query_texts)
+    if lexical is None:
+        return collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=["documents", "metadatas"],
+        )
+
+    from .lexical_index import reciprocal_rank_fusion
+
+    candidates = max(n_results, config.hybrid_candidates)
+    dense = collection.query(
+        query_embeddings=query_embeddings,
+        n_results=candidates,
+        where=where,
+        include=["documents", "metadatas"],
+    )
+    # BM25 scores only the chunks the filter lets through.
+    allowed = set(collection.get(where=where, include=[])["ids"]) if where else None
+    chunks: dict[str, Any] = {}
+    for ids, docs, metas in zip(
+        dense["ids"], dense["documents"], dense["metadatas"], strict=True
+    ):
+        chunks.update(
+            (chunk_id, (doc, meta))
+            for chunk_id, doc, meta in zip(ids, docs, metas, strict=True)
+        )
+
+    fused_ids = []
+    for query_text, dense_ids in zip(query_texts, dense["ids"], strict=True):
+        lexical_ids = [
+            chunk_id for chunk_id, _ in lexical.search(query_text, candidates, allowed)
+        ]
+        fused = reciprocal_rank_fusion([dense_ids, lexical_ids], k=config.rrf_k)
+        fused_ids.append([chunk_id for chunk_id, _ in fused[:n_results]])
+
+    # Chunks only BM25 found still need their text and metadata.
+    missing = sorted({i for ids in fused_ids for i in ids if i not in chunks})
+    if missing:
+        found = collection.get(ids=missing, include=["documents", "metadatas"])
+        chunks.update(
+            (chunk_id, (doc, meta))
+            for chunk_id, doc, meta in zip(
+                found["ids"], found["documents"], found["metadatas"], strict=True
+            )
+        )
+    # Ids deleted from Chroma since the index was saved are dropped.
+    fused_ids = [[i for i in ids if i in chunks] for ids in fused_ids]
+    return {
+        "ids": fused_ids,
+        "documents": [[chunks[i][0] for i in ids] for ids in fused_ids],
+        "metadatas": [[chunks[i][1] for i in ids] for ids in fused_ids],
+    }
+
+
+# --- 2. Define the ADK Tool Functions ---
+# These functions are the "tools" the Google ADK agent will call. ADK passes
+# `tool_context` itself and leaves it out of the schema the model sees.
+
+
+def _record_retrieval(tool_context: Any | None, chunk_ids: list[str]) -> None:
+    """Note returned chunk ids in the invocation state (read by the answer cache)."""
+    if tool_context is None:
+        return
+    seen = list(tool_context.state.get(RETRIEVED_CHUNKS_STATE_KEY) or [])
+    tool_context.state[RETRIEVED_CHUNKS_STATE_KEY] = seen + [
+        i for i in chunk_ids if i not in seen
+    ]
+
+
+# Returned first when the filters matched nothing and the search ran without them
+NO_FILTER_MATCH = (
+    "Note: no chunk matched the section/page/source filters, so these results "
+    "come from the whole knowledge base."
+)
+
+
+def _retrieve_filtered(
+    query_texts: list[str],
+    n_results: int,
+    where: dict[str, Any] | None,
+    collection_name: str | None = None,
+    query_embeddings: list[Any] | None = None,
+) -> tuple[dict[str, list[list[Any]]], str | None]:
+    """`retrieve` with the tools' filters, falling back to an unfiltered search
+    (and a note saying so) when they match no chunk, e.g. a store ingested
+    before sections were recorded."""
+    results = retrieve(query_texts, n_results, where, collection_name, query_embeddings)
+    if where is None or any(results["ids"]):
+        return results, None
+    return retrieve(
+        query_texts, n_results, None, collection_name, query_embeddings
+    ), NO_FILTER_MATCH
+
+
+def format_chunk(doc: str, meta: dict[str, Any], score: float | None = None) -> str:
+    """Format one chunk for the LLM, with the source metadata it must cite,
+    its 10-K section if known and, when re-ranking is on, its relevance score."""
+    header = f"Source: {meta['source']} (Page Number: {meta['page_number']})"
+    if meta.get("section"):
+        header += f"\nSection: {meta['section']}"
+        if meta.get("section_title"):
+            header += f". {meta['section_title']}"
+    if score is not None:
+        header += f"\nRelevance: {score:.3f}"
+    return f"{header}\nContent: {doc}\n---"
+
+
+def build_context(
+    documents: list[str],
+    metadatas: list[dict[str, Any]],
+    scores: list[float | None] | None = None,
+) -> list[str]:
+    """Format retrieved chunks for the LLM, most relevant first.
+
+    With `RAG_CONTEXT_PACKING` on, neighbouring chunks of a page are merged
+    without their overlap and the result is cut to `RAG_CONTEXT_TOKENS`
+    (see `rag_agent.context`).
+    """
+    scores = scores or [None] * len(documents)
+    if not config.context_packing:
+        return [
+            format_chunk(doc, meta, score)
+            for doc, meta, score in zip(documents, metadatas, scores, strict=True)
+        ]
+    from .context import merge_chunks, pack
+
+    return pack(
+        merge_chunks(documents, metadatas, scores),
+        config.context_tokens,
+        lambda span: format_chunk(span.text, span.metadata, span.score),
+    )
+
+
+def ask_chromadb(
+    query_text: str,
+    section: str | None = None,
+    first_page: int | None = None,
+    last_page: int | None = None,
+    source: str | None = None,
+    document: str | None = None,
+    tool_context: Any | None = None,
+) -> list[str]:
     """
     Retrieves relevant document chunks from the ChromaDB knowledge corpus
     based on a user query. This tool should be used when the user asks
-    specific questions about the Alphabet Form 10-K document knowledge base.
+    specific questions about the Form 10-K filings in the knowledge base.
+    When the question names a filing or a part of the document, pass it as
+    a filter so only that part is searched.
 
     Args:
         query_text: The question or query to search for in the knowledge base.
+        section: Optional 10-K section to search, e.g. "Item 1A", "Item 7A",
+            "MD&A", "risk factors" or "Part II".
+        first_page: Optional first page to search (a Page Number as shown in results).
+        last_page: Optional last page to search, inclusive.
+        source: Optional file name to search, e.g. "alphabet-form-10-K-2024.pdf".
+        document: Optional filing to search, by ticker, company and/or year,
+            e.g. "GOOGL", "Alphabet 2023". Defaults to the main filing.
 
     Returns:
-        A list of strings, where each string is a relevant document chunk's content
-        including source metadata.
+        A list of strings, where each string is the content of one or more
+        neighbouring relevant chunks of a page, including source metadata (and
+        a relevance score when re-ranking is on), most relevant first.
     """
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=3, # Retrieve top 3 relevant results
-        include=["documents", "metadatas"]
+    context, chunk_ids = _ask_chromadb(
+        query_text, section, first_page, last_page, source, document
     )
-    
+    _record_retrieval(tool_context, chunk_ids)
+    return context
+
+
+def _ask_chromadb(
+    query_text: str,
+    section: str | None = None,
+    first_page: int | None = None,
+    last_page: int | None = None,
+    source: str | None = None,
+    document: str | None = None,
+) -> tuple[list[str], list[str]]:
+    """`ask_chromadb`'s result and the chunk ids it returned, without touching
+    the invocation state (`rag_agent.async_tools` records them on the event loop)."""
+    where = build_where(section, first_page, last_page, source)
+    try:
+        results, note = _retrieve_filtered(
+            [query_text], config.n_results, where, resolve_document(document)
+        )
+    except KnowledgeBaseUnavailable as e:
+        return [f"Knowledge base unavailable: {e}"], []
+
     # Format results for the LLM to read easily (including citation info)
-    formatted_results = []
-    for doc, meta in zip(results['documents'][0], results['metadatas'][0]):
-        formatted_results.append(
-            f"Source: {meta['source']} (Page Number: {meta['page_number']})\nContent: {doc}\n---"
+    scores = results.get("scores")
+    context = build_context(
+        results["documents"][0], results["metadatas"][0], scores[0] if scores else None
+    )
+    return ([note] + context if note else context), results["ids"][0]
+
+
+def ask_chromadb_batch(
+    queries: list[str],
+    k: int = 3,
+    section: str | None = None,
+    first_page: int | None = None,
+    last_page: int | None = None,
+    source: str | None = None,
+    document: str | None = None,
+    tool_context: Any | None = None,
+) -> dict[str, list[str]]:
+    """
+    Retrieves relevant document chunks for several questions at once from the
+    ChromaDB knowledge corpus. Use this instead of repeated ask_chromadb calls
+    when a question about a Form 10-K filing breaks down into several
+    sub-questions. The optional filters apply to every query.
+
+    Args:
+        queries: The questions or queries to search for in the knowledge base.
+        k: Number of chunks to return per query (default: 3).
+        section: Optional 10-K section to search, e.g. "Item 1A", "Item 7A",
+            "MD&A", "risk factors" or "Part II".
+        first_page: Optional first page to search (a Page Number as shown in results).
+        last_page: Optional last page to search, inclusive.
+        source: Optional file name to search, e.g. "alphabet-form-10-K-2024.pdf".
+        document: Optional filing to search, by ticker, company and/or year,
+            e.g. "GOOGL", "Alphabet 2023". Defaults to the main filing.
+
+    Returns:
+        A mapping from each query to a list of strings, each the content of one
+        or more neighbouring relevant chunks including source metadata. A chunk
+        returned for an earlier query is not repeated under a later one.
+    """
+    grouped, chunk_ids = _ask_chromadb_batch(
+        queries, k, section, first_page, last_page, source, document
+    )
+    _record_retrieval(tool_context, chunk_ids)
+    return grouped
+
+
+def _ask_chromadb_batch(
+    queries: list[str],
+    k: int = 3,
+    section: str | None = None,
+    first_page: int | None = None,
+    last_page: int | None = None,
+    source: str | None = None,
+    document: str | None = None,
+) -> tuple[dict[str, list[str]], list[str]]:
+    """`ask_chromadb_batch`'s result and the chunk ids it returned."""
+    queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+    if not queries:
+        return {}, []
+    k = max(1, k)
+    # One batched encode and one multi-query probe. Over-fetch so each query
+    # still has k chunks after dropping those already used by earlier queries.
+    where = build_where(section, first_page, last_page, source)
+    try:
+        results, note = _retrieve_filtered(
+            queries, k * len(queries), where, resolve_document(document)
         )
+    except KnowledgeBaseUnavailable as e:
+        return {query: [f"Knowledge base unavailable: {e}"] for query in queries}, []
+
+    seen_ids = set()
+    grouped: dict[str, list[str]] = {}
+    scores = results.get("scores") or [[None] * len(ids) for ids in results["ids"]]
+    for query, ids, docs, metas, query_scores in zip(
+        queries,
+        results["ids"],
+        results["documents"],
+        results["metadatas"],
+        scores,
+        strict=True,
+    ):
+        kept = []
+        for chunk_id, doc, meta, score in zip(
+            ids, docs, metas, query_scores, strict=True
+        ):
+            if chunk_id in seen_ids:
+                continue
+            seen_ids.add(chunk_id)
+            kept.append((doc, meta, score))
+            if len(kept) == k:
+                break
+        grouped[query] = (
+            build_context(*map(list, zip(*kept, strict=True))) if kept else []
+        )
+        if note:
+            grouped[query].insert(0, note)
+    return grouped, sorted(seen_ids)
+
+
+def ask_chromadb_multi(
+    query_text: str,
+    documents: list[str],
+    section: str | None = None,
+    first_page: int | None = None,
+    last_page: int | None = None,
+    tool_context: Any | None = None,
+) -> dict[str, list[str]]:
+    """
+    Retrieves relevant document chunks for one question from several Form
+    10-K filings at once. Use this to compare filings, e.g. two companies or
+    two years of the same company, instead of one ask_chromadb call per
+    filing. The optional filters apply to every filing.
+
+    Args:
+        query_text: The question or query to search for in each filing.
+        documents: The filings to search, by ticker, company and/or year,
+            e.g. ["GOOGL 2024", "GOOGL 2023"] or ["Alphabet", "Microsoft"].
+        section: Optional 10-K section to search, e.g. "Item 1A", "Item 7A",
+            "MD&A", "risk factors" or "Part II".
+        first_page: Optional first page to search (a Page Number as shown in results).
+        last_page: Optional last page to search, inclusive.
+
+    Returns:
+        A mapping from each requested filing to a list of strings, each the
+        content of one or more neighbouring relevant chunks of that filing
+        including source metadata, most relevant first.
+    """
+    grouped, chunk_ids = _ask_chromadb_multi(
+        query_text, documents, section, first_page, last_page
+    )
+    _record_retrieval(tool_context, chunk_ids)
+    return grouped
 
-    # Return a list of strings for the LLM to use as context
-    return formatted_results
 
+def _ask_chromadb_multi(
+    query_text: str,
+    documents: list[str],
+    section: str | None = None,
+    first_page: int | None = None,
+    last_page: int | None = None,
+) -> tuple[dict[str, list[str]], list[str]]:
+    """`ask_chromadb_multi`'s result and the chunk ids it returned."""
+    documents = list(dict.fromkeys(d.strip() for d in documents if d and d.strip()))
+    if not documents:
+        return {}, []
+    grouped: dict[str, list[str]] = {}
+    names: dict[str, str] = {}
+    for document in documents:
+        try:
+            names[document] = resolve_document(document)
+        except KnowledgeBaseUnavailable as e:
+            grouped[document] = [f"Knowledge base unavailable: {e}"]
+    where = build_where(section, first_page, last_page)
+    try:
+        # One encode for every filing; the filings are then searched concurrently.
+        query_embeddings = embed_queries([query_text])
+    except KnowledgeBaseUnavailable as e:
+        return {
+            document: [f"Knowledge base unavailable: {e}"] for document in documents
+        }, []
+    executor = get_executor()
+    futures = {
+        name: executor.submit(
+            _retrieve_filtered,
+            [query_text],
+            config.n_results,
+            where,
+            name,
+            query_embeddings,
+        )
+        for name in dict.fromkeys(names.values())
+    }
+
+    retrieved: list[str] = []
+    for document in documents:
+        if document not in names:
+            continue
+        try:
+            results, note = futures[names[document]].result()
+        except KnowledgeBaseUnavailable as e:
+            grouped[document] = [f"Knowledge base unavailable: {e}"]
+            continue
+        retrieved.extend(results["ids"][0])
+        scores = results.get("scores")
+        context = build_context(
+            results["documents"][0],
+            results["metadatas"][0],
+            scores[0] if scores else None,
+        )
+        grouped[document] = [note] + context if note else context
+    return {document: grouped[document] for document in documents}, retrieved
@@ -1,3 +1,5 @@
+import os
+from pathlib import Path
 
 from google.adk import Agent
 from google.adk.tools import google_search
@@ -14,6 +16,9 @@ MODEL=LiteLlm(model="openai/gpt-oss:20b",
             api_base="http://localhost:11434/v1", 
             api_key="my_api_key")
 
+# Shared SearXNG MCP server, run with the arXiv/Scholar engine profile
+SEARXNG_SERVER = Path(__file__).resolve().parents[4] / "searxng_search" / "searxng_mcp" / "server.py"
+
 
 
 academic_websearch_agent = Agent(
@@ -26,7 +31,11 @@ academic_websearch_agent = Agent(
             connection_params=StdioConnectionParams(
                 server_params=StdioServerParameters(
                     command="uv",
-                    args=["run", "searxng_mcp/server.py"],
+                    args=["run", str(SEARXNG_SERVER)],
+                    env={
+                        **{k: v for k, v in os.environ.items() if k.startswith("SEARXNG_")},
+                        "SEARXNG_PROFILE": "academic",
+                    },
                 ),
             ),
         )
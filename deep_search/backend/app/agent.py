@@ -1,8 +1,11 @@
 
 import datetime
 import logging
+import os
 import re
+import sys
 from collections.abc import AsyncGenerator
+from pathlib import Path
 from typing import Literal
 
 from google.adk.agents import BaseAgent, LlmAgent, LoopAgent, SequentialAgent
@@ -12,7 +15,7 @@ from google.adk.apps.app import App
 from google.adk.events import Event, EventActions
 from google.adk.planners import BuiltInPlanner
 from google.adk.tools import MCPToolset
-from google.adk.tools.mcp_tool import StdioConnectionParams
+from google.adk.tools.mcp_tool import StdioConnectionParams, StreamableHTTPConnectionParams
 from mcp import StdioServerParameters
 from google.adk.tools.agent_tool import AgentTool
 from google.genai import types as genai_types
@@ -27,6 +30,44 @@ from .trace import instrument_adk_with_phoenix
 # Run Phoenix UI: phoenix serve
 _ = instrument_adk_with_phoenix()
 
+# Shared SearXNG MCP server (searxng_search/searxng_mcp); the prompts refer to its
+# search tool as `web_search_tool`.
+SEARXNG_SERVER_PARAMS = StdioServerParameters(
+    command="uv",
+    args=["run", str(Path(__file__).resolve().parents[3] / "searxng_search" / "searxng_mcp" / "server.py")],
+    env={
+        **{k: v for k, v in os.environ.items() if k.startswith("SEARXNG_")},
+        "SEARXNG_PROFILE": os.environ.get("SEARXNG_PROFILE", "general"),
+        "SEARXNG_SEARCH_TOOL_NAME": "web_search_tool",
+    },
+)
+
+# One toolset, and so one server process, shared by every agent that searches.
+# Set SEARXNG_MCP_URL (e.g. http://127.0.0.1:8000/mcp) to use an already running
+# `python -m searxng_mcp --transport streamable-http --tool-name web_search_tool`
+# server instead of starting one over stdio.
+searxng_toolset = MCPToolset(
+    connection_params=StreamableHTTPConnectionParams(url=os.environ["SEARXNG_MCP_URL"])
+    if os.environ.get("SEARXNG_MCP_URL")
+    else StdioConnectionParams(server_params=SEARXNG_SERVER_PARAMS),
+)
+
+# With SEARXNG_MCP_POOL_SIZE set, servers are started and warmed when this module
+# loads, and each searching agent gets a toolset on the next pooled server.
+searxng_pool = None
+if int(os.environ.get("SEARXNG_MCP_POOL_SIZE", 0)) > 0:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "searxng_search"))
+    from searxng_mcp.pool import ServerPool
+
+    searxng_pool = ServerPool.from_env(env=SEARXNG_SERVER_PARAMS.env).start()
+
+
+def searxng_tools() -> list:
+    if searxng_pool is None:
+        return [searxng_toolset]
+    return [MCPToolset(connection_params=searxng_pool.connection_params())]
+
+
 # --- Custom Agent for Loop Control ---
 class EscalationChecker(BaseAgent):
     """Checks research evaluation and escalates to stop the loop if grade is 'pass'."""
@@ -57,16 +98,7 @@ plan_generator = LlmAgent(
     name="plan_generator",
     description="Generates or refine the existing 5 line action-oriented research plan, using minimal search only for topic clarification.",
     instruction=plan_generator_instruction(),
-    tools=[
-        MCPToolset(
-            connection_params=StdioConnectionParams(
-                server_params=StdioServerParameters(
-                    command="uv",
-                    args=["run", "searxng_mcp/server.py"],
-                ),
-            ),
-        )
-    ],
+    tools=searxng_tools(),
 )
 
 
@@ -87,16 +119,7 @@ section_researcher = LlmAgent(
         thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
     ),
     instruction=section_researcher_instruction(),
-    tools=[
-        MCPToolset(
-            connection_params=StdioConnectionParams(
-                server_params=StdioServerParameters(
-                    command="uv",
-                    args=["run", "searxng_mcp/server.py"],
-                ),
-            ),
-        )
-    ],
+    tools=searxng_tools(),
     output_key="section_research_findings",
     after_agent_callback=collect_research_sources_callback,
 )
@@ -120,16 +143,7 @@ enhanced_search_executor = LlmAgent(
         thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
     ),
     instruction=enhanced_search_executor_instruction(),
-    tools=[
-        MCPToolset(
-            connection_params=StdioConnectionParams(
-                server_params=StdioServerParameters(
-                    command="uv",
-                    args=["run", "searxng_mcp/server.py"],
-                ),
-            ),
-        )
-    ],
+    tools=searxng_tools(),
     output_key="section_research_findings",
     after_agent_callback=collect_research_sources_callback,
 )
@@ -81,7 +81,7 @@ def section_researcher_instruction() -> str:
     *   **Execution Directive:** You **MUST** systematically process every goal prefixed with `[RESEARCH]` before proceeding to Phase 2.
     *   For each `[RESEARCH]` goal:
         *   **Query Generation:** Formulate a comprehensive set of 4-5 targeted search queries. These queries must be expertly designed to broadly cover the specific intent of the `[RESEARCH]` goal from multiple angles.
-        *   **Execution:** Utilize the `web_search_tool` tool to execute **all** generated queries for the current `[RESEARCH]` goal.
+        *   **Execution:** Pass **all** generated queries for the current `[RESEARCH]` goal as one list to a single `search_many` call. Use the `web_search_tool` tool only for a one-off lookup outside that list.
         *   **Summarization:** Synthesize the search results into a detailed, coherent summary that directly addresses the objective of the `[RESEARCH]` goal.
         *   **Internal Storage:** Store this summary, clearly tagged or indexed by its corresponding `[RESEARCH]` goal, for later and exclusive use in Phase 2. You **MUST NOT** lose or discard any generated summaries.
 
@@ -132,7 +132,7 @@ def enhanced_search_executor_instruction() -> str:
     You have been activated because the previous research was graded as 'fail'.
 
     1.  Review the 'research_evaluation' state key to understand the feedback and required fixes.
-    2.  Execute EVERY query listed in 'follow_up_queries' using the 'web_search_tool' tool.
+    2.  Execute EVERY query listed in 'follow_up_queries' by passing the whole list to a single 'search_many' call. Use the 'web_search_tool' tool only for a one-off lookup outside that list.
     3.  Synthesize the new findings and COMBINE them with the existing information in 'section_research_findings'.
     4.  Your output MUST be the new, complete, and improved set of research findings.
     """
@@ -0,0 +1,21 @@
+"""SearXNG MCP server and connector shared by every search agent in this repo."""
+
+from .cache import SearchCache
+from .config import ConnectorConfig
+from .connector import SearXNGConnector
+from .pool import PooledServer, ServerPool
+from .profiles import PROFILES, SearchProfile, get_profile, profile_from_env
+from .resilience import BackendUnavailable
+
+__all__ = [
+    "BackendUnavailable",
+    "ConnectorConfig",
+    "PROFILES",
+    "PooledServer",
+    "SearXNGConnector",
+    "SearchCache",
+    "SearchProfile",
+    "ServerPool",
+    "get_profile",
+    "profile_from_env",
+]
@@ -0,0 +1,43 @@
+"""Run the MCP server: `python -m searxng_mcp [--profile academic] [--transport streamable-http]`."""
+
+import argparse
+import os
+
+from .profiles import PROFILES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="searxng_mcp", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(PROFILES),
+        help="Engine/category profile (default: $SEARXNG_PROFILE or general)",
+    )
+    parser.add_argument("--tool-name", help="Name to register the search tool under")
+    parser.add_argument(
+        "--transport",
+        choices=("stdio", "streamable-http", "sse"),
+        help="MCP transport (default: $SEARXNG_MCP_TRANSPORT or stdio)",
+    )
+    parser.add_argument(
+        "--host", help="Interface for HTTP transports (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, help="Port for HTTP transports (default: 8000)"
+    )
+    args = parser.parse_args()
+    # The server picks its profile up from the environment at import time.
+    if args.profile:
+        os.environ["SEARXNG_PROFILE"] = args.profile
+    if args.tool_name:
+        os.environ["SEARXNG_SEARCH_TOOL_NAME"] = args.tool_name
+
+    from .server import main as run_server
+
+    run_server(transport=args.transport, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-query latency: a fresh httpx client per search vs the pooled connector.
+
+Run from the `searxng_search` directory:
+
+    uv run python searxng_mcp/benchmarks/bench_connection_pool.py --queries 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from searxng_mcp.connector import SearXNGConnector  # noqa: E402
+from stub_searxng import StubSearXNG  # noqa: E402
+
+
+async def per_query_client(base_url: str, query: str) -> None:
+    """The previous behaviour: open and tear down a client for every search."""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(
+            f"{base_url}/search", params={"q": query, "format": "json"}
+        )
+        response.raise_for_status()
+        response.json()
+
+
+async def measure(label: str, call, queries: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call(f"benchmark query {i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(queries)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<18} mean={statistics.mean(latencies):7.2f}ms "
+        f"p50={statistics.median(latencies):7.2f}ms p95={p95:7.2f}ms "
+        f"throughput={queries / elapsed:8.1f} q/s"
+    )
+    return latencies
+
+
+async def run(queries: int, concurrency: int, latency: float) -> None:
+    with StubSearXNG(latency=latency) as stub:
+        print(
+            f"stub SearXNG at {stub.url}, {queries} queries, concurrency={concurrency}"
+        )
+        await measure(
+            "per-query client",
+            lambda q: per_query_client(stub.url, q),
+            queries,
+            concurrency,
+        )
+        async with SearXNGConnector(base_url=stub.url) as connector:
+            await measure("pooled connector", connector.search, queries, concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Stub server delay in seconds"
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.queries, args.concurrency, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Bytes and tokens sent to the LLM per search: raw SearXNG results vs projected vs compact.
+
+Measures recorded SearXNG JSON responses (one `*.json` file per response).
+Record some from a live instance first, then run the comparison:
+
+    uv run python searxng_mcp/benchmarks/bench_payload_size.py record \\
+        --base-url http://localhost:32768 --out searxng_mcp/benchmarks/recorded \\
+        "python asyncio tutorial" "alphabet 10-k capital expenditures"
+    uv run python searxng_mcp/benchmarks/bench_payload_size.py compare \\
+        --responses searxng_mcp/benchmarks/recorded
+
+Without `--responses`, `compare` falls back to synthetic payloads from the
+stub server. Token counts use tiktoken's `cl100k_base` encoding when it is
+installed and a 4 characters/token estimate otherwise.
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from searxng_mcp.projection import ResultProjection, estimate_tokens, render_compact  # noqa: E402
+from searxng_mcp.urls import dedupe_results  # noqa: E402
+from stub_searxng import fake_results  # noqa: E402
+
+
+def token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        return estimate_tokens
+
+
+def record(base_url: str, out_dir: Path, queries: list[str]) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        for query in queries:
+            response = client.get("/search", params={"q": query, "format": "json"})
+            response.raise_for_status()
+            name = re.sub(r"[^a-z0-9]+", "_", query.lower()).strip("_") or "query"
+            path = out_dir / f"{name}.json"
+            path.write_text(response.text)
+            print(f"recorded {query!r} -> {path}")
+
+
+def load_responses(directory: Path | None) -> list[dict[str, Any]]:
+    if directory is None:
+        queries = [
+            "python asyncio tutorial",
+            "alphabet 10-k capital expenditures",
+            "transformer attention",
+        ]
+        return [fake_results(query) for query in queries]
+    return [json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))]
+
+
+def compare(directory: Path | None, max_results: int, snippet_chars: int) -> None:
+    count_tokens = token_counter()
+    projection = ResultProjection(max_snippet_chars=snippet_chars)
+    rows: dict[str, list[tuple]] = {"raw": [], "projected": [], "compact": []}
+
+    for data in load_responses(directory):
+        query = data.get("query", "")
+        raw_results = data.get("results", [])[:max_results]
+        # The tool output before projection
+        raw = json.dumps(
+            {
+                "query": query,
+                "number_of_results": data.get("number_of_results"),
+                "results": raw_results,
+                "suggestions": data.get("suggestions", []),
+                "infoboxes": data.get("infoboxes", []),
+            },
+            indent=2,
+        )
+        slim_results = projection.apply(
+            dedupe_results(data.get("results", []))[:max_results]
+        )
+        projected = json.dumps(
+            {
+                "query": query,
+                "number_of_results": len(slim_results),
+                "results": slim_results,
+            },
+            indent=2,
+        )
+        compact = render_compact(query, slim_results)
+        for label, text in (
+            ("raw", raw),
+            ("projected", projected),
+            ("compact", compact),
+        ):
+            rows[label].append((len(text.encode()), count_tokens(text)))
+
+    print(
+        f"{len(rows['raw'])} responses, max_results={max_results}, snippet_chars={snippet_chars}"
+    )
+    raw_bytes = statistics.mean(b for b, _ in rows["raw"])
+    raw_tokens = statistics.mean(t for _, t in rows["raw"])
+    for label, values in rows.items():
+        mean_bytes = statistics.mean(b for b, _ in values)
+        mean_tokens = statistics.mean(t for _, t in values)
+        print(
+            f"{label:<10} bytes/search={mean_bytes:9.0f} ({mean_bytes / raw_bytes:6.1%})  "
+            f"tokens/search={mean_tokens:8.0f} ({mean_tokens / raw_tokens:6.1%})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser(
+        "record", help="Save raw responses from a live SearXNG"
+    )
+    record_parser.add_argument("--base-url", default="http://localhost:32768")
+    record_parser.add_argument("--out", type=Path, required=True)
+    record_parser.add_argument("queries", nargs="+")
+
+    compare_parser = commands.add_parser("compare", help="Compare payload sizes")
+    compare_parser.add_argument("--responses", type=Path, default=None)
+    compare_parser.add_argument("--max-results", type=int, default=10)
+    compare_parser.add_argument("--snippet-chars", type=int, default=400)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.base_url, args.out, args.queries)
+    else:
+        compare(args.responses, args.max_results, args.snippet_chars)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Startup time and memory: one stdio server per agent vs one shared HTTP server.
+
+Starts `--agents` MCP clients the way the deep search pipeline does, either
+each with its own stdio subprocess, all connected to a single
+streamable-HTTP server, or spread over a `ServerPool` that was warmed before
+the clock started (what an agent server sees on its first research turn),
+and reports time to the first search result, the
+resident memory of the server processes and how many requests reached the
+(stub) SearXNG. Every agent runs the same query, so the shared layout also
+shows cache sharing. Linux only (memory is read from /proc).
+
+Run from the `searxng_search` directory:
+
+    uv run python searxng_mcp/benchmarks/bench_server_layout.py --agents 3
+    uv run python searxng_mcp/benchmarks/bench_server_layout.py --agents 3 --launcher uv
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PACKAGE_ROOT))
+
+from searxng_mcp.pool import ServerPool  # noqa: E402
+from stub_searxng import StubSearXNG  # noqa: E402
+
+SERVER = PACKAGE_ROOT / "searxng_mcp" / "server.py"
+
+
+def launch_command(launcher: str) -> list[str]:
+    if launcher == "uv":
+        return ["uv", "run", str(SERVER)]
+    return [sys.executable, str(SERVER)]
+
+
+def descendants_rss_mb() -> float:
+    """Resident memory of every process started by this one, in MiB."""
+    children: dict[int, list[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    total_kb = 0
+    pending = list(children.get(os.getpid(), []))
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def first_search(session: ClientSession, query: str) -> None:
+    await session.initialize()
+    result = await session.call_tool("search", {"query": query, "max_results": 5})
+    if result.isError:
+        raise RuntimeError(result.content[0].text)
+
+
+async def run_stdio(
+    agents: int, launcher: str, env: dict[str, str], query: str
+) -> tuple[float, float]:
+    command = launch_command(launcher)
+    params = StdioServerParameters(command=command[0], args=command[1:], env=env)
+    start = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        errlog = stack.enter_context(open(os.devnull, "w"))
+
+        async def connect() -> None:
+            read, write = await stack.enter_async_context(
+                stdio_client(params, errlog=errlog)
+            )
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await first_search(session, query)
+
+        # Sequential: the ADK opens each toolset's session on that agent's first tool call.
+        for _ in range(agents):
+            await connect()
+        elapsed = time.perf_counter() - start
+        return elapsed, descendants_rss_mb()
+
+
+async def run_shared(
+    agents: int, launcher: str, env: dict[str, str], query: str
+) -> tuple[float, float]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/mcp"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        launch_command(launcher),
+        env={
+            **os.environ,
+            **env,
+            "SEARXNG_MCP_TRANSPORT": "streamable-http",
+            "SEARXNG_MCP_PORT": str(port),
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient() as client:
+            while True:
+                try:
+                    await client.get(url)
+                    break
+                except httpx.TransportError as err:
+                    if server.poll() is not None:
+                        raise RuntimeError(
+                            "shared server exited during startup"
+                        ) from err
+                    await asyncio.sleep(0.02)
+
+        async with AsyncExitStack() as stack:
+            for _ in range(agents):
+                read, write, _ = await stack.enter_async_context(
+                    streamablehttp_client(url)
+                )
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await first_search(session, query)
+            elapsed = time.perf_counter() - start
+            return elapsed, descendants_rss_mb()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run_pool(
+    agents: int, launcher: str, env: dict[str, str], query: str
+) -> tuple[float, float]:
+    with ServerPool(size=agents, command=launch_command(launcher), env=env) as pool:
+        for _ in range(agents):
+            await asyncio.to_thread(pool.acquire)
+        start = time.perf_counter()
+        async with AsyncExitStack() as stack:
+            for _ in range(agents):
+                url = pool.acquire().url
+                read, write, _ = await stack.enter_async_context(
+                    streamablehttp_client(url)
+                )
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await first_search(session, query)
+            elapsed = time.perf_counter() - start
+            return elapsed, descendants_rss_mb()
+
+
+async def run(agents: int, launcher: str, latency: float) -> None:
+    with StubSearXNG(latency=latency) as stub:
+        env = {"SEARXNG_BASE_URL": stub.url}
+        print(f"{agents} agents, launcher={launcher}, stub SearXNG at {stub.url}")
+        layouts = (
+            ("stdio per agent", run_stdio),
+            ("shared HTTP", run_shared),
+            ("warm pool", run_pool),
+        )
+        for label, layout in layouts:
+            before = stub.requests
+            elapsed, rss = await layout(agents, launcher, env, "benchmark query")
+            print(
+                f"{label:<16} ready+first search={elapsed * 1000:8.1f}ms "
+                f"server RSS={rss:7.1f}MiB upstream requests={stub.requests - before}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--agents", type=int, default=3, help="MCP clients (toolsets) to start"
+    )
+    parser.add_argument("--launcher", choices=("python", "uv"), default="python")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Stub server delay in seconds"
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.agents, args.launcher, args.latency))
+
+
+if __name__ == "__main__":
+    main()
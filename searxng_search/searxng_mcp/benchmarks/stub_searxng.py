@@ -0,0 +1,154 @@
+"""A minimal local stand-in for a SearXNG instance, used by the benchmarks.
+
+It answers `GET /search?format=json` with a payload shaped like a real
+SearXNG response (results with engines, scores, parsed URLs, thumbnails,
+plus infoboxes and suggestions) and supports HTTP/1.1 keep-alive, so
+connection reuse on the client side is observable.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+RESULTS_PER_PAGE = 10
+
+
+def fake_results(
+    query: str, page: int = 1, count: int = RESULTS_PER_PAGE
+) -> dict[str, Any]:
+    """Build a SearXNG-shaped JSON payload for `query`."""
+    results = []
+    for i in range(count):
+        rank = (page - 1) * count + i + 1
+        url = f"https://www.example{rank % 7}.com/articles/{rank}?utm_source=searxng&ref=feed"
+        results.append(
+            {
+                "url": url,
+                "title": f"{query.title()} - result {rank}",
+                "content": (f"An in-depth article about {query}. " * 12).strip(),
+                "publishedDate": "2025-01-15T00:00:00",
+                "thumbnail": f"https://img.example{rank % 7}.com/thumb/{rank}.jpg",
+                "engine": "duckduckgo",
+                "template": "default.html",
+                "parsed_url": [
+                    "https",
+                    f"www.example{rank % 7}.com",
+                    f"/articles/{rank}",
+                    "",
+                    "utm_source=searxng&ref=feed",
+                    "",
+                ],
+                "img_src": "",
+                "priority": "",
+                "engines": ["duckduckgo", "brave", "startpage"],
+                "positions": [i + 1, i + 2, i + 3],
+                "score": round(9.0 / (i + 1), 4),
+                "category": "general",
+            }
+        )
+    return {
+        "query": query,
+        "number_of_results": 0,
+        "results": results,
+        "answers": [],
+        "corrections": [],
+        "infoboxes": [
+            {
+                "infobox": query.title(),
+                "id": f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}",
+                "content": f"{query.title()} is a topic. " * 20,
+                "img_src": "https://upload.wikimedia.org/example.png",
+                "urls": [{"title": "Wikipedia", "url": "https://en.wikipedia.org/"}],
+                "engine": "wikipedia",
+                "engines": ["wikipedia"],
+                "attributes": [{"label": "Field", "value": "Example"}],
+            }
+        ],
+        "suggestions": [f"{query} tutorial", f"{query} examples"],
+        "unresponsive_engines": [],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802
+        parsed = urlparse(self.path)
+        if parsed.path != "/search":
+            self.send_error(404)
+            return
+        params = parse_qs(parsed.query)
+        self.server.requests += 1
+        delays = self.server.delays
+        delay = delays.pop(0) if delays else self.server.latency
+        if delay:
+            time.sleep(delay)
+        query = params.get("q", [""])[0]
+        page = int(params.get("pageno", ["1"])[0])
+        body = json.dumps(fake_results(query, page)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    latency = 0.0
+    delays: list[float] = []
+    requests = 0
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients that time out or hedge hang up early; that is expected here.
+        pass
+
+
+class StubSearXNG:
+    """Run the stub server on a background thread.
+
+    Usage:
+        with StubSearXNG(latency=0.005) as stub:
+            connector = SearXNGConnector(base_url=stub.url)
+
+    `delays` gives the latency of the first requests, in arrival order;
+    later requests take `latency`.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        delays: list[float] | None = None,
+    ):
+        self._server = _Server((host, port), _Handler)
+        self._server.latency = latency
+        self._server.delays = list(delays or ())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        """Search requests answered so far."""
+        return self._server.requests
+
+    def __enter__(self) -> "StubSearXNG":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
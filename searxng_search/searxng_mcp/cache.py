@@ -0,0 +1,169 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class SearchCache:
+    """TTL + LRU cache for SearXNG responses with an optional SQLite tier.
+
+    Entries live in memory up to `max_entries` (least recently used are
+    evicted first). When `path` is given, every entry is also written to a
+    SQLite database so cached results survive server restarts; a memory miss
+    falls through to disk before going back to SearXNG. Expired entries are
+    kept for another `stale_ttl` seconds so they can be served as a fallback
+    while SearXNG is down.
+
+    Args:
+        ttl: Seconds an entry stays fresh
+        max_entries: Maximum number of entries held in memory
+        path: Optional SQLite file for the persistent tier
+        stale_ttl: Seconds past expiry an entry may still be served stale
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 512,
+        path: str | None = None,
+        stale_ttl: float = 3600.0,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        query: str,
+        categories: list[str] | None = None,
+        engines: list[str] | None = None,
+        language: str = "en",
+        page: int = 1,
+        time_range: str | None = None,
+    ) -> str:
+        """Build a cache key from normalized search parameters.
+
+        Queries are case-folded and whitespace-collapsed, and categories and
+        engines are compared as sets, so trivially different requests share
+        an entry.
+        """
+        normalized = [
+            " ".join(query.casefold().split()),
+            sorted({c.strip().lower() for c in categories or []}),
+            sorted({e.strip().lower() for e in engines or []}),
+            (language or "").strip().lower(),
+            int(page),
+            (time_range or "").strip().lower(),
+        ]
+        return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+    @property
+    def db(self) -> sqlite3.Connection | None:
+        if self.path and self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute(
+                "DELETE FROM search_cache WHERE expires_at < ?",
+                (time.time() - self.stale_ttl,),
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached response for `key`, or None if missing or expired."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        if entry is None and self.db is not None:
+            row = self.db.execute(
+                "SELECT expires_at, value FROM search_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                value = json.loads(row[1])
+                self._remember(key, row[0], value)
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def get_stale(self, key: str) -> dict[str, Any] | None:
+        """Return the entry for `key` even if expired, within `stale_ttl` of expiry."""
+        oldest = time.time() - self.stale_ttl
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > oldest:
+            self.stale_hits += 1
+            return entry[1]
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT value FROM search_cache WHERE key = ? AND expires_at > ?",
+                (key, oldest),
+            ).fetchone()
+            if row is not None:
+                self.stale_hits += 1
+                return json.loads(row[0])
+        return None
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        if self.db is not None:
+            self.db.execute(
+                "INSERT OR REPLACE INTO search_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(value)),
+            )
+            self.db.commit()
+
+    def _remember(self, key: str, expires_at: float, value: dict[str, Any]) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.db is not None:
+            self.db.execute("DELETE FROM search_cache")
+            self.db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite tier. It is reopened on next use."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "persistent": self.path is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3)
+            if lookups
+            else 0.0,
+        }
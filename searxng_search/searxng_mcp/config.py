@@ -0,0 +1,186 @@
+import os
+from dataclasses import dataclass
+
+from .projection import DEFAULT_FIELDS
+
+
+def _env_fields(name: str, default: tuple[str, ...] | None) -> tuple[str, ...] | None:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if value.strip() == "*":
+        return None
+    return tuple(f.strip() for f in value.split(",") if f.strip())
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class ConnectorConfig:
+    """Settings for the SearXNG connector, read from the environment.
+
+    Attributes:
+        base_url (str): SearXNG base URL (`SEARXNG_BASE_URL`).
+        timeout (float): Default request timeout in seconds (`SEARXNG_TIMEOUT`).
+        max_connections (int): Connection pool size (`SEARXNG_MAX_CONNECTIONS`).
+        max_keepalive_connections (int): Idle connections kept open (`SEARXNG_MAX_KEEPALIVE`).
+        keepalive_expiry (float): Idle connection lifetime in seconds (`SEARXNG_KEEPALIVE_EXPIRY`).
+        http2 (bool): Negotiate HTTP/2 when available (`SEARXNG_HTTP2`).
+        cache_ttl (float): Seconds a cached response stays fresh; 0 disables
+            the cache (`SEARXNG_CACHE_TTL`).
+        cache_size (int): Maximum in-memory cache entries (`SEARXNG_CACHE_SIZE`).
+        cache_path (Optional[str]): SQLite file for a persistent cache tier
+            (`SEARXNG_CACHE_PATH`).
+        batch_concurrency (int): Concurrent requests issued by `search_many`
+            (`SEARXNG_BATCH_CONCURRENCY`).
+        dedupe (bool): Canonicalize result URLs and drop duplicates
+            (`SEARXNG_DEDUPE`).
+        session_dedupe (bool): Also drop URLs already returned earlier in the
+            same MCP session (`SEARXNG_SESSION_DEDUPE`).
+        max_pages (int): Most result pages fetched for one query
+            (`SEARXNG_MAX_PAGES`).
+        prefetch_pages (int): Pages requested ahead of the consumer
+            (`SEARXNG_PREFETCH_PAGES`).
+        result_fields (Optional[Tuple[str, ...]]): Result fields passed on to
+            the LLM; `*` keeps all of them (`SEARXNG_RESULT_FIELDS`).
+        snippet_chars (int): Character cap per result snippet; 0 disables it
+            (`SEARXNG_SNIPPET_CHARS`).
+        snippet_tokens (Optional[int]): Token cap per snippet, overriding the
+            character cap (`SEARXNG_SNIPPET_TOKENS`).
+        compact (bool): Return results as numbered plain text instead of JSON
+            (`SEARXNG_COMPACT`).
+        time_budget (Optional[float]): Default total seconds a search tool call
+            may take before returning partial results (`SEARXNG_TIME_BUDGET`).
+        hedge (bool): Send a duplicate request when the first one is slower
+            than usual (`SEARXNG_HEDGE`).
+        hedge_percentile (float): Latency percentile that triggers the hedged
+            request (`SEARXNG_HEDGE_PERCENTILE`).
+        hedge_min_samples (int): Requests observed before hedging starts
+            (`SEARXNG_HEDGE_MIN_SAMPLES`).
+        exclude_slow_engines (bool): Drop engines that keep timing out from
+            explicit engine lists (`SEARXNG_EXCLUDE_SLOW_ENGINES`).
+        slow_engine_failure_rate (float): Failure rate above which an engine
+            counts as slow (`SEARXNG_SLOW_ENGINE_FAILURE_RATE`).
+        retry_attempts (int): Attempts per request, including the first, for
+            transient failures (`SEARXNG_RETRY_ATTEMPTS`).
+        retry_base_delay (float): Backoff before the first retry in seconds,
+            doubled per retry with full jitter (`SEARXNG_RETRY_BASE_DELAY`).
+        retry_max_delay (float): Cap on a single backoff (`SEARXNG_RETRY_MAX_DELAY`).
+        breaker_threshold (int): Consecutive failures that open the circuit
+            breaker (`SEARXNG_BREAKER_THRESHOLD`).
+        breaker_reset_timeout (float): Seconds the breaker stays open before
+            probing SearXNG again (`SEARXNG_BREAKER_RESET_TIMEOUT`).
+        cache_stale_ttl (float): Seconds past expiry a cached response may be
+            served while SearXNG is unavailable (`SEARXNG_CACHE_STALE_TTL`).
+    """
+
+    base_url: str = "http://localhost:32768"
+    timeout: float = 10.0
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    cache_ttl: float = 300.0
+    cache_size: int = 512
+    cache_path: str | None = None
+    batch_concurrency: int = 4
+    dedupe: bool = True
+    session_dedupe: bool = False
+    max_pages: int = 3
+    prefetch_pages: int = 1
+    result_fields: tuple[str, ...] | None = DEFAULT_FIELDS
+    snippet_chars: int = 400
+    snippet_tokens: int | None = None
+    compact: bool = False
+    time_budget: float | None = None
+    hedge: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20
+    exclude_slow_engines: bool = True
+    slow_engine_failure_rate: float = 0.5
+    retry_attempts: int = 3
+    retry_base_delay: float = 0.2
+    retry_max_delay: float = 2.0
+    breaker_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    cache_stale_ttl: float = 3600.0
+
+    @classmethod
+    def from_env(cls) -> "ConnectorConfig":
+        return cls(
+            base_url=os.environ.get("SEARXNG_BASE_URL", cls.base_url),
+            timeout=float(os.environ.get("SEARXNG_TIMEOUT", cls.timeout)),
+            max_connections=int(
+                os.environ.get("SEARXNG_MAX_CONNECTIONS", cls.max_connections)
+            ),
+            max_keepalive_connections=int(
+                os.environ.get("SEARXNG_MAX_KEEPALIVE", cls.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(
+                os.environ.get("SEARXNG_KEEPALIVE_EXPIRY", cls.keepalive_expiry)
+            ),
+            http2=_env_bool("SEARXNG_HTTP2", cls.http2),
+            cache_ttl=float(os.environ.get("SEARXNG_CACHE_TTL", cls.cache_ttl)),
+            cache_size=int(os.environ.get("SEARXNG_CACHE_SIZE", cls.cache_size)),
+            cache_path=os.environ.get("SEARXNG_CACHE_PATH") or None,
+            batch_concurrency=int(
+                os.environ.get("SEARXNG_BATCH_CONCURRENCY", cls.batch_concurrency)
+            ),
+            dedupe=_env_bool("SEARXNG_DEDUPE", cls.dedupe),
+            session_dedupe=_env_bool("SEARXNG_SESSION_DEDUPE", cls.session_dedupe),
+            max_pages=int(os.environ.get("SEARXNG_MAX_PAGES", cls.max_pages)),
+            prefetch_pages=int(
+                os.environ.get("SEARXNG_PREFETCH_PAGES", cls.prefetch_pages)
+            ),
+            result_fields=_env_fields("SEARXNG_RESULT_FIELDS", cls.result_fields),
+            snippet_chars=int(
+                os.environ.get("SEARXNG_SNIPPET_CHARS", cls.snippet_chars)
+            ),
+            snippet_tokens=int(os.environ["SEARXNG_SNIPPET_TOKENS"])
+            if os.environ.get("SEARXNG_SNIPPET_TOKENS")
+            else None,
+            compact=_env_bool("SEARXNG_COMPACT", cls.compact),
+            time_budget=float(os.environ["SEARXNG_TIME_BUDGET"])
+            if os.environ.get("SEARXNG_TIME_BUDGET")
+            else None,
+            hedge=_env_bool("SEARXNG_HEDGE", cls.hedge),
+            hedge_percentile=float(
+                os.environ.get("SEARXNG_HEDGE_PERCENTILE", cls.hedge_percentile)
+            ),
+            hedge_min_samples=int(
+                os.environ.get("SEARXNG_HEDGE_MIN_SAMPLES", cls.hedge_min_samples)
+            ),
+            exclude_slow_engines=_env_bool(
+                "SEARXNG_EXCLUDE_SLOW_ENGINES", cls.exclude_slow_engines
+            ),
+            slow_engine_failure_rate=float(
+                os.environ.get(
+                    "SEARXNG_SLOW_ENGINE_FAILURE_RATE", cls.slow_engine_failure_rate
+                )
+            ),
+            retry_attempts=int(
+                os.environ.get("SEARXNG_RETRY_ATTEMPTS", cls.retry_attempts)
+            ),
+            retry_base_delay=float(
+                os.environ.get("SEARXNG_RETRY_BASE_DELAY", cls.retry_base_delay)
+            ),
+            retry_max_delay=float(
+                os.environ.get("SEARXNG_RETRY_MAX_DELAY", cls.retry_max_delay)
+            ),
+            breaker_threshold=int(
+                os.environ.get("SEARXNG_BREAKER_THRESHOLD", cls.breaker_threshold)
+            ),
+            breaker_reset_timeout=float(
+                os.environ.get(
+                    "SEARXNG_BREAKER_RESET_TIMEOUT", cls.breaker_reset_timeout
+                )
+            ),
+            cache_stale_ttl=float(
+                os.environ.get("SEARXNG_CACHE_STALE_TTL", cls.cache_stale_ttl)
+            ),
+        )
@@ -1,24 +1,219 @@
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
 import httpx
-from typing import List, Optional, Dict, Any
+
+from .cache import SearchCache
+from .config import ConnectorConfig
+from .projection import ResultProjection
+from .resilience import BackendUnavailable, CircuitBreaker, RetryPolicy, is_transient
+from .stats import EngineStats, SearchStats
+from .urls import dedupe_results, url_key
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a search's time budget runs out before SearXNG answers."""
+
 
 class SearXNGConnector:
-    def __init__(self, base_url: str = "http://localhost:32768"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:32768",
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        cache: SearchCache | None = None,
+        batch_concurrency: int = 4,
+        dedupe: bool = True,
+        max_pages: int = 3,
+        prefetch_pages: int = 1,
+        projection: ResultProjection | None = None,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        exclude_slow_engines: bool = True,
+        slow_engine_failure_rate: float = 0.5,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        """
+        Connector for a SearXNG instance backed by a long-lived connection pool.
+
+        The underlying `httpx.AsyncClient` is created on first use and reused
+        for every search until `aclose()` is called.
+
+        Args:
+            base_url: Base URL of the SearXNG instance
+            timeout: Default request timeout in seconds (default: 10.0)
+            max_connections: Maximum number of concurrent connections in the pool
+            max_keepalive_connections: Maximum number of idle connections kept alive
+            keepalive_expiry: Seconds an idle connection is kept before closing
+            http2: Negotiate HTTP/2 when the optional `h2` package is installed
+            cache: Optional result cache consulted before querying SearXNG
+            batch_concurrency: Maximum concurrent requests issued by `search_many`
+            dedupe: Canonicalize result URLs and drop duplicate results
+            max_pages: Default page limit for `search_iter`
+            prefetch_pages: Default number of pages `search_iter` fetches ahead
+            projection: Optional field whitelist and snippet cap applied to results
+            hedge: Send a duplicate request when the first one is slower than
+                the `hedge_percentile` latency, and use whichever answers first
+            hedge_percentile: Latency percentile that triggers a hedged request
+            hedge_min_samples: Requests observed before hedging starts
+            exclude_slow_engines: Drop engines that keep timing out from
+                explicit `engines` lists
+            slow_engine_failure_rate: Failure rate above which an engine is slow
+            retry: Retry policy for transient failures (default: 3 attempts)
+            breaker: Circuit breaker guarding the backend (default: opens after
+                5 consecutive failures for 30 seconds)
+        """
         self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client: httpx.AsyncClient | None = None
+        self.cache = cache
+        self.batch_concurrency = batch_concurrency
+        self.dedupe = dedupe
+        self.max_pages = max_pages
+        self.prefetch_pages = prefetch_pages
+        self.projection = projection
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.exclude_slow_engines = exclude_slow_engines
+        self.slow_engine_failure_rate = slow_engine_failure_rate
+        self.stats = SearchStats()
+        self.engine_stats = EngineStats()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.stale_served = 0
+
+    @classmethod
+    def from_config(cls, config: ConnectorConfig) -> "SearXNGConnector":
+        """Build a connector from a `ConnectorConfig` (e.g. `ConnectorConfig.from_env()`)."""
+        return cls(
+            base_url=config.base_url,
+            timeout=config.timeout,
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+            http2=config.http2,
+            cache=(
+                SearchCache(
+                    ttl=config.cache_ttl,
+                    max_entries=config.cache_size,
+                    path=config.cache_path,
+                    stale_ttl=config.cache_stale_ttl,
+                )
+                if config.cache_ttl > 0
+                else None
+            ),
+            batch_concurrency=config.batch_concurrency,
+            dedupe=config.dedupe,
+            max_pages=config.max_pages,
+            prefetch_pages=config.prefetch_pages,
+            projection=ResultProjection(
+                fields=config.result_fields,
+                max_snippet_chars=config.snippet_chars,
+                max_snippet_tokens=config.snippet_tokens,
+            ),
+            hedge=config.hedge,
+            hedge_percentile=config.hedge_percentile,
+            hedge_min_samples=config.hedge_min_samples,
+            exclude_slow_engines=config.exclude_slow_engines,
+            slow_engine_failure_rate=config.slow_engine_failure_rate,
+            retry=RetryPolicy(
+                max_attempts=config.retry_attempts,
+                base_delay=config.retry_base_delay,
+                max_delay=config.retry_max_delay,
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=config.breaker_threshold,
+                reset_timeout=config.breaker_reset_timeout,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client, created lazily on first access."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the connection pool and cache file. The connector can be reused afterwards."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Connection pool limits and current utilisation."""
+        max_connections = self.limits.max_connections
+        stats = {
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "http2": self.http2,
+            "in_flight": self.stats.in_flight,
+            "peak_in_flight": self.stats.peak_in_flight,
+            "utilisation": round(self.stats.in_flight / max_connections, 3)
+            if max_connections
+            else None,
+        }
+        # httpx does not expose its pool publicly; report open connections when the
+        # default httpcore transport is in use.
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats["open_connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+        return stats
+
+    async def __aenter__(self) -> "SearXNGConnector":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
 
     async def search(
         self,
         query: str,
-        categories: Optional[List[str]] = None,
-        engines: Optional[List[str]] = None,
+        categories: list[str] | None = None,
+        engines: list[str] | None = None,
         language: str = "en",
         page: int = 1,
-        time_range: Optional[str] = None,
-        max_results: Optional[int] = None,
-        timeout: float = 10.0,
-    ) -> Dict[str, Any]:
+        time_range: str | None = None,
+        max_results: int | None = None,
+        timeout: float | None = None,
+        seen_urls: set[str] | None = None,
+        deadline: float | None = None,
+    ) -> dict[str, Any]:
         """
         Search SearXNG instance.
-        
+
         Args:
             query: Search query string
             categories: List of categories to search (e.g., ['general', 'it'])
@@ -27,8 +222,151 @@ class SearXNGConnector:
             page: Page number (default: 1)
             time_range: Time range (e.g., 'day', 'week', 'month', 'year')
             max_results: Maximum number of results to return (optional)
-            timeout: Request timeout in seconds (default: 10.0)
+            timeout: Request timeout in seconds (default: the connector timeout)
+            seen_urls: URL keys already returned earlier; matching results are
+                dropped and the set is updated with the new ones (requires `dedupe`)
+            deadline: Absolute `time.monotonic()` time by which the search must
+                finish; raises `DeadlineExceeded` if it has already passed
+        """
+        payload = await self._fetch_page(
+            query, categories, engines, language, page, time_range, timeout, deadline
+        )
+        return self._format(payload, max_results, seen_urls)
+
+    async def search_iter(
+        self,
+        query: str,
+        max_results: int | None = None,
+        categories: list[str] | None = None,
+        engines: list[str] | None = None,
+        language: str = "en",
+        time_range: str | None = None,
+        timeout: float | None = None,
+        max_pages: int | None = None,
+        prefetch: int | None = None,
+        seen_urls: set[str] | None = None,
+        deadline: float | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Yield search results across as many pages as needed.
+
+        Pages are fetched ahead of the consumer (up to `prefetch` requests in
+        flight, and no more than the remaining `max_results` can use), results
+        are yielded as each page arrives, and fetching stops as soon as
+        `max_results` results have been yielded, a page comes back empty or
+        `max_pages` is reached. Outstanding page requests are cancelled when
+        the iterator finishes or is closed. When `deadline` passes, iteration
+        ends quietly with whatever results were already yielded.
+
+        Args:
+            query: Search query string
+            max_results: Stop after this many results (optional)
+            categories: List of categories to search (e.g., ['general', 'it'])
+            engines: List of specific engines to use
+            language: Language code (default: en)
+            time_range: Time range (e.g., 'day', 'week', 'month', 'year')
+            timeout: Per-page request timeout in seconds (default: the connector timeout)
+            max_pages: Maximum number of pages to fetch (default: `max_pages`)
+            prefetch: Pages requested ahead of the consumer (default: `prefetch_pages`)
+            seen_urls: URL keys already returned earlier; matching results are
+                skipped and the set is updated with the yielded ones (requires `dedupe`)
+            deadline: Absolute `time.monotonic()` time at which to stop fetching
         """
+        max_pages = max_pages or self.max_pages
+        prefetch = max(1, prefetch if prefetch is not None else self.prefetch_pages)
+        pending: deque[asyncio.Task] = deque()
+        next_page = 1
+
+        def schedule(ahead: int) -> None:
+            nonlocal next_page
+            while next_page <= max_pages and len(pending) < ahead:
+                pending.append(
+                    asyncio.ensure_future(
+                        self._fetch_page(
+                            query,
+                            categories,
+                            engines,
+                            language,
+                            next_page,
+                            time_range,
+                            timeout,
+                            deadline,
+                        )
+                    )
+                )
+                next_page += 1
+
+        excluded = set(seen_urls or ())
+        yielded = 0
+        try:
+            schedule(1)
+            while pending:
+                try:
+                    results = (await pending.popleft())["results"]
+                except Exception as exc:
+                    out_of_budget = (
+                        deadline is not None and time.monotonic() >= deadline
+                    )
+                    if out_of_budget and isinstance(
+                        exc, (DeadlineExceeded, httpx.TimeoutException)
+                    ):
+                        # Keep the partial results already yielded.
+                        return
+                    if yielded and (
+                        is_transient(exc) or isinstance(exc, BackendUnavailable)
+                    ):
+                        # A later page failed; what was already yielded still stands.
+                        return
+                    raise
+                if not results:
+                    return
+
+                ahead = prefetch
+                if max_results:
+                    remaining = max_results - yielded - len(results)
+                    ahead = min(prefetch, max(0, math.ceil(remaining / len(results))))
+                schedule(ahead)
+
+                if self.dedupe:
+                    results = dedupe_results(results, excluded)
+                for result in results:
+                    if self.dedupe and seen_urls is not None and result.get("url"):
+                        seen_urls.add(url_key(result["url"]))
+                    if self.projection is not None:
+                        result = self.projection.project(result)
+                    yield result
+                    yielded += 1
+                    if max_results and yielded >= max_results:
+                        return
+                if not pending:
+                    # Dedup removed more than expected; keep paging.
+                    schedule(1)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fetch_page(
+        self,
+        query: str,
+        categories: list[str] | None,
+        engines: list[str] | None,
+        language: str,
+        page: int,
+        time_range: str | None,
+        timeout: float | None,
+        deadline: float | None = None,
+    ) -> dict[str, Any]:
+        """Fetch one page of results, going through the cache when enabled."""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = SearchCache.make_key(
+                query, categories, engines, language, page, time_range
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         params = {
             "q": query,
             "format": "json",
@@ -39,24 +377,232 @@ class SearXNGConnector:
         if categories:
             params["categories"] = ",".join(categories)
         if engines:
+            if self.exclude_slow_engines:
+                engines = self.engine_stats.exclude_slow(
+                    engines, max_failure_rate=self.slow_engine_failure_rate
+                )
             params["engines"] = ",".join(engines)
         if time_range:
             params["time_range"] = time_range
 
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.get(f"{self.base_url}/search", params=params)
-            response.raise_for_status()
-            data = response.json()
+        request_timeout = timeout if timeout is not None else self.timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats.deadline_exceeded += 1
+                raise DeadlineExceeded(
+                    f"Time budget exhausted before searching {query!r}"
+                )
+            if remaining < request_timeout:
+                request_timeout = remaining
+                # Let SearXNG give up on slow engines and answer with what it
+                # has, leaving some of the budget for the response itself.
+                params["timeout_limit"] = round(max(0.1, remaining * 0.8), 2)
 
-        results = data.get("results", [])
-        
-        if max_results and len(results) > max_results:
-            results = results[:max_results]
-            
-        return {
+        if not self.breaker.allow():
+            return self._fallback(
+                cache_key,
+                BackendUnavailable(
+                    f"SearXNG at {self.base_url} is unavailable; not retrying for "
+                    f"{self.breaker.retry_after():.0f}s",
+                    retry_after=self.breaker.retry_after(),
+                ),
+            )
+
+        start = time.perf_counter()
+        try:
+            data = await self._request_with_retry(params, request_timeout, deadline)
+        except Exception as exc:
+            if not is_transient(exc):
+                raise
+            return self._fallback(cache_key, exc)
+        self.engine_stats.record(data, time.perf_counter() - start)
+
+        payload = {
             "query": data.get("query"),
             "number_of_results": data.get("number_of_results"),
-            "results": results,
+            "results": data.get("results", []),
             "suggestions": data.get("suggestions", []),
             "infoboxes": data.get("infoboxes", []),
         }
+        # Responses missing engines are partial; don't pin them in the cache.
+        if cache_key is not None and not data.get("unresponsive_engines"):
+            self.cache.set(cache_key, payload)
+
+        return payload
+
+    def _fallback(self, cache_key: str | None, error: Exception) -> dict[str, Any]:
+        """Serve a stale cached page for `cache_key` if there is one, else raise `error`."""
+        if cache_key is not None and self.cache is not None:
+            stale = self.cache.get_stale(cache_key)
+            if stale is not None:
+                self.stale_served += 1
+                return {**stale, "stale": True}
+        raise error
+
+    async def _request_with_retry(
+        self, params: dict[str, Any], timeout: float, deadline: float | None
+    ) -> dict[str, Any]:
+        """`_request` with backoff retries on transient errors, reporting to the breaker."""
+        attempt = 1
+        while True:
+            try:
+                data = await self._request(params, timeout)
+            except Exception as exc:
+                if not is_transient(exc):
+                    if isinstance(exc, httpx.HTTPStatusError):
+                        # SearXNG answered; the request itself was bad.
+                        self.breaker.record_success()
+                    # Anything else (e.g. a body that is not JSON) says nothing
+                    # about the backend being healthy.
+                    raise
+                # A timeout caused by a tight caller budget says nothing about backend health.
+                if not (deadline is not None and timeout < self.timeout):
+                    self.breaker.record_failure()
+                delay = self.retry.backoff(attempt)
+                if (
+                    attempt >= self.retry.max_attempts
+                    or self.breaker.state == CircuitBreaker.OPEN
+                    or (deadline is not None and time.monotonic() + delay >= deadline)
+                ):
+                    self.retry.exhausted += 1
+                    raise
+                self.retry.retries += 1
+                await asyncio.sleep(delay)
+                attempt += 1
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                continue
+            self.breaker.record_success()
+            return data
+
+    async def _request(self, params: dict[str, Any], timeout: float) -> dict[str, Any]:
+        """GET /search, hedging with a duplicate request when the first is slow."""
+        hedge_delay = None
+        if self.hedge:
+            hedge_delay = self.stats.latency_percentile(
+                self.hedge_percentile, min_samples=self.hedge_min_samples
+            )
+        if hedge_delay is None or hedge_delay >= timeout:
+            return await self._send(params, timeout)
+
+        primary = asyncio.ensure_future(self._send(params, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        self.stats.hedged += 1
+        backup = asyncio.ensure_future(self._send(params, timeout - hedge_delay))
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        if task is backup:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+            # Both requests failed; surface the primary's error.
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _send(self, params: dict[str, Any], timeout: float) -> dict[str, Any]:
+        with self.stats.track():
+            response = await self.client.get("/search", params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+    async def search_many(
+        self,
+        queries: list[str],
+        max_results: int | None = None,
+        concurrency: int | None = None,
+        seen_urls: set[str] | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """
+        Run several searches concurrently and merge the results.
+
+        Queries are fanned out through `search_iter` with at most `concurrency`
+        queries in flight. A result URL returned by more than one query is
+        kept only under the first query (in input order) that returned it;
+        with `dedupe` enabled URLs are compared in canonical form.
+        A failing query is reported under `errors` instead of failing the batch.
+
+        Args:
+            queries: Search query strings; blank and repeated queries are dropped
+            max_results: Maximum number of results per query (optional)
+            concurrency: Concurrent request limit (default: `batch_concurrency`)
+            seen_urls: URL keys already returned by earlier calls; matching
+                results are dropped and the set is updated in place
+            **kwargs: Extra arguments forwarded to `search_iter`
+        """
+        unique_queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+        semaphore = asyncio.Semaphore(concurrency or self.batch_concurrency)
+
+        async def run(query: str) -> list[dict[str, Any]]:
+            async with semaphore:
+                return [
+                    result
+                    async for result in self.search_iter(
+                        query=query, max_results=max_results, **kwargs
+                    )
+                ]
+
+        responses = await asyncio.gather(
+            *(run(query) for query in unique_queries), return_exceptions=True
+        )
+
+        if seen_urls is None:
+            seen_urls = set()
+        merged: dict[str, Any] = {}
+        errors: dict[str, str] = {}
+        for query, response in zip(unique_queries, responses, strict=True):
+            if isinstance(response, Exception):
+                errors[query] = f"{type(response).__name__}: {response}"
+                continue
+            if isinstance(response, BaseException):
+                raise response
+            if self.dedupe:
+                results = dedupe_results(response, seen_urls)
+            else:
+                results = []
+                for result in response:
+                    url = result.get("url")
+                    if url in seen_urls:
+                        continue
+                    seen_urls.add(url)
+                    results.append(result)
+            merged[query] = {"results": results}
+
+        return {
+            "queries": merged,
+            "errors": errors,
+            "total_results": sum(len(entry["results"]) for entry in merged.values()),
+        }
+
+    def _format(
+        self,
+        payload: dict[str, Any],
+        max_results: int | None,
+        seen_urls: set[str] | None = None,
+    ) -> dict[str, Any]:
+        results = payload["results"]
+        if self.dedupe:
+            results = dedupe_results(results, set(seen_urls or ()))
+
+        if max_results and len(results) > max_results:
+            results = results[:max_results]
+
+        if self.dedupe and seen_urls is not None:
+            seen_urls.update(url_key(r["url"]) for r in results if r.get("url"))
+
+        if self.projection is not None:
+            results = self.projection.apply(results)
+
+        return {**payload, "results": results}
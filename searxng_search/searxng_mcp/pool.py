@@ -0,0 +1,403 @@
+import asyncio
+import atexit
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+SERVER_SCRIPT = Path(__file__).resolve().parent / "server.py"
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _port_in_use(host: str, port: int) -> bool:
+    with socket.socket() as sock:
+        # As the server does, so a port in TIME_WAIT counts as free.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return True
+    return False
+
+
+class PooledServer:
+    """One MCP server process in a `ServerPool`, listening on a loopback port.
+
+    The port belongs to the pool slot and survives recycling, so toolsets
+    built from this server's connection params reach its replacement when
+    they open a new MCP session. Sessions open on the old process end with
+    it, which is why the pool drains a server before recycling it. If another
+    process holds the port, the server is not moved elsewhere (toolsets would
+    keep the old URL); `error` says why it is not ready instead.
+    """
+
+    def __init__(self, slot: int, host: str, port: int):
+        self.slot = slot
+        self.host = host
+        self.port = port
+        self.process: subprocess.Popen | None = None
+        self.ready = False
+        self.started_at = 0.0
+        self.warm_s: float | None = None
+        self.tool_calls = 0
+        self.rss_mb = 0.0
+        self.failed_pings = 0
+        self.recycled = 0
+        self.leases = 0
+        self.sessions = 0
+        self.draining_since: float | None = None
+        self.error: str | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/mcp"
+
+    def connection_params(self, **kwargs: Any) -> Any:
+        """ADK connection params for this server, for `MCPToolset(connection_params=...)`.
+
+        Args:
+            **kwargs: Extra `StreamableHTTPConnectionParams` fields (timeout, headers, ...)
+        """
+        from google.adk.tools.mcp_tool import StreamableHTTPConnectionParams
+
+        return StreamableHTTPConnectionParams(url=self.url, **kwargs)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "slot": self.slot,
+            "url": self.url,
+            "pid": self.process.pid if self.process else None,
+            "ready": self.ready,
+            "warm_s": round(self.warm_s, 2) if self.warm_s is not None else None,
+            "tool_calls": self.tool_calls,
+            "rss_mb": self.rss_mb,
+            "failed_pings": self.failed_pings,
+            "recycled": self.recycled,
+            "leases": self.leases,
+            "sessions": self.sessions,
+            "draining": self.draining_since is not None,
+            "error": self.error,
+        }
+
+
+class ServerPool:
+    """Keep a few SearXNG MCP servers started and warm ahead of the first search.
+
+    Each server runs `server.py` over streamable HTTP on its own loopback
+    port. A background thread waits until every server answers the `ping`
+    tool (so interpreter startup, imports and connector setup are paid
+    before any agent runs), then pings them every `health_interval` seconds.
+    A server is recycled - stopped and restarted on the same port - when it
+    stops answering, has served `max_tool_calls` search calls, or uses more
+    than `max_rss_mb` of memory. In the last two cases it is drained first:
+    it is no longer handed out, and it is stopped once its clients have
+    closed their MCP sessions, or after `drain_timeout` seconds, whichever
+    comes first. Clients still connected then lose their session and have to
+    open a new one. Only one server is drained or recycled at a time, and
+    `acquire` skips servers that are not ready (with `size=1` it waits for
+    the replacement).
+
+    ADK's stdio toolsets always spawn their own process, so pooled servers
+    are handed out as HTTP connection params instead:
+
+        pool = ServerPool(size=2).start()
+        toolset = MCPToolset(connection_params=pool.connection_params())
+
+    Args:
+        size: Number of servers to keep running
+        command: Command that starts one server; the port and transport are
+            passed through the environment (default: this interpreter + server.py)
+        env: Extra environment for the servers (SEARXNG_* settings, profile, ...)
+        host: Loopback interface the servers bind to
+        max_tool_calls: Search tool calls after which a server is recycled
+        max_rss_mb: Resident memory in MiB above which a server is recycled
+        health_interval: Seconds between health checks
+        startup_timeout: Seconds a server may take to answer its first ping
+        max_failed_pings: Consecutive failed pings before a server is recycled
+        drain_timeout: Seconds a server being recycled keeps serving the
+            sessions already open on it
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        command: list[str] | None = None,
+        env: dict[str, str] | None = None,
+        host: str = "127.0.0.1",
+        max_tool_calls: int = 1000,
+        max_rss_mb: float = 512.0,
+        health_interval: float = 15.0,
+        startup_timeout: float = 60.0,
+        max_failed_pings: int = 2,
+        drain_timeout: float = 300.0,
+    ):
+        self.command = command or [sys.executable, str(SERVER_SCRIPT)]
+        self.env = dict(env or {})
+        self.max_tool_calls = max_tool_calls
+        self.max_rss_mb = max_rss_mb
+        self.health_interval = health_interval
+        self.startup_timeout = startup_timeout
+        self.max_failed_pings = max_failed_pings
+        self.drain_timeout = drain_timeout
+        self.servers = [
+            PooledServer(slot, host, _free_port(host)) for slot in range(max(1, size))
+        ]
+        self._next = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "ServerPool":
+        """Build a pool from `SEARXNG_MCP_POOL_*` variables; `kwargs` take precedence."""
+        settings = {
+            "size": int(os.environ.get("SEARXNG_MCP_POOL_SIZE", 2)),
+            "max_tool_calls": int(os.environ.get("SEARXNG_MCP_POOL_MAX_CALLS", 1000)),
+            "max_rss_mb": float(os.environ.get("SEARXNG_MCP_POOL_MAX_RSS_MB", 512)),
+            "health_interval": float(
+                os.environ.get("SEARXNG_MCP_POOL_HEALTH_INTERVAL", 15)
+            ),
+            "drain_timeout": float(
+                os.environ.get("SEARXNG_MCP_POOL_DRAIN_TIMEOUT", 300)
+            ),
+        }
+        settings.update(kwargs)
+        return cls(**settings)
+
+    def start(self) -> "ServerPool":
+        """Launch every server and begin warming them in the background.
+
+        Raises:
+            RuntimeError: If another process already listens on a server's port
+        """
+        if self._thread is not None:
+            return self
+        for server in self.servers:
+            if _port_in_use(server.host, server.port):
+                raise RuntimeError(f"{server.url}: port already in use")
+        for server in self.servers:
+            self._spawn(server)
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._supervise()),
+            name="searxng-mcp-pool",
+            daemon=True,
+        )
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until at least one server is ready; False on timeout or when
+        every server failed to start."""
+        with self._ready:
+            self._ready.wait_for(
+                lambda: (
+                    any(server.ready for server in self.servers)
+                    or all(server.error for server in self.servers)
+                ),
+                timeout,
+            )
+            return any(server.ready for server in self.servers)
+
+    def acquire(self, timeout: float | None = None) -> PooledServer:
+        """Hand out the next ready server, round-robin.
+
+        Args:
+            timeout: Seconds to wait for a server to become ready
+                (default: `startup_timeout`)
+        """
+        self.start()
+        if not self.wait_ready(self.startup_timeout if timeout is None else timeout):
+            errors = sorted({server.error for server in self.servers if server.error})
+            raise RuntimeError(
+                "No SearXNG MCP server in the pool became ready"
+                + (f": {'; '.join(errors)}" if errors else "")
+            )
+        with self._lock:
+            for _ in range(len(self.servers)):
+                server = self.servers[self._next % len(self.servers)]
+                self._next += 1
+                if server.ready:
+                    server.leases += 1
+                    return server
+        # The only ready server was recycled in between; try again.
+        return self.acquire(timeout)
+
+    def connection_params(self, **kwargs: Any) -> Any:
+        """ADK connection params for the next server that is not draining,
+        round-robin, without waiting for it to be ready.
+
+        Ports are fixed per slot, so a toolset built at import time connects
+        once the server is warm; use `acquire` to wait for a ready server.
+        """
+        self.start()
+        with self._lock:
+            for _ in range(len(self.servers)):
+                server = self.servers[self._next % len(self.servers)]
+                self._next += 1
+                if server.draining_since is None:
+                    break
+            server.leases += 1
+        return server.connection_params(**kwargs)
+
+    def close(self) -> None:
+        """Stop health checks and terminate every server."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        for server in self.servers:
+            self._terminate(server)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "size": len(self.servers),
+            "ready": sum(server.ready for server in self.servers),
+            "servers": [server.snapshot() for server in self.servers],
+        }
+
+    def __enter__(self) -> "ServerPool":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _spawn(self, server: PooledServer) -> None:
+        env = {
+            **os.environ,
+            **self.env,
+            "SEARXNG_MCP_TRANSPORT": "streamable-http",
+            "SEARXNG_MCP_HOST": server.host,
+            "SEARXNG_MCP_PORT": str(server.port),
+        }
+        server.process = subprocess.Popen(
+            self.command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        server.started_at = time.monotonic()
+        server.warm_s = None
+        server.tool_calls = 0
+        server.failed_pings = 0
+        server.sessions = 0
+        server.draining_since = None
+        server.error = None
+
+    def _terminate(self, server: PooledServer) -> None:
+        with self._lock:
+            server.ready = False
+        process, server.process = server.process, None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    async def _ping(self, server: PooledServer, timeout: float = 5.0) -> dict[str, Any]:
+        async with streamablehttp_client(server.url, timeout=timeout) as (
+            read,
+            write,
+            _,
+        ):
+            async with ClientSession(read, write) as session:
+                await asyncio.wait_for(session.initialize(), timeout)
+                result = await asyncio.wait_for(session.call_tool("ping", {}), timeout)
+        if result.isError:
+            raise RuntimeError(
+                result.content[0].text if result.content else "ping failed"
+            )
+        return json.loads(result.content[0].text)
+
+    async def _warm(self, server: PooledServer) -> bool:
+        """Ping a freshly started server until it answers, then mark it ready.
+
+        A server that exits because another process took its port is left
+        down with `error` set; the port is never changed, since toolsets
+        already hold its URL. Health checks keep restarting it on that port.
+        """
+        deadline = server.started_at + self.startup_timeout
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if server.process is None or server.process.poll() is not None:
+                error = f"{server.url}: server exited during startup"
+                if server.process is not None and await asyncio.to_thread(
+                    _port_in_use, server.host, server.port
+                ):
+                    error = f"{server.url}: port taken by another process"
+                with self._ready:
+                    server.error = error
+                    self._ready.notify_all()
+                return False
+            try:
+                report = await self._ping(server)
+            except Exception:
+                await asyncio.sleep(0.1)
+                continue
+            server.warm_s = time.monotonic() - server.started_at
+            server.rss_mb = report.get("rss_mb", 0.0)
+            with self._ready:
+                server.ready = True
+                self._ready.notify_all()
+            return True
+        return False
+
+    def _drain(self, server: PooledServer) -> None:
+        """Stop handing out `server`; it keeps serving its open sessions."""
+        with self._lock:
+            server.ready = False
+            server.draining_since = time.monotonic()
+
+    async def _recycle(self, server: PooledServer) -> None:
+        await asyncio.to_thread(self._terminate, server)
+        server.recycled += 1
+        self._spawn(server)
+        if not await self._warm(server):
+            # Leave it to the next health check to try again.
+            server.failed_pings = self.max_failed_pings
+
+    async def _check(self, server: PooledServer) -> None:
+        try:
+            report = await self._ping(server)
+        except Exception:
+            server.failed_pings += 1
+        else:
+            server.failed_pings = 0
+            server.tool_calls = report.get("tool_calls", 0)
+            server.rss_mb = report.get("rss_mb", 0.0)
+            server.sessions = report.get("sessions", 0)
+        if server.failed_pings >= self.max_failed_pings:
+            # Not answering: its sessions are lost either way.
+            await self._recycle(server)
+        elif server.draining_since is not None:
+            if (
+                server.sessions == 0
+                or time.monotonic() - server.draining_since >= self.drain_timeout
+            ):
+                await self._recycle(server)
+        elif (
+            server.tool_calls >= self.max_tool_calls or server.rss_mb > self.max_rss_mb
+        ) and not any(other.draining_since is not None for other in self.servers):
+            self._drain(server)
+
+    async def _supervise(self) -> None:
+        await asyncio.gather(*(self._warm(server) for server in self.servers))
+        while not self._stop.is_set():
+            await asyncio.to_thread(self._stop.wait, self.health_interval)
+            for server in self.servers:
+                if self._stop.is_set():
+                    break
+                # One at a time, so the others keep serving while a server restarts.
+                await self._check(server)
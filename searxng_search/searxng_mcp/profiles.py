@@ -0,0 +1,65 @@
+import os
+from dataclasses import dataclass, replace
+
+
+@dataclass(frozen=True)
+class SearchProfile:
+    """Named engine/category selection for a search server.
+
+    Attributes:
+        name (str): Profile name, selected with `SEARXNG_PROFILE`.
+        description (str): What the profile is meant for.
+        categories (Optional[Tuple[str, ...]]): SearXNG categories to search.
+        engines (Optional[Tuple[str, ...]]): SearXNG engines to use; None lets
+            SearXNG pick the engines enabled for the categories.
+        time_range (Optional[str]): Default time range ('day', 'week', 'month', 'year').
+        tool_name (str): Name the search tool is registered under.
+    """
+
+    name: str
+    description: str
+    categories: tuple[str, ...] | None = None
+    engines: tuple[str, ...] | None = None
+    time_range: str | None = None
+    tool_name: str = "search"
+
+
+PROFILES: dict[str, SearchProfile] = {
+    "general": SearchProfile(
+        name="general",
+        description="General web search with SearXNG's default engines.",
+    ),
+    "academic": SearchProfile(
+        name="academic",
+        description="Scholarly search over arXiv, Google Scholar and Semantic Scholar.",
+        categories=("general", "science"),
+        engines=("arxiv", "google scholar", "semantic scholar"),
+    ),
+    "news": SearchProfile(
+        name="news",
+        description="Recent news articles from the past month.",
+        categories=("news",),
+        time_range="month",
+    ),
+}
+
+
+def get_profile(name: str | None) -> SearchProfile:
+    """Look up a profile by name (case-insensitive); None selects `general`."""
+    key = (name or "general").strip().lower()
+    try:
+        return PROFILES[key]
+    except KeyError:
+        raise ValueError(
+            f"Unknown search profile {name!r}; expected one of {', '.join(sorted(PROFILES))}"
+        ) from None
+
+
+def profile_from_env() -> SearchProfile:
+    """The profile named by `SEARXNG_PROFILE`, with its tool name overridden by
+    `SEARXNG_SEARCH_TOOL_NAME` when set."""
+    profile = get_profile(os.environ.get("SEARXNG_PROFILE"))
+    tool_name = os.environ.get("SEARXNG_SEARCH_TOOL_NAME")
+    if tool_name:
+        profile = replace(profile, tool_name=tool_name.strip())
+    return profile
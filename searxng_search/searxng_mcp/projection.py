@@ -0,0 +1,81 @@
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+# Fields the research agents actually read from a SearXNG result
+DEFAULT_FIELDS = ("title", "url", "content", "publishedDate")
+
+# Rough characters-per-token ratio for English text with common tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for caps and reporting when no tokenizer is loaded."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cut `text` to at most `max_chars` characters, preferring a word boundary."""
+    text = " ".join(text.split())
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - 1]
+    space = cut.rfind(" ")
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,;:.") + "…"
+
+
+class ResultProjection:
+    """Field whitelist and snippet cap applied to results before they reach the LLM.
+
+    Args:
+        fields: Result keys to keep; None keeps every field
+        max_snippet_chars: Cap on the `content` snippet; 0 disables the cap
+        max_snippet_tokens: Cap on the snippet in (estimated) tokens; overrides
+            `max_snippet_chars` when set
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str] | None = DEFAULT_FIELDS,
+        max_snippet_chars: int = 400,
+        max_snippet_tokens: int | None = None,
+    ):
+        self.fields = tuple(fields) if fields is not None else None
+        if max_snippet_tokens:
+            max_snippet_chars = max_snippet_tokens * CHARS_PER_TOKEN
+        self.max_snippet_chars = max_snippet_chars
+
+    def project(self, result: dict[str, Any]) -> dict[str, Any]:
+        """Return a slimmed copy of one result; the input is not modified."""
+        if self.fields is None:
+            projected = dict(result)
+        else:
+            projected = {
+                name: result[name]
+                for name in self.fields
+                if result.get(name) not in (None, "", [], {})
+            }
+        content = projected.get("content")
+        if isinstance(content, str):
+            projected["content"] = truncate(content, self.max_snippet_chars)
+        return projected
+
+    def apply(self, results: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        return [self.project(result) for result in results]
+
+
+def render_compact(query: str, results: Iterable[dict[str, Any]]) -> str:
+    """Render results as numbered plain text, which is cheaper than JSON in a prompt."""
+    lines = [f"Results for: {query}"]
+    for index, result in enumerate(results, start=1):
+        lines.append(f"{index}. {result.get('title', '').strip()}")
+        if result.get("url"):
+            lines.append(f"   {result['url']}")
+        if result.get("publishedDate"):
+            lines.append(f"   Published: {result['publishedDate']}")
+        if result.get("content"):
+            lines.append(f"   {result['content']}")
+    if len(lines) == 1:
+        lines.append("No results.")
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+import random
+import time
+from typing import Any
+
+import httpx
+
+# Upstream statuses worth retrying: rate limiting and gateway/overload errors
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BackendUnavailable(Exception):
+    """Raised instead of calling SearXNG while the circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether a failed SearXNG request is worth retrying."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(exc, (httpx.TransportError, TimeoutError))
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient failures.
+
+    Args:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff before the first retry, doubled on each retry
+        max_delay: Upper bound on a single backoff
+    """
+
+    def __init__(
+        self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.exhausted = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number `attempt` (starting at 1)."""
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "max_attempts": self.max_attempts,
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+        }
+
+
+class CircuitBreaker:
+    """Fail fast while the backend keeps failing.
+
+    The breaker opens after `failure_threshold` consecutive transient
+    failures. While open every call is rejected; after `reset_timeout`
+    seconds one probe request is let through (half-open), and its outcome
+    either closes the breaker or opens it again.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker
+        reset_timeout: Seconds to stay open before probing the backend
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probe_started: float | None = None
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+        if self.state == self.HALF_OPEN:
+            # One probe at a time; a probe that never reported back is replaced.
+            if (
+                self._probe_started is None
+                or now - self._probe_started >= self.reset_timeout
+            ):
+                self._probe_started = now
+                return True
+        if self.state == self.CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if (
+            self.state == self.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_started = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after_s": round(self.retry_after(), 1),
+        }
@@ -1,30 +1,283 @@
-from typing import List, Optional, Dict, Any
-from connector import SearXNGConnector
-import httpx
-from mcp.server.fastmcp import FastMCP
+import os
+import sys
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from weakref import WeakKeyDictionary
+
+if not __package__:
+    # Started as a script (`uv run .../searxng_mcp/server.py`): make the package importable.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp.server.fastmcp import Context, FastMCP
+
+from searxng_mcp.config import ConnectorConfig
+from searxng_mcp.connector import SearXNGConnector
+from searxng_mcp.profiles import SearchProfile, profile_from_env
+from searxng_mcp.projection import render_compact
+from searxng_mcp.resilience import BackendUnavailable, is_transient
+from searxng_mcp.stats import current_rss_mb
+
+
+@dataclass
+class AppContext:
+    """Resources created once at server startup and shared by every tool call."""
+
+    connector: SearXNGConnector
+    session_dedupe: bool = False
+    compact: bool = False
+    time_budget: float | None = None
+    tool_calls: int = 0
+    seen_urls: "WeakKeyDictionary[Any, set[str]]" = field(
+        default_factory=WeakKeyDictionary
+    )
+
+
+# One AppContext per process. FastMCP enters the lifespan once per client
+# session, which over HTTP means once per connected agent; they all share it.
+_shared_app: AppContext | None = None
+_lifespan_users = 0
+# Close the connector when the last session ends (stdio). HTTP servers keep it,
+# and its cache, for the next client.
+_close_when_idle = True
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
+    """Hand every session the process-wide AppContext, building the connector
+    from the environment on first use."""
+    global _shared_app, _lifespan_users
+    if _shared_app is None:
+        config = ConnectorConfig.from_env()
+        _shared_app = AppContext(
+            connector=SearXNGConnector.from_config(config),
+            session_dedupe=config.session_dedupe,
+            compact=config.compact,
+            time_budget=config.time_budget,
+        )
+    app = _shared_app
+    _lifespan_users += 1
+    try:
+        yield app
+    finally:
+        _lifespan_users -= 1
+        if _lifespan_users == 0 and _close_when_idle:
+            _shared_app = None
+            await app.connector.aclose()
+
+
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+
+# Engine/category selection, chosen with SEARXNG_PROFILE before the server starts
+PROFILE: SearchProfile = profile_from_env()
 
 # Initialize FastMCP server
-mcp = FastMCP("searxng_search")
+mcp = FastMCP("searxng_search", instructions=PROFILE.description, lifespan=lifespan)
 
 
-@mcp.tool()
-async def search(query: str, max_results: int = 10) -> Dict[str, Any]:
+def get_connector(ctx: Context) -> SearXNGConnector:
+    return ctx.request_context.lifespan_context.connector
+
+
+def get_seen_urls(ctx: Context) -> set[str] | None:
+    """URL keys already returned to this MCP session, when session dedup is enabled."""
+    app: AppContext = ctx.request_context.lifespan_context
+    if not app.session_dedupe:
+        return None
+    return app.seen_urls.setdefault(ctx.session, set())
+
+
+def get_deadline(ctx: Context, time_budget: float | None) -> float | None:
+    """Absolute deadline for a tool call, from its own budget or the server default."""
+    budget = time_budget or ctx.request_context.lifespan_context.time_budget
+    return time.monotonic() + budget if budget else None
+
+
+def out_of_time(deadline: float | None) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def profile_params() -> dict[str, Any]:
+    """Search parameters fixed by the active profile."""
+    return {
+        "categories": list(PROFILE.categories) if PROFILE.categories else None,
+        "engines": list(PROFILE.engines) if PROFILE.engines else None,
+        "time_range": PROFILE.time_range,
+    }
+
+
+@mcp.tool(name=PROFILE.tool_name)
+async def search(
+    query: str,
+    ctx: Context,
+    max_results: int = 10,
+    time_budget: float | None = None,
+) -> dict[str, Any] | str:
     """Search the web using SearXNG.
 
     Args:
         query: Search query string
-        results: Number of results to return (default: 10)
+        max_results: Maximum number of results to return (default: 10)
+        time_budget: Seconds to spend before returning whatever results are
+            in hand (optional)
+    """
+    ctx.request_context.lifespan_context.tool_calls += 1
+    deadline = get_deadline(ctx, time_budget)
+    results = []
+    try:
+        async with aclosing(
+            get_connector(ctx).search_iter(
+                query=query,
+                max_results=max_results,
+                seen_urls=get_seen_urls(ctx),
+                deadline=deadline,
+                **profile_params(),
+            )
+        ) as stream:
+            async for result in stream:
+                results.append(result)
+    except BackendUnavailable as exc:
+        # Tell the model not to retry right away instead of raising a tool error.
+        return {
+            "query": query,
+            "error": str(exc),
+            "retry_after": round(exc.retry_after, 1),
+        }
+    except Exception as exc:
+        if not is_transient(exc):
+            raise
+        # Retries exhausted and no stale page cached; the breaker is still closed.
+        error = f"SearXNG request failed: {type(exc).__name__}: {exc}"
+        return {
+            "query": query,
+            "error": error,
+            "retry_after": round(get_connector(ctx).breaker.retry_after(), 1),
+        }
+    partial = len(results) < max_results and out_of_time(deadline)
+    if ctx.request_context.lifespan_context.compact:
+        text = render_compact(query, results)
+        return text + "\n(Partial results: time budget exhausted.)" if partial else text
+    response = {"query": query, "number_of_results": len(results), "results": results}
+    if partial:
+        response["partial"] = True
+    return response
+
+
+@mcp.tool()
+async def search_many(
+    queries: list[str],
+    ctx: Context,
+    max_results: int = 10,
+    time_budget: float | None = None,
+) -> dict[str, Any] | str:
+    """Run several web searches at once using SearXNG.
+
+    Use this instead of repeated single-query search calls when you have a list of
+    queries to execute. Results are grouped per query; a URL already
+    returned for an earlier query is not repeated.
+
+    Args:
+        queries: List of search query strings
+        max_results: Maximum number of results per query (default: 10)
+        time_budget: Seconds to spend on the whole batch before returning
+            whatever results are in hand (optional)
     """
-    connector = SearXNGConnector()
-    results = await connector.search(query=query, max_results=max_results)
-    return results
+    ctx.request_context.lifespan_context.tool_calls += 1
+    deadline = get_deadline(ctx, time_budget)
+    batch = await get_connector(ctx).search_many(
+        queries=queries,
+        max_results=max_results,
+        seen_urls=get_seen_urls(ctx),
+        deadline=deadline,
+        **profile_params(),
+    )
+    if out_of_time(deadline):
+        batch["partial"] = True
+    if ctx.request_context.lifespan_context.compact:
+        sections = [
+            render_compact(query, entry["results"])
+            for query, entry in batch["queries"].items()
+        ]
+        sections += [
+            f"Search failed for: {query} ({error})"
+            for query, error in batch["errors"].items()
+        ]
+        if batch.get("partial"):
+            sections.append("(Partial results: time budget exhausted.)")
+        return "\n\n".join(sections)
+    return batch
+
+
+@mcp.tool()
+async def stats(ctx: Context) -> dict[str, Any]:
+    """Report request counts, latency percentiles, pool utilisation, cache hit rates,
+    per-engine health, retries and circuit breaker state."""
+    connector = get_connector(ctx)
+    return {
+        "profile": PROFILE.name,
+        "base_url": connector.base_url,
+        "requests": connector.stats.snapshot(),
+        "pool": connector.pool_stats(),
+        "cache": connector.cache.stats() if connector.cache is not None else None,
+        "engines": connector.engine_stats.snapshot(),
+        "slow_engines": connector.engine_stats.slow_engines(
+            connector.slow_engine_failure_rate
+        ),
+        "retry": connector.retry.snapshot(),
+        "circuit_breaker": connector.breaker.snapshot(),
+        "stale_served": connector.stale_served,
+    }
+
 
+@mcp.tool()
+async def ping(ctx: Context) -> dict[str, Any]:
+    """Health check: report that the server is up, with its process id, search
+    tool calls served, other client sessions open and memory use."""
+    app: AppContext = ctx.request_context.lifespan_context
+    # Build the HTTP client (TLS context, pool) now rather than on the first search.
+    _ = app.connector.client
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "profile": PROFILE.name,
+        "uptime_s": round(time.time() - app.connector.stats.started_at, 1),
+        "tool_calls": app.tool_calls,
+        # The lifespan is entered once per session, this one included.
+        "sessions": max(0, _lifespan_users - 1),
+        "rss_mb": round(current_rss_mb(), 1),
+    }
+
+
+def main(
+    transport: str | None = None, host: str | None = None, port: int | None = None
+):
+    """Run the server over stdio (default), or over HTTP so one process can
+    serve every agent: `streamable-http` or `sse`.
 
-def main():
-    # Initialize and run the server
-    mcp.run(transport="stdio")
+    Args:
+        transport: `stdio`, `streamable-http` or `sse` (default: `SEARXNG_MCP_TRANSPORT` or stdio)
+        host: Interface to bind for HTTP transports (default: `SEARXNG_MCP_HOST` or 127.0.0.1)
+        port: Port to bind for HTTP transports (default: `SEARXNG_MCP_PORT` or 8000)
+    """
+    global _close_when_idle
+    transport = transport or os.environ.get("SEARXNG_MCP_TRANSPORT", "stdio")
+    if transport not in TRANSPORTS:
+        raise ValueError(
+            f"Unknown transport {transport!r}; expected one of {', '.join(TRANSPORTS)}"
+        )
+    if transport != "stdio":
+        mcp.settings.host = host or os.environ.get(
+            "SEARXNG_MCP_HOST", mcp.settings.host
+        )
+        mcp.settings.port = int(
+            port or os.environ.get("SEARXNG_MCP_PORT", mcp.settings.port)
+        )
+        _close_when_idle = False
+    mcp.run(transport=transport)
 
 
 if __name__ == "__main__":
     main()
-    
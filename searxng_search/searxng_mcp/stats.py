@@ -0,0 +1,197 @@
+import resource
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(
+        len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class SearchStats:
+    """Request counters and a rolling latency window for the connector.
+
+    Args:
+        window: Number of most recent latencies kept for percentiles
+    """
+
+    def __init__(self, window: int = 1000):
+        self.started_at = time.time()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Time one upstream request and count it as in flight while it runs.
+
+        Only requests that finish, successfully or not, add a latency sample;
+        a cancelled one (e.g. the losing half of a hedged request) does not.
+        """
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            self._latencies.append(time.perf_counter() - start)
+            raise
+        else:
+            self._latencies.append(time.perf_counter() - start)
+        finally:
+            self.in_flight -= 1
+
+    def latency_percentile(self, pct: float, min_samples: int = 1) -> float | None:
+        """Latency percentile in seconds, or None with fewer than `min_samples` requests."""
+        if len(self._latencies) < max(1, min_samples):
+            return None
+        return percentile(sorted(self._latencies), pct)
+
+    def latency_percentiles(self) -> dict[str, float]:
+        values = sorted(self._latencies)
+        return {
+            f"p{pct}_ms": round(percentile(values, pct) * 1000, 2)
+            for pct in (50, 90, 95, 99)
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "latency": self.latency_percentiles(),
+        }
+
+
+class EngineStats:
+    """Per-engine health derived from SearXNG responses.
+
+    SearXNG does not report per-engine timings, so each engine that
+    contributed results is credited with the latency of the request it
+    answered in, and engines listed in `unresponsive_engines` count as
+    failures (usually upstream timeouts).
+
+    Args:
+        window: Number of most recent observations kept per engine
+        retry_after: Seconds after its last observation before an excluded
+            engine is given a fresh start
+    """
+
+    def __init__(self, window: int = 200, retry_after: float = 300.0):
+        self.window = window
+        self.retry_after = retry_after
+        self._latencies: dict[str, deque[float]] = {}
+        self._outcomes: dict[str, deque[bool]] = {}
+        self._reasons: dict[str, str] = {}
+        self._last_seen: dict[str, float] = {}
+
+    def record(self, data: dict[str, Any], latency: float) -> None:
+        """Record one SearXNG JSON response that took `latency` seconds."""
+        answered = set()
+        for result in data.get("results", []):
+            answered.update(result.get("engines") or [result.get("engine")])
+        answered.discard(None)
+        unresponsive = {}
+        for entry in data.get("unresponsive_engines", []):
+            if entry:
+                unresponsive[entry[0]] = entry[1] if len(entry) > 1 else "unresponsive"
+
+        now = time.monotonic()
+        for engine in answered:
+            self._latencies.setdefault(engine, deque(maxlen=self.window)).append(
+                latency
+            )
+            self._outcome(engine).append(True)
+            self._last_seen[engine] = now
+        for engine, reason in unresponsive.items():
+            self._outcome(engine).append(False)
+            self._reasons[engine] = reason
+            self._last_seen[engine] = now
+
+    def _outcome(self, engine: str) -> deque[bool]:
+        return self._outcomes.setdefault(engine, deque(maxlen=self.window))
+
+    def failure_rate(self, engine: str) -> float:
+        outcomes = self._outcomes.get(engine)
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def slow_engines(
+        self, max_failure_rate: float = 0.5, min_samples: int = 5
+    ) -> list[str]:
+        """Engines that failed more than `max_failure_rate` of their recent requests."""
+        now = time.monotonic()
+        slow = []
+        for engine, outcomes in self._outcomes.items():
+            if (
+                len(outcomes) < min_samples
+                or self.failure_rate(engine) <= max_failure_rate
+            ):
+                continue
+            if now - self._last_seen.get(engine, now) > self.retry_after:
+                # Excluded long enough: forget its history and let it be sampled again.
+                outcomes.clear()
+                continue
+            slow.append(engine)
+        return sorted(slow)
+
+    def exclude_slow(
+        self,
+        engines: Iterable[str],
+        max_failure_rate: float = 0.5,
+        min_samples: int = 5,
+    ) -> list[str]:
+        """Drop slow engines from `engines`, unless that would leave none."""
+        engines = list(engines)
+        slow = set(self.slow_engines(max_failure_rate, min_samples))
+        healthy = [engine for engine in engines if engine not in slow]
+        return healthy or engines
+
+    def snapshot(self) -> dict[str, Any]:
+        report = {}
+        for engine in sorted(self._outcomes):
+            latencies = sorted(self._latencies.get(engine, ()))
+            report[engine] = {
+                "samples": len(self._outcomes[engine]),
+                "failure_rate": round(self.failure_rate(engine), 3),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "last_failure": self._reasons.get(engine),
+            }
+        return report
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Run from `searxng_search` (`uv run pytest searxng_mcp/tests`) or anywhere else.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+# The stub SearXNG server used by the benchmarks.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
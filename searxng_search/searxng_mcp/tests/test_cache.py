@@ -0,0 +1,101 @@
+import pytest
+from searxng_mcp import cache as cache_module
+from searxng_mcp.cache import SearchCache
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_key_normalizes_query_and_sets():
+    key = SearchCache.make_key(
+        "Python  AsyncIO", categories=["it", "general"], engines=["ddg"]
+    )
+    assert key == SearchCache.make_key(
+        " python asyncio ", categories=["General", "it"], engines=["DDG"]
+    )
+    assert key != SearchCache.make_key(
+        "python asyncio", categories=["it", "general"], engines=["ddg"], page=2
+    )
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = SearchCache(ttl=10, stale_ttl=100)
+    cache.set("k", {"results": [1]})
+    clock.now += 9
+    assert cache.get("k") == {"results": [1]}
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_stale_entry_served_until_stale_ttl(clock):
+    cache = SearchCache(ttl=10, stale_ttl=100)
+    cache.set("k", {"results": [1]})
+    clock.now += 50
+    assert cache.get("k") is None
+    assert cache.get_stale("k") == {"results": [1]}
+    clock.now += 100
+    assert cache.get_stale("k") is None
+    assert cache.stale_hits == 1
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = SearchCache(max_entries=2)
+    cache.set("a", {"v": "a"})
+    cache.set("b", {"v": "b"})
+    assert cache.get("a") is not None
+    cache.set("c", {"v": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"}
+    assert cache.get("c") == {"v": "c"}
+    assert cache.evictions == 1
+
+
+def test_sqlite_tier_survives_restart(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SearchCache(ttl=10, path=path)
+    cache.set("k", {"results": [1]})
+    cache.close()
+
+    restarted = SearchCache(ttl=10, path=path)
+    assert restarted.get("k") == {"results": [1]}
+    assert restarted.disk_hits == 1
+    # Now in memory as well
+    assert restarted.get("k") == {"results": [1]}
+    assert restarted.hits == 1
+
+
+def test_sqlite_tier_honours_expiry(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SearchCache(ttl=10, path=path, stale_ttl=100)
+    cache.set("k", {"results": [1]})
+    cache.close()
+
+    clock.now += 20
+    restarted = SearchCache(ttl=10, path=path, stale_ttl=100)
+    assert restarted.get("k") is None
+    assert restarted.get_stale("k") == {"results": [1]}
+
+    clock.now += 200
+    # Opening the file drops entries past their stale window
+    assert SearchCache(ttl=10, path=path, stale_ttl=100).get_stale("k") is None
+
+
+def test_disk_entry_evicted_from_memory_is_still_found(clock, tmp_path):
+    cache = SearchCache(max_entries=1, path=str(tmp_path / "cache.sqlite"))
+    cache.set("a", {"v": "a"})
+    cache.set("b", {"v": "b"})
+    assert cache.get("a") == {"v": "a"}
+    assert cache.disk_hits == 1
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+from searxng_mcp import server
+from searxng_mcp.connector import SearXNGConnector
+from searxng_mcp.stats import SearchStats
+from stub_searxng import RESULTS_PER_PAGE, StubSearXNG
+
+
+def test_search_iter_stops_within_first_page():
+    async def run(url: str) -> list[dict]:
+        async with SearXNGConnector(base_url=url, http2=False) as conn:
+            results = [
+                result
+                async for result in conn.search_iter("q", max_results=3, prefetch=4)
+            ]
+            await asyncio.sleep(0.05)
+            return results
+
+    with StubSearXNG() as stub:
+        results = asyncio.run(run(stub.url))
+        assert len(results) == 3
+        # Three results fit in the first page; no further page was requested.
+        assert stub.requests == 1
+
+
+def test_search_iter_aclose_cancels_prefetched_pages():
+    async def run(stub: StubSearXNG) -> None:
+        async with SearXNGConnector(base_url=stub.url, http2=False) as conn:
+            pages = conn.search_iter("q", max_pages=10, prefetch=3)
+            first = [await anext(pages) for _ in range(RESULTS_PER_PAGE // 2)]
+            await pages.aclose()
+            assert len(first) == RESULTS_PER_PAGE // 2
+            assert asyncio.all_tasks() == {asyncio.current_task()}
+            sent = stub.requests
+            await asyncio.sleep(0.2)
+            # Page 1 plus at most `prefetch` pages ahead, and nothing sent after closing.
+            assert sent <= 4
+            assert stub.requests == sent
+
+    with StubSearXNG(latency=0.05) as stub:
+        asyncio.run(run(stub))
+
+
+def test_hedged_request_wins_and_is_timed_once():
+    async def run(url: str) -> tuple[dict, SearchStats]:
+        async with SearXNGConnector(
+            base_url=url, http2=False, hedge=True, hedge_min_samples=2
+        ) as conn:
+            for query in ("warm 1", "warm 2"):
+                await conn.search(query)
+            result = await conn.search("q")
+            return result, conn.stats
+
+    # The third request (the first try at "q") stalls; its hedge answers at once.
+    with StubSearXNG(delays=[0, 0, 1.0]) as stub:
+        result, stats = asyncio.run(run(stub.url))
+        assert len(result["results"]) == RESULTS_PER_PAGE
+        assert stub.requests == 4
+    assert stats.hedged == 1
+    assert stats.hedge_wins == 1
+    # The cancelled primary adds no latency sample; the hedge adds one.
+    assert len(stats._latencies) == 3
+    assert max(stats._latencies) < 1.0
+    assert stats.in_flight == 0
+
+
+def test_deadline_returns_partial_results():
+    async def run(url: str) -> dict:
+        async with SearXNGConnector(base_url=url, http2=False) as conn:
+            ctx = SimpleNamespace(
+                request_context=SimpleNamespace(
+                    lifespan_context=server.AppContext(connector=conn),
+                    session=object(),
+                )
+            )
+            return await server.search(
+                "q", ctx, max_results=2 * RESULTS_PER_PAGE, time_budget=0.3
+            )
+
+    # The first page comes back at once, the second not within the budget.
+    with StubSearXNG(delays=[0, 2.0]) as stub:
+        response = asyncio.run(run(stub.url))
+    assert response["partial"] is True
+    assert response["number_of_results"] == RESULTS_PER_PAGE
@@ -0,0 +1,37 @@
+import asyncio
+import socket
+import time
+
+import pytest
+from searxng_mcp.pool import ServerPool
+from stub_searxng import StubSearXNG
+
+
+def test_pool_members_answer_ping():
+    with (
+        StubSearXNG() as stub,
+        ServerPool(size=2, env={"SEARXNG_BASE_URL": stub.url}) as pool,
+    ):
+        deadline = time.monotonic() + pool.startup_timeout
+        while pool.snapshot()["ready"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert pool.snapshot()["ready"] == 2
+        ports = {server.port for server in pool.servers}
+        assert len(ports) == 2
+        for server in pool.servers:
+            report = asyncio.run(pool._ping(server))
+            assert report["status"] == "ok"
+            assert report["pid"] == server.process.pid
+        # Ports stay with their slots, so URLs handed out earlier remain valid.
+        assert {server.port for server in pool.servers} == ports
+
+
+def test_pool_refuses_a_taken_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        pool = ServerPool(size=1)
+        pool.servers[0].port = sock.getsockname()[1]
+        with pytest.raises(RuntimeError, match="port already in use"):
+            pool.start()
+        assert pool.servers[0].process is None
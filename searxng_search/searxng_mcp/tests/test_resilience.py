@@ -0,0 +1,204 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from searxng_mcp import resilience, server
+from searxng_mcp.cache import SearchCache
+from searxng_mcp.connector import SearXNGConnector
+from searxng_mcp.resilience import (
+    BackendUnavailable,
+    CircuitBreaker,
+    RetryPolicy,
+    is_transient,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+def status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://searxng/search")
+    return httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(code, request=request)
+    )
+
+
+@pytest.mark.parametrize("code", [429, 500, 502, 503, 504])
+def test_transient_statuses(code):
+    assert is_transient(status_error(code))
+
+
+@pytest.mark.parametrize("code", [400, 403, 404])
+def test_client_errors_are_not_transient(code):
+    assert not is_transient(status_error(code))
+
+
+def test_transport_errors_and_timeouts_are_transient():
+    assert is_transient(httpx.ConnectError("refused"))
+    assert is_transient(httpx.ReadTimeout("slow"))
+    assert is_transient(TimeoutError())
+    assert not is_transient(json.JSONDecodeError("bad", "<html>", 0))
+    assert not is_transient(ValueError())
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+    clock.now += 10
+    assert breaker.retry_after() == pytest.approx(20)
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow()
+
+
+def test_backoff_is_bounded():
+    policy = RetryPolicy(base_delay=0.2, max_delay=1.0)
+    assert all(0 <= policy.backoff(1) <= 0.2 for _ in range(100))
+    assert all(0 <= policy.backoff(10) <= 1.0 for _ in range(100))
+
+
+def connector(handler, **kwargs) -> SearXNGConnector:
+    conn = SearXNGConnector(
+        base_url="http://searxng",
+        http2=False,
+        retry=RetryPolicy(max_attempts=3, base_delay=0),
+        **kwargs,
+    )
+    conn._client = httpx.AsyncClient(
+        base_url="http://searxng", transport=httpx.MockTransport(handler)
+    )
+    return conn
+
+
+def test_transient_errors_are_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(
+            200,
+            json={
+                "query": "q",
+                "results": [{"url": "https://a.example/", "title": "A"}],
+            },
+        )
+
+    conn = connector(handler)
+    result = asyncio.run(conn.search("q"))
+    assert len(calls) == 3
+    assert len(result["results"]) == 1
+    assert conn.retry.retries == 2
+    assert conn.breaker.consecutive_failures == 0
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400)
+
+    conn = connector(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(conn.search("q"))
+    assert len(calls) == 1
+
+
+def test_undecodable_body_is_not_a_success():
+    conn = connector(
+        lambda request: httpx.Response(200, text="<html>proxy error</html>")
+    )
+    conn.breaker.consecutive_failures = 2
+    with pytest.raises(json.JSONDecodeError):
+        asyncio.run(conn.search("q"))
+    assert conn.breaker.consecutive_failures == 2
+
+
+def test_stale_cache_served_when_backend_fails():
+    cache = SearchCache(ttl=0, stale_ttl=3600)
+    conn = connector(lambda request: httpx.Response(502), cache=cache)
+    key = SearchCache.make_key("q")
+    cache.set(
+        key, {"query": "q", "results": [{"url": "https://a.example/", "title": "A"}]}
+    )
+    result = asyncio.run(conn.search("q"))
+    assert result["stale"] is True
+    assert conn.stale_served == 1
+
+
+def test_open_breaker_fails_fast():
+    calls = []
+    conn = connector(
+        lambda request: calls.append(request) or httpx.Response(200, json={})
+    )
+    conn.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    conn.breaker.record_failure()
+    with pytest.raises(BackendUnavailable):
+        asyncio.run(conn.search("q"))
+    assert not calls
+
+
+def tool_context(conn: SearXNGConnector) -> SimpleNamespace:
+    app = server.AppContext(connector=conn)
+    return SimpleNamespace(
+        request_context=SimpleNamespace(lifespan_context=app, session=object())
+    )
+
+
+def test_search_tool_returns_error_after_exhausted_retries():
+    def handler(request):
+        raise httpx.ConnectError("refused")
+
+    response = asyncio.run(server.search("q", tool_context(connector(handler))))
+    assert response["query"] == "q"
+    assert "ConnectError" in response["error"]
+    assert response["retry_after"] == 0.0
+
+
+def test_search_tool_returns_retry_after_when_breaker_open():
+    conn = connector(lambda request: httpx.Response(200, json={}))
+    conn.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    conn.breaker.record_failure()
+    response = asyncio.run(server.search("q", tool_context(conn)))
+    assert 0 < response["retry_after"] <= 60
@@ -0,0 +1,78 @@
+import pytest
+from searxng_mcp.urls import canonicalize_url, dedupe_results, url_key
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM/Path/", "https://example.com/Path"),
+        ("https://example.com:443/a", "https://example.com/a"),
+        ("http://example.com:8080/a", "http://example.com:8080/a"),
+        ("https://example.com/a#section", "https://example.com/a"),
+        ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+        (
+            "https://example.com/a?utm_source=x&utm_medium=y&id=3",
+            "https://example.com/a?id=3",
+        ),
+        (
+            "https://example.com/a?fbclid=1&gclid=2&ref_src=twsrc",
+            "https://example.com/a",
+        ),
+        ("https://example.com/a?q=", "https://example.com/a?q="),
+    ],
+)
+def test_canonicalize(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://github.com/org/repo/blob/main/README.md?ref=v2",
+        "https://docs.example.com/page?si=2",
+        "https://example.com/search?referrer=abc",
+    ],
+)
+def test_content_parameters_are_kept(url):
+    assert canonicalize_url(url) == url
+
+
+def test_unparseable_urls_are_left_alone():
+    assert canonicalize_url("not a url") == "not a url"
+    assert canonicalize_url("http://[::1") == "http://[::1"
+
+
+def test_key_ignores_scheme_and_www():
+    assert url_key("http://www.example.com/a/") == url_key(
+        "https://example.com/a?utm_campaign=z"
+    )
+
+
+def test_dedupe_keeps_first_and_canonicalizes():
+    results = [
+        {"url": "https://www.example.com/a?utm_source=x", "title": "first"},
+        {"url": "http://example.com/a/", "title": "duplicate"},
+        {"url": "https://example.com/b", "title": "other"},
+        {"title": "no url"},
+    ]
+    unique = dedupe_results(results)
+    assert [r["title"] for r in unique] == ["first", "other", "no url"]
+    assert unique[0]["url"] == "https://www.example.com/a"
+    assert results[0]["url"].endswith("utm_source=x")
+
+
+def test_dedupe_keeps_distinct_refs():
+    results = [
+        {"url": "https://github.com/org/repo?ref=main"},
+        {"url": "https://github.com/org/repo?ref=dev"},
+    ]
+    assert len(dedupe_results(results)) == 2
+
+
+def test_dedupe_across_calls_with_seen():
+    seen = set()
+    dedupe_results([{"url": "https://example.com/a"}], seen)
+    assert dedupe_results(
+        [{"url": "https://www.example.com/a/"}, {"url": "https://example.com/b"}], seen
+    ) == [{"url": "https://example.com/b"}]
+    assert len(seen) == 2
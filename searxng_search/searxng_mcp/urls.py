@@ -0,0 +1,100 @@
+from collections.abc import Iterable
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the click and never change the page content.
+# Generic names such as `ref` (a branch on GitHub), `si` or `referrer` are left
+# alone: on some sites they select what the page shows.
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "gbraid",
+    "wbraid",
+    "msclkid",
+    "yclid",
+    "twclid",
+    "mc_cid",
+    "mc_eid",
+    "igshid",
+    "ref_src",
+    "ref_url",
+    "_ga",
+    "_gl",
+    "_hsenc",
+    "_hsmi",
+    "mkt_tok",
+    "vero_id",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_", "oly_")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a result URL without changing the page it points to.
+
+    Lower-cases the scheme and host, drops default ports, fragments,
+    tracking parameters and trailing slashes, and sorts the remaining
+    query parameters.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    path = parts.path.rstrip("/")
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(k)
+        )
+    )
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_key(url: str) -> str:
+    """Dedup key for a URL: its canonical form, ignoring `http`/`https` and `www.`."""
+    canonical = canonicalize_url(url)
+    _, _, rest = canonical.partition("://")
+    if rest.startswith("www."):
+        rest = rest[4:]
+    return rest or canonical
+
+
+def dedupe_results(
+    results: Iterable[dict[str, Any]], seen: set[str] | None = None
+) -> list[dict[str, Any]]:
+    """Canonicalize result URLs and drop duplicates.
+
+    Args:
+        results: SearXNG result dicts; they are not modified
+        seen: Keys of URLs already returned earlier (e.g. in the same
+            session). It is updated in place with the keys kept here.
+    """
+    seen = seen if seen is not None else set()
+    unique = []
+    for result in results:
+        url = result.get("url")
+        if not url:
+            unique.append(result)
+            continue
+        key = url_key(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append({**result, "url": canonicalize_url(url)})
+    return unique
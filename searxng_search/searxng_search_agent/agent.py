@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 
 from google.adk.agents import Agent
 from google.adk.models.lite_llm import LiteLlm
@@ -27,7 +28,8 @@ root_agent = Agent(
             connection_params=StdioConnectionParams(
                 server_params=StdioServerParameters(
                     command="uv",
-                    args=["run", "searxng_mcp/server.py"],
+                    args=["run", str(Path(__file__).resolve().parents[1] / "searxng_mcp" / "server.py")],
+                    env={k: v for k, v in os.environ.items() if k.startswith("SEARXNG_")},
                 ),
             ),
         )